@@ -0,0 +1,104 @@
+"""Generate the bundled table of Unicode emojis, `disgrace/data/unicode_emojis.json`.
+
+The table maps Discord's shortcodes onto the fully-qualified emojis of Unicode's
+``emoji-test.txt``: single emojis, keycaps, flags, ZWJ sequences and skin tones alike.
+The shortcodes of an emoji are listed together, the one to display first.
+
+Discord's shortcodes are taken from the `discord-emoji` package, which mirrors the table
+of its client. That table has no skin tones; their shortcodes are derived from the
+emoji's own, the way Discord names them, as in ``thumbsup_tone3``. Emojis missing from
+it are named after their Unicode name or region, as Discord names its newer emojis.
+
+Usage: ``python scripts/generate_unicode_emojis.py [path/to/emoji-test.txt]``. Without
+a path, the latest ``emoji-test.txt`` is downloaded.
+"""
+
+import importlib
+import pathlib
+import re
+import sys
+
+import httpx
+import msgspec
+
+OUTPUT = pathlib.Path(__file__).parents[1] / "src/disgrace/data/unicode_emojis.json"
+EMOJI_TEST_URL = "https://unicode.org/Public/emoji/latest/emoji-test.txt"
+VS16 = "\N{VARIATION SELECTOR-16}"
+SKIN_TONES = {chr(0x1F3FB + tone): f"tone{tone + 1}" for tone in range(5)}
+REGIONAL_INDICATORS = {
+    chr(0x1F1E6 + letter): chr(ord("a") + letter) for letter in range(26)
+}
+
+
+def fully_qualified(emoji_test: str) -> list[tuple[str, str]]:
+    """Return the fully-qualified emojis of ``emoji-test.txt`` with their names."""
+    emojis: list[tuple[str, str]] = []
+    for line in emoji_test.splitlines():
+        codepoints, _, rest = line.partition(";")
+        status, _, comment = rest.partition("#")
+        if status.strip() == "fully-qualified":
+            emoji = "".join(chr(int(code, 16)) for code in codepoints.split())
+            # "# 😀 E1.0 grinning face"
+            name = comment.strip().split(" ", 2)[2]
+            emojis.append((emoji, name))
+    return emojis
+
+
+def discord_shortcodes() -> dict[str, str]:
+    """Return the table of Discord's shortcodes to emojis."""
+    # only this script needs the package, so it is not a dependency
+    return importlib.import_module("discord_emoji.table").DISCORD_TO_UNICODE
+
+
+def unicode_shortcode(emoji: str, name: str) -> str:
+    """Return the shortcode Discord gives to an emoji missing from its table."""
+    if all(char in REGIONAL_INDICATORS for char in emoji):
+        return "flag_" + "".join(map(REGIONAL_INDICATORS.__getitem__, emoji))
+    return re.sub("[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        emoji_test = pathlib.Path(sys.argv[1]).read_text("utf-8")
+    else:
+        emoji_test = httpx.get(EMOJI_TEST_URL).raise_for_status().text
+
+    # the dump does not tell which shortcode Discord displays; it is the first one
+    # starting with a letter, as "thumbsup" rather than "+1"
+    by_emoji: dict[str, list[str]] = {}
+    for shortcode, emoji in sorted(
+        discord_shortcodes().items(), key=lambda item: (not item[0][0].isalpha(), item)
+    ):
+        by_emoji.setdefault(emoji.replace(VS16, ""), []).append(shortcode)
+
+    table: dict[str, str] = {}
+    for emoji, name in fully_qualified(emoji_test):
+        key = emoji.replace(VS16, "")
+        if tones := [SKIN_TONES[char] for char in key if char in SKIN_TONES]:
+            base = "".join(char for char in key if char not in SKIN_TONES)
+            # one suffix for people of the same tone, one for each otherwise
+            suffix = "_".join(tones if len(set(tones)) > 1 else tones[:1])
+            shortcodes = [
+                f"{code}_{suffix}"
+                for code in by_emoji.get(base)
+                or [unicode_shortcode(base, name.partition(":")[0])]
+            ]
+        else:
+            shortcodes = by_emoji.setdefault(key, [unicode_shortcode(key, name)])
+
+        for shortcode in shortcodes:
+            table.setdefault(shortcode, emoji)
+
+    # regional indicators are not emojis of their own in emoji-test.txt
+    for emoji, shortcodes in by_emoji.items():
+        if emoji in REGIONAL_INDICATORS:
+            for shortcode in shortcodes:
+                table.setdefault(shortcode, emoji)
+
+    OUTPUT.parent.mkdir(exist_ok=True)
+    OUTPUT.write_bytes(msgspec.json.format(msgspec.json.encode(table)))
+    print(f"{len(table)} shortcodes of {len(set(table.values()))} emojis written")
+
+
+if __name__ == "__main__":
+    main()
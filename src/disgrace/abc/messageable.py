@@ -5,7 +5,8 @@ from disgrace import ui
 from disgrace.allowed_mentions import AllowedMentions
 from disgrace.flags import MessageFlags
 from disgrace.models.embed import Embed
-from disgrace.resource import FileResource
+from disgrace.prepared_message import PreparedMessage
+from disgrace.resource import AnyResource
 
 type Sticker = object  # TODO: Stickers
 type Poll = object  # TODO: Polls
@@ -19,7 +20,7 @@ class Messageable(Protocol):
         content: str | None = None,
         *,
         embeds: Embed | abc.Sequence[Embed] = (),
-        files: FileResource | abc.Sequence[FileResource] = (),
+        files: AnyResource | abc.Sequence[AnyResource] = (),
         stickers: abc.Sequence[Sticker] = (),
         flags: MessageFlags = MessageFlags.none,
         allowed_mentions: AllowedMentions | None = None,
@@ -27,6 +28,12 @@ class Messageable(Protocol):
         poll: Poll | None = None,
     ) -> abc.Awaitable[None]: ...  # TODO
 
+    def send_prepared(
+        self, message: PreparedMessage, /, *, content: str | None = None
+    ) -> abc.Awaitable[None]:
+        """Send a message encoded ahead, optionally replacing its content."""
+        ...
+
 
 class MessageableV2(Protocol):
     __slots__ = ()
@@ -1,8 +1,8 @@
-from typing import TYPE_CHECKING, Literal, Self, cast as cast_type
+from typing import TYPE_CHECKING, Literal, Self, cast as cast_type, override
 
 import attrs
 
-from disgrace import ids
+from disgrace import http, ids
 from disgrace.urls import ALT_CDN, CDN
 
 __all__ = ("Asset",)
@@ -39,6 +39,14 @@ class Asset[FmtT: StaticOrGif | Lottie]:
     def with_size(self, size: Size, /) -> Self:
         return attrs.evolve(self, size=size)
 
+    @override
+    def __str__(self) -> str:
+        return f"{self.url}.{self.format}?size={self.size}"
+
+    async def read(self) -> bytes:
+        """Download the asset using the current client's connection pool."""
+        return await http.current_client.get().read(str(self))
+
     @classmethod
     def _from_icon(
         cls,
@@ -0,0 +1,346 @@
+"""Requesting guild members over the gateway.
+
+Discord only sends the members of large guilds on request: a REQUEST_GUILD_MEMBERS
+payload, answered with GUILD_MEMBERS_CHUNK events of up to 1000 members each. Requests
+must go through the shard of the guild, and each connection may only send so many
+payloads a minute; `MemberChunker` thus keeps a queue of requests per shard, so that
+chunking every guild takes as long as the busiest shard needs rather than the sum of all.
+
+The received members are stored by `State`, which listens to the chunks on its own;
+requests track their progress and, when iterated over, yield the chunks as they arrive.
+Chunks of a session are not sent again on the next one; guilds whose shard starts
+a new session before all their chunks arrive are counted as failed.
+"""
+
+import itertools
+import logging
+import math
+from collections import abc, deque
+from typing import Self
+
+import anyio
+import anyio.abc
+import anyio.streams.memory
+import attrs
+import msgspec
+
+from disgrace import events, ids
+from disgrace.dispatch import EventDispatcher
+from disgrace.models.common import cast_int_id, cast_str_id
+from disgrace.sharding import ShardManager, shard_id_for
+from disgrace.structs import raw_ids
+from disgrace.structs.gateway import (
+    RawGuildCreate,
+    RawGuildMembersChunk,
+    RawReady,
+    RawRequestGuildMembers,
+    RawUnavailableGuild,
+)
+
+__all__ = ("ChunkProgress", "MemberChunker", "MemberRequest")
+
+_log = logging.getLogger(__name__)
+
+type _Queue = anyio.streams.memory.MemoryObjectSendStream[
+    tuple[ids.GuildId, str, RawRequestGuildMembers]
+]
+
+
+@attrs.define
+class ChunkProgress:
+    guilds: int = 0
+    """Number of guilds requested."""
+    completed: int = 0
+    """Number of guilds whose every chunk has arrived."""
+    failed: int = 0
+    """Number of guilds whose chunks were lost, such as to a new session of the shard."""
+    chunks: int = 0
+    members: int = 0
+    not_found: list[raw_ids.UserId] = attrs.Factory(list[raw_ids.UserId])
+    """Requested user IDs which are not members."""
+
+    @property
+    def done(self) -> bool:
+        return self.completed + self.failed == self.guilds
+
+    @property
+    def ratio(self) -> float:
+        return self.completed / self.guilds if self.guilds else 1.0
+
+
+@attrs.define(eq=False)
+class MemberRequest:
+    """Members requested of one or more guilds.
+
+    Iterating over a request yields its chunks as they arrive, until every guild
+    is complete or has failed. The methods other than `wait` are called by
+    `MemberChunker`.
+    """
+
+    progress: ChunkProgress = attrs.Factory(ChunkProgress)
+    stream: bool = True
+    """Whether to keep the chunks for iterating over."""
+    _chunks: dict[str, int] = attrs.field(factory=dict[str, int], init=False)
+    """Number of chunks received so far, by the nonce of each pending guild."""
+    _buffer: deque[RawGuildMembersChunk] = attrs.field(
+        factory=deque[RawGuildMembersChunk], init=False
+    )
+    _changed: anyio.Event = attrs.field(factory=anyio.Event, init=False)
+    _done: anyio.Event = attrs.field(factory=anyio.Event, init=False)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def __aiter__(self) -> Self:
+        return self
+
+    async def __anext__(self) -> RawGuildMembersChunk:
+        while not self._buffer:
+            if self.done or not self.stream:
+                raise StopAsyncIteration
+            await self._changed.wait()
+        return self._buffer.popleft()
+
+    async def wait(self) -> ChunkProgress:
+        """Wait until every guild is complete, discarding the chunks."""
+        self.stream = False
+        self._buffer.clear()
+        await self._done.wait()
+        return self.progress
+
+    @property
+    def nonces(self) -> abc.Collection[str]:
+        """Nonces of the guilds still awaiting chunks."""
+        return self._chunks.keys()
+
+    def expect(self, nonce: str, /) -> None:
+        self._chunks[nonce] = 0
+        self.progress.guilds += 1
+
+    def feed(self, nonce: str, chunk: RawGuildMembersChunk, /) -> bool:
+        """Account for a chunk, returning whether its guild is complete."""
+        self.progress.chunks += 1
+        self.progress.members += len(chunk.members)
+        self.progress.not_found.extend(chunk.not_found)
+        if self.stream:
+            self._buffer.append(chunk)
+
+        received = self._chunks[nonce] = self._chunks[nonce] + 1
+        complete = received >= chunk.chunk_count
+        if complete:
+            del self._chunks[nonce]
+            self.progress.completed += 1
+            if not self._chunks:
+                self.finish()
+
+        self._notify()
+        return complete
+
+    def fail(self, nonce: str, /) -> None:
+        """Give up on the chunks of a guild."""
+        if self._chunks.pop(nonce, None) is None:
+            return
+        self.progress.failed += 1
+        if not self._chunks:
+            self.finish()
+
+    def finish(self) -> None:
+        """Stop waiting for chunks."""
+        self._chunks.clear()
+        self._done.set()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = anyio.Event()
+
+
+@attrs.define
+class MemberChunker:
+    """Requests guild members through the shards of a `ShardManager`.
+
+    Requests are sent by `run`, which has to be running alongside the shards.
+    """
+
+    shards: ShardManager
+    chunk_large_guilds: bool = False
+    """Whether to request every member of large guilds as they become available."""
+    progress: ChunkProgress = attrs.field(factory=ChunkProgress, init=False)
+    """Progress of chunking large guilds."""
+
+    _pending: dict[str, MemberRequest] = attrs.field(
+        factory=dict[str, MemberRequest], init=False
+    )
+    """Requests awaiting chunks, by nonce."""
+    _sent: dict[str, tuple[int, str | None]] = attrs.field(
+        factory=dict[str, tuple[int, str | None]], init=False
+    )
+    """Shard and session each pending nonce was sent through."""
+    _queues: dict[int, _Queue] = attrs.field(factory=dict[int, _Queue], init=False)
+    _nonces: abc.Iterator[int] = attrs.field(factory=itertools.count, init=False)
+    _task_group: anyio.abc.TaskGroup | None = attrs.field(default=None, init=False)
+
+    def subscribe(self, dispatcher: EventDispatcher, /) -> None:
+        dispatcher.subscribe("READY", self._ready)
+        dispatcher.subscribe("GUILD_MEMBERS_CHUNK", self._members_chunk)
+        if self.chunk_large_guilds:
+            dispatcher.subscribe("GUILD_CREATE", self._guild_create)
+
+    async def run(
+        self, *, task_status: anyio.abc.TaskStatus[None] = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        """Send requests until cancelled. Compatible with `TaskGroup.start`."""
+        try:
+            async with anyio.create_task_group() as tg:
+                self._task_group = tg
+                task_status.started()
+                await anyio.sleep_forever()
+
+        finally:
+            self._task_group = None
+            self._queues.clear()
+            for request in set(self._pending.values()):
+                request.finish()
+            self._pending.clear()
+            self._sent.clear()
+
+    def request(
+        self,
+        guild_ids: abc.Iterable[ids.GuildId],
+        /,
+        *,
+        query: str = "",
+        limit: int = 0,
+        user_ids: abc.Sequence[ids.UserId] | None = None,
+        presences: bool = False,
+    ) -> MemberRequest:
+        """Request the members of given guilds.
+
+        Members are matched either by `user_ids`, or by the prefix of their username;
+        an empty `query` with no `limit` matches every member, which requires
+        the GUILD_MEMBERS intent. Discord takes a single guild per request, so each
+        guild costs one of its shard's sends.
+        """
+        return self._request(
+            guild_ids,
+            MemberRequest(),
+            query=msgspec.UNSET if user_ids else query,
+            limit=limit,
+            user_ids=msgspec.UNSET if not user_ids else list(map(cast_str_id, user_ids)),
+            presences=presences,
+        )
+
+    def cancel(self, request: MemberRequest, /) -> None:
+        """Stop waiting for the chunks of a request, sending none of its remains."""
+        for nonce in request.nonces:
+            self._pending.pop(nonce, None)
+            self._sent.pop(nonce, None)
+        request.finish()
+
+    def _request(
+        self,
+        guild_ids: abc.Iterable[ids.GuildId],
+        request: MemberRequest,
+        **fields: object,
+    ) -> MemberRequest:
+        if self._task_group is None:
+            msg = "The chunker is not running"
+            raise RuntimeError(msg)
+
+        shard_count = self.shards.shard_count or 1
+        for guild_id in guild_ids:
+            self.shards.shard_for(guild_id)  # fail early for guilds of other managers
+            nonce = str(next(self._nonces))
+            payload = RawRequestGuildMembers(
+                guild_id=cast_str_id(guild_id),
+                nonce=nonce,
+                **fields,  # pyright: ignore[reportArgumentType]
+            )
+            request.expect(nonce)
+            self._pending[nonce] = request
+            self._queue(shard_id_for(guild_id, shard_count)).send_nowait(
+                (guild_id, nonce, payload)
+            )
+
+        if not request.nonces:
+            request.finish()
+        return request
+
+    def _queue(self, shard_id: int, /) -> _Queue:
+        try:
+            return self._queues[shard_id]
+
+        except KeyError:
+            assert self._task_group is not None
+            send, receive = anyio.create_memory_object_stream[
+                tuple[ids.GuildId, str, RawRequestGuildMembers]
+            ](math.inf)
+            self._task_group.start_soon(self._send_requests, receive)
+            self._queues[shard_id] = send
+            return send
+
+    async def _send_requests(
+        self,
+        receive: anyio.streams.memory.MemoryObjectReceiveStream[
+            tuple[ids.GuildId, str, RawRequestGuildMembers]
+        ],
+    ) -> None:
+        # the shard's send limiter paces the requests, and holds them back until
+        # the shard is ready
+        async with receive:
+            async for guild_id, nonce, payload in receive:
+                while nonce in self._pending:
+                    try:
+                        shard = self.shards.shard_for(guild_id)
+                        await shard.send(events.RequestGuildMembers(d=payload))
+
+                    except anyio.BrokenResourceError:
+                        # the connection dropped mid-send; wait for the next session
+                        continue
+
+                    except Exception:
+                        _log.exception("Requesting members of guild %s failed", guild_id)
+                        self._fail(nonce)
+
+                    else:
+                        if nonce in self._pending:
+                            self._sent[nonce] = (shard.shard_id, shard.session_id)
+                        break
+
+    def _fail(self, nonce: str, /) -> None:
+        self._sent.pop(nonce, None)
+        request = self._pending.pop(nonce, None)
+        if request is not None:
+            request.fail(nonce)
+
+    async def _ready(self, data: RawReady) -> None:
+        # chunks requested during the previous session of the shard are never sent
+        shard_id = 0 if isinstance(data.shard, msgspec.UnsetType) else data.shard[0]
+        lost = [
+            nonce
+            for nonce, (sent_shard_id, session_id) in self._sent.items()
+            if sent_shard_id == shard_id and session_id != data.session_id
+        ]
+        for nonce in lost:
+            self._fail(nonce)
+
+    async def _members_chunk(self, data: RawGuildMembersChunk) -> None:
+        if isinstance(data.nonce, msgspec.UnsetType):
+            return
+
+        request = self._pending.get(data.nonce)
+        if request is not None and request.feed(data.nonce, data):
+            del self._pending[data.nonce]
+            self._sent.pop(data.nonce, None)
+
+    async def _guild_create(self, data: RawGuildCreate | RawUnavailableGuild) -> None:
+        if (
+            isinstance(data, RawUnavailableGuild)
+            or not data.large
+            or self._task_group is None
+        ):
+            return
+
+        request = MemberRequest(self.progress, stream=False)
+        self._request([cast_int_id(data.id)], request, query="", limit=0)
@@ -1,7 +1,78 @@
+from http import HTTPStatus
+
+import anyio
 import attrs
+import httpx
+
+from disgrace.chunking import MemberChunker
+from disgrace.dispatch import EventDispatcher
+from disgrace.exceptions import HttpException, LoginFailure
+from disgrace.flags import CacheFlags, Intents
+from disgrace.http import (
+    DEFAULT_POOL_LIMITS,
+    HTTPClient,
+    Route,
+    create_session,
+    current_client,
+)
+from disgrace.sessions import SessionStore
+from disgrace.sharding import ShardManager
+from disgrace.state import State, state
 
 
 @attrs.define
 class Client:
-    async def login(self) -> None: ...
+    token: str = attrs.field(repr=False)
+    http2: bool = False
+    """Whether to multiplex requests over HTTP/2. Requires the ``http2`` extra."""
+    pool_limits: httpx.Limits = DEFAULT_POOL_LIMITS
+    intents: Intents = Intents.default
+    shard_count: int | None = None
+    """Total number of shards. `None` uses the count recommended by Discord."""
+    dispatcher: EventDispatcher = attrs.Factory(EventDispatcher)
+    session_store: SessionStore | None = None
+    """Store to resume sessions from on start and save them to on close."""
+    cache_flags: CacheFlags = CacheFlags.all
+    """Entities to keep in the `state` cache."""
+    chunk_large_guilds: bool = False
+    """Whether to request every member of large guilds as they become available."""
+    http: HTTPClient = attrs.field(init=False)
+    state: State = attrs.field(init=False)
+    shards: ShardManager = attrs.field(init=False)
+    chunker: MemberChunker = attrs.field(init=False)
+
+    def __attrs_post_init__(self) -> None:
+        session = create_session(http2=self.http2, limits=self.pool_limits)
+        self.http = HTTPClient(self.token, session=session)
+        self.state = State(self.cache_flags)
+        self.state.subscribe(self.dispatcher)
+        self.shards = ShardManager(
+            self.http,
+            self.intents,
+            self.dispatcher,
+            shard_count=self.shard_count,
+            session_store=self.session_store,
+        )
+        self.chunker = MemberChunker(self.shards, self.chunk_large_guilds)
+        self.chunker.subscribe(self.dispatcher)
+
+    async def login(self) -> None:
+        current_client.set(self.http)
+        state.set(self.state)
+        try:
+            await self.http.request(Route(Route.Method.GET, "/users/@me"))
+
+        except HttpException as exc:
+            if exc.status == HTTPStatus.UNAUTHORIZED:
+                raise LoginFailure from exc
+            raise
+
+    async def start(self) -> None:
+        """Log in and run the shards until cancelled."""
+        await self.login()
+        async with anyio.create_task_group() as tg:
+            await tg.start(self.chunker.run)
+            await self.shards.run()
 
+    async def close(self) -> None:
+        await self.http.aclose()
@@ -0,0 +1,63 @@
+"""JSON encoders and decoders shared by the whole library.
+
+Creating a `msgspec.json.Decoder` compiles a plan for its type, which costs as much as
+decoding a typical payload; `decoder` builds one per type on first use and returns the
+same one from then on. msgspec's encoders are not typed, so all encoding goes through
+one encoder. `encode_text` writes into a per-thread buffer reused between calls.
+"""
+
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Final, overload
+
+import msgspec
+
+__all__ = ("decode", "decoder", "encode", "encode_text")
+
+_encoder = msgspec.json.Encoder()
+
+encode: Final = _encoder.encode
+"""Encode an object into JSON bytes."""
+
+
+class _Buffer(threading.local):
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+
+_buffer = _Buffer()
+
+
+if TYPE_CHECKING:
+
+    @overload
+    def decoder[T](
+        type: type[T], /, *, strict: bool = True
+    ) -> msgspec.json.Decoder[T]: ...
+    @overload
+    def decoder(type: Any, /, *, strict: bool = True) -> msgspec.json.Decoder[Any]: ...
+
+
+@functools.cache
+def decoder(type: Any, /, *, strict: bool = True) -> msgspec.json.Decoder[Any]:
+    """Return the decoder of JSON into a type, such as a struct or a union of them.
+
+    Lax decoders, with ``strict=False``, decode string snowflakes into `ids`.
+    """
+    return msgspec.json.Decoder(type, strict=strict)
+
+
+def decode[T](data: bytes | str, type: type[T], /, *, strict: bool = True) -> T:
+    """Decode JSON into a type, with the decoder shared by its other uses."""
+    return decoder(type, strict=strict).decode(data)
+
+
+def encode_text(obj: Any, /) -> str:
+    """Encode an object into a JSON string, such as a websocket text frame.
+
+    The JSON is encoded into a buffer kept between calls and decoded from it, rather
+    than into bytes of its own first.
+    """
+    data = _buffer.data
+    _encoder.encode_into(obj, data)
+    return data.decode()
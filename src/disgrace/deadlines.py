@@ -0,0 +1,478 @@
+"""Keeping interactions from running out of time to respond.
+
+Discord fails an interaction which is not responded to within
+`InteractionLimits.response_timeout` of its creation. `InteractionScheduler` keeps the
+deadline of every pending interaction in a `TimerWheel`; once `defer_at` of the window
+has passed without a response, it defers the response on the handler's behalf, which
+extends the window to `InteractionLimits.deferred_response_timeout` for editing in the
+actual response.
+
+Deadlines are counted from the moment an interaction is received rather than from when
+its handler gets to run, so time lost to a stalled event loop is accounted for: the
+wheel catches up on every tick it missed at once, and deferring does not wait on the
+handler. The delays are recorded in `InteractionStats`.
+
+Listeners and automatic deferrals run as tasks of the scheduler; their exceptions are
+logged rather than stopping it.
+"""
+
+import bisect
+import enum
+import logging
+import math
+from collections import abc
+from typing import Final
+
+import anyio
+import anyio.abc
+import attrs
+import msgspec
+
+from disgrace.dispatch import EventDispatcher
+from disgrace.exceptions import InteractionResponded, InteractionTimedOut
+from disgrace.flags import MessageFlags
+from disgrace.http import HTTPClient, Route
+from disgrace.limits import InteractionLimits
+from disgrace.structs.interaction import (
+    InteractionCallbackTypeNS,
+    InteractionTypeNS,
+    RawInteraction,
+    RawInteractionData,
+    RawInteractionResponse,
+)
+
+__all__ = (
+    "InteractionScheduler",
+    "InteractionState",
+    "InteractionStats",
+    "LatencyHistogram",
+    "PendingInteraction",
+    "TimerWheel",
+)
+
+_log = logging.getLogger(__name__)
+
+type Sender = abc.Callable[[RawInteractionResponse], abc.Awaitable[None]]
+"""Sends the initial response to an interaction."""
+type Listener = abc.Callable[[PendingInteraction], abc.Awaitable[object]]
+
+DEFAULT_BOUNDS: Final = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0, 10.0,
+)  # fmt: skip
+"""Upper bounds, in seconds, of the buckets of a `LatencyHistogram`."""
+
+
+# ---------------------------------------- metrics ---------------------------------------
+@attrs.define
+class LatencyHistogram:
+    """Counts of latencies falling into buckets of increasing width."""
+
+    bounds: tuple[float, ...] = DEFAULT_BOUNDS
+    """Upper bounds of the buckets; latencies above the last fall into an extra one."""
+    counts: list[int] = attrs.field(init=False)
+    count: int = attrs.field(default=0, init=False)
+    total: float = attrs.field(default=0.0, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def observe(self, seconds: float, /) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float, /) -> float:
+        """Return the upper bound of the bucket the q-th quantile falls into."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts, strict=False):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return math.inf
+
+
+@attrs.define
+class InteractionStats:
+    responded: int = 0
+    """Interactions responded to by their handlers within the window."""
+    deferred: int = 0
+    """Interactions deferred by the scheduler."""
+    expired: int = 0
+    """Interactions whose window ran out before a response."""
+    acknowledged: LatencyHistogram = attrs.Factory(LatencyHistogram)
+    """Time from receiving an interaction to its initial response or deferral."""
+    completed: LatencyHistogram = attrs.Factory(LatencyHistogram)
+    """Time from receiving an interaction to its handler's response."""
+    lag: LatencyHistogram = attrs.Factory(LatencyHistogram)
+    """Delay of timers past their due time; grows with event loop stalls."""
+
+
+# -------------------------------------- timer wheel -------------------------------------
+@attrs.define
+class TimerWheel[T]:
+    """Timers bucketed into slots by the tick they are due at.
+
+    Scheduling and cancelling a timer is O(1); advancing visits only the slots of the
+    ticks elapsed since, and at most every slot once. Timers fire up to a tick late.
+    """
+
+    start: float
+    """Time the wheel starts turning at."""
+    resolution: float = 0.05
+    """Length of a tick, in seconds."""
+    size: int = 512
+    _tick: int = attrs.field(init=False)
+    """Next tick to visit."""
+    _slots: list[dict[T, int]] = attrs.field(init=False)
+    """Due ticks of the timers, by slot."""
+    _due: dict[T, int] = attrs.field(factory=dict[T, int], init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._tick = math.floor(self.start / self.resolution)
+        self._slots = [{} for _ in range(self.size)]
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, item: T, /) -> bool:
+        return item in self._due
+
+    def schedule(self, item: T, at: float, /) -> None:
+        """Fire a timer at given time, replacing the item's previous timer."""
+        self.cancel(item)
+        due = max(math.ceil(at / self.resolution), self._tick)
+        self._slots[due % self.size][item] = due
+        self._due[item] = due
+
+    def cancel(self, item: T, /) -> bool:
+        due = self._due.pop(item, None)
+        if due is None:
+            return False
+        del self._slots[due % self.size][item]
+        return True
+
+    def advance(self, now: float, /) -> list[T]:
+        """Return the timers due by given time, removing them from the wheel."""
+        target = math.floor(now / self.resolution)
+        fired: list[T] = []
+        # after a stall of over a revolution, every slot is visited just once
+        for tick in range(self._tick, min(target, self._tick + self.size - 1) + 1):
+            slot = self._slots[tick % self.size]
+            if not slot:
+                continue
+            for item, due in tuple(slot.items()):
+                if due <= target:
+                    del slot[item]
+                    del self._due[item]
+                    fired.append(item)
+
+        self._tick = max(self._tick, target + 1)
+        return fired
+
+
+# -------------------------------------- interactions ------------------------------------
+class InteractionState(enum.Enum):
+    PENDING = enum.auto()
+    DEFERRING = enum.auto()
+    DEFERRED = enum.auto()
+    RESPONDED = enum.auto()
+    EXPIRED = enum.auto()
+
+
+@attrs.define(eq=False)
+class PendingInteraction:
+    """An interaction tracked by an `InteractionScheduler` until responded to."""
+
+    interaction: RawInteraction
+    received_at: float
+    """Event loop time the interaction was received at."""
+    _scheduler: "InteractionScheduler"
+    _send: Sender
+    state: InteractionState = attrs.field(default=InteractionState.PENDING, init=False)
+    _acknowledged: anyio.Event = attrs.field(factory=anyio.Event, init=False)
+
+    @property
+    def data(self) -> RawInteractionData | msgspec.UnsetType:
+        return self.interaction.data
+
+    @property
+    def deadline(self) -> float:
+        """Event loop time by which the interaction has to be responded to."""
+        if self.state in {InteractionState.DEFERRED, InteractionState.DEFERRING}:
+            return self.received_at + InteractionLimits.deferred_response_timeout
+        return self.received_at + InteractionLimits.response_timeout
+
+    async def defer(self, *, ephemeral: bool = False) -> None:
+        """Acknowledge the interaction, to respond to it later."""
+        if self.state is not InteractionState.PENDING:
+            self._check_open()
+            return
+
+        await self._defer(ephemeral=ephemeral)
+
+    async def respond(self, response: RawInteractionResponse, /) -> None:
+        """Respond to the interaction.
+
+        If it has been deferred, the message of the response is edited in instead;
+        responses without one are then rejected.
+        """
+        if self.state is InteractionState.DEFERRING:
+            await self._acknowledged.wait()
+        self._check_open()
+
+        scheduler = self._scheduler
+        if self.state is InteractionState.PENDING:
+            self.state = InteractionState.RESPONDED
+            scheduler.cancel(self)
+            await self._send(response)
+            self._acknowledged.set()
+            scheduler.stats.acknowledged.observe(anyio.current_time() - self.received_at)
+
+        else:
+            if response.type == InteractionCallbackTypeNS.modal:
+                msg = "A deferred interaction cannot be responded to with a modal"
+                raise InteractionResponded(msg)
+            if isinstance(response.data, msgspec.UnsetType):
+                msg = "A deferred interaction can only be responded to with a message"
+                raise InteractionResponded(msg)
+
+            self.state = InteractionState.RESPONDED
+            scheduler.cancel(self)
+            route = Route(
+                Route.Method.PATCH,
+                f"/webhooks/{self.interaction.application_id}"
+                f"/{self.interaction.token}/messages/@original",
+            )
+            await scheduler.http.request(route, json=response.data)
+
+        scheduler.stats.responded += 1
+        scheduler.stats.completed.observe(anyio.current_time() - self.received_at)
+
+    def expire(self) -> None:
+        """Give up on the interaction, as once its window runs out."""
+        self.state = InteractionState.EXPIRED
+        self._scheduler.stats.expired += 1
+        self._scheduler.cancel(self)
+        self._acknowledged.set()
+
+    def _check_open(self) -> None:
+        if self.state is InteractionState.EXPIRED:
+            raise InteractionTimedOut
+        if self.state is InteractionState.RESPONDED:
+            raise InteractionResponded
+
+    async def _defer(self, *, ephemeral: bool) -> None:
+        scheduler = self._scheduler
+        self.state = InteractionState.DEFERRING
+        scheduler.cancel(self)
+        if self.interaction.type in {
+            InteractionTypeNS.message_component,
+            InteractionTypeNS.modal_submit,
+        }:
+            # the message the component belongs to shows no "thinking" state
+            response = RawInteractionResponse(
+                type=InteractionCallbackTypeNS.deferred_update_message
+            )
+        else:
+            response = RawInteractionResponse(
+                type=InteractionCallbackTypeNS.deferred_channel_message,
+                data={"flags": MessageFlags.ephemeral.value}
+                if ephemeral
+                else msgspec.UNSET,
+            )
+
+        try:
+            await self._send(response)
+
+        except Exception:
+            # whether the deferral went through is unknown; nothing can follow it
+            self.expire()
+            raise
+
+        finally:
+            self._acknowledged.set()
+
+        self.state = InteractionState.DEFERRED
+        scheduler.stats.acknowledged.observe(anyio.current_time() - self.received_at)
+        scheduler.schedule(self, self.deadline)
+
+
+@attrs.define
+class InteractionScheduler:
+    """Tracks the deadlines of interactions, deferring those about to expire.
+
+    Deadlines are kept by `run`, which has to be running for interactions to be
+    tracked.
+    """
+
+    http: HTTPClient
+    auto_defer: bool = True
+    defer_at: float = 0.6
+    """Fraction of the response window after which an interaction is deferred."""
+    defer_ephemeral: bool = False
+    """Whether the deferred responses of commands are ephemeral."""
+    resolution: float = 0.05
+    """Resolution of the deadlines, in seconds."""
+    stats: InteractionStats = attrs.field(factory=InteractionStats, init=False)
+
+    _wheel: TimerWheel["PendingInteraction"] | None = attrs.field(
+        default=None, init=False
+    )
+    _timers: dict[PendingInteraction, float] = attrs.field(
+        factory=dict[PendingInteraction, float], init=False
+    )
+    """Time the timer of each interaction on the wheel is due at."""
+    _task_group: anyio.abc.TaskGroup | None = attrs.field(default=None, init=False)
+    _wakeup: anyio.Event = attrs.field(factory=anyio.Event, init=False)
+
+    def subscribe(
+        self,
+        dispatcher: EventDispatcher,
+        listener: Listener,
+        /,
+    ) -> None:
+        """Track every interaction created, passing it to a listener in a new task.
+
+        The listener can be the `dispatch` method of an `InteractionRouter`.
+        """
+
+        async def interaction_create(interaction: RawInteraction) -> None:
+            self.handle(interaction, listener)
+
+        dispatcher.subscribe("INTERACTION_CREATE", interaction_create)
+
+    def handle(
+        self,
+        interaction: RawInteraction,
+        listener: Listener,
+        /,
+        *,
+        received_at: float | None = None,
+        send: Sender | None = None,
+    ) -> PendingInteraction:
+        """Track an interaction and pass it to a listener in a new task.
+
+        Exceptions raised by the listener are logged.
+        """
+        pending = self.track(interaction, received_at=received_at, send=send)
+        assert self._task_group is not None
+        self._task_group.start_soon(self._listen, listener, pending)
+        return pending
+
+    async def run(
+        self, *, task_status: anyio.abc.TaskStatus[None] = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        """Keep the deadlines until cancelled. Compatible with `TaskGroup.start`."""
+        try:
+            async with anyio.create_task_group() as tg:
+                self._task_group = tg
+                wheel = self._wheel = TimerWheel(anyio.current_time(), self.resolution)
+                task_status.started()
+                while True:
+                    if not wheel:
+                        await self._wakeup.wait()
+                        self._wakeup = anyio.Event()
+
+                    await anyio.sleep(self.resolution)
+                    now = anyio.current_time()
+                    for pending in wheel.advance(now):
+                        self._fire(pending, now)
+
+        finally:
+            self._task_group = self._wheel = None
+            self._timers.clear()
+
+    def track(
+        self,
+        interaction: RawInteraction,
+        /,
+        *,
+        received_at: float | None = None,
+        send: Sender | None = None,
+    ) -> PendingInteraction:
+        """Start tracking the deadline of an interaction.
+
+        The initial response is sent through `send`, by default as a request to
+        the interaction callback endpoint.
+        """
+        if received_at is None:
+            received_at = anyio.current_time()
+
+        pending = PendingInteraction(
+            interaction,
+            received_at,
+            self,
+            send or self._callback_sender(interaction),
+        )
+        window = InteractionLimits.response_timeout
+        self.schedule(
+            pending, received_at + window * (self.defer_at if self.auto_defer else 1)
+        )
+        return pending
+
+    def _callback_sender(self, interaction: RawInteraction, /) -> Sender:
+        route = Route(
+            Route.Method.POST,
+            f"/interactions/{interaction.id}/{interaction.token}/callback",
+        )
+
+        async def send(response: RawInteractionResponse) -> None:
+            await self.http.request(route, json=response)
+
+        return send
+
+    def schedule(self, pending: PendingInteraction, at: float, /) -> None:
+        """Fire the timer of an interaction at given time, replacing its previous one."""
+        if self._wheel is None:
+            msg = "The scheduler is not running"
+            raise RuntimeError(msg)
+
+        self._timers[pending] = at
+        self._wheel.schedule(pending, at)
+        self._wakeup.set()
+
+    def cancel(self, pending: PendingInteraction, /) -> None:
+        """Cancel the timer of an interaction."""
+        self._timers.pop(pending, None)
+        if self._wheel is not None:
+            self._wheel.cancel(pending)
+
+    def _fire(self, pending: PendingInteraction, now: float, /) -> None:
+        self.stats.lag.observe(max(now - self._timers.pop(pending, now), 0.0))
+        if (
+            pending.state is InteractionState.PENDING
+            and self.auto_defer
+            and now < pending.deadline
+        ):
+            assert self._task_group is not None
+            self._task_group.start_soon(self._auto_defer, pending)
+        else:
+            pending.expire()
+
+    async def _listen(self, listener: Listener, pending: PendingInteraction, /) -> None:
+        try:
+            await listener(pending)
+
+        except Exception:
+            _log.exception(
+                "Listener %r of interaction %s failed", listener, pending.interaction.id
+            )
+
+    async def _auto_defer(self, pending: PendingInteraction, /) -> None:
+        # the handler may have responded since the timer fired
+        if pending.state is not InteractionState.PENDING:
+            return
+
+        try:
+            await pending.defer(ephemeral=self.defer_ephemeral)
+
+        except Exception:
+            _log.exception("Deferring interaction %s failed", pending.interaction.id)
+            return
+
+        self.stats.deferred += 1
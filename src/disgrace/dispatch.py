@@ -0,0 +1,102 @@
+"""Routing of gateway dispatch events to listeners.
+
+Dispatch payloads arrive with their data undecoded. The data is only decoded, into the
+type registered for the event in `events.DISPATCH_TYPES`, once something listens to it;
+events nobody listens to cost a single dictionary lookup. Events can be registered
+to decode straight into models, such as `models.message.Message`.
+
+Data which does not fit its type is decoded into the one in `events.UNAVAILABLE_TYPES`
+instead, if there is one; otherwise the event is dropped. Exceptions of listeners are
+logged rather than propagated, so that one faulty listener does not take down a shard.
+"""
+
+import logging
+from collections import abc
+from typing import Any
+
+import attrs
+import msgspec
+
+from disgrace import events
+from disgrace.models.common import model_decoder
+
+__all__ = ("EventDispatcher",)
+
+type Listener = abc.Callable[[Any], abc.Awaitable[None]]
+
+_log = logging.getLogger(__name__)
+
+
+@attrs.define
+class EventDispatcher:
+    """Decodes dispatch events lazily and passes them to listeners.
+
+    Listeners of an event are awaited in order of subscription; a listener doing
+    long-running work should spawn a task instead of holding up the events after it.
+    """
+
+    types: dict[str, type] = attrs.Factory(lambda: dict(events.DISPATCH_TYPES))
+    """Types the data of each event is decoded into."""
+    _listeners: dict[str, list[Listener]] = attrs.field(
+        factory=dict[str, list[Listener]], init=False
+    )
+    _decoders: dict[str, msgspec.json.Decoder[Any]] = attrs.field(
+        factory=dict[str, msgspec.json.Decoder[Any]], init=False
+    )
+
+    def subscribe(self, event: str, listener: Listener, /) -> None:
+        self._listeners.setdefault(event, []).append(listener)
+
+    def unsubscribe(self, event: str, listener: Listener, /) -> None:
+        listeners = self._listeners.get(event, [])
+        if listener in listeners:
+            listeners.remove(listener)
+        if not listeners:
+            self._listeners.pop(event, None)
+
+    def is_subscribed(self, event: str, /) -> bool:
+        return event in self._listeners
+
+    def register_type(self, event: str, type: type, /) -> None:
+        """Decode the data of given event into a different type."""
+        self.types[event] = type
+        self._decoders.pop(event, None)
+
+    def decode(self, payload: events.Dispatch, /) -> Any:
+        """Decode the data of a dispatch event into its registered type."""
+        assert payload.t is not None
+        try:
+            decoder = self._decoders[payload.t]
+
+        except KeyError:
+            type_ = self.types.get(payload.t, object)
+            decoder = self._decoders[payload.t] = model_decoder(type_)
+
+        try:
+            return decoder.decode(payload.d)
+
+        except msgspec.ValidationError:
+            fallback = events.UNAVAILABLE_TYPES.get(payload.t)
+            if fallback is None:
+                raise
+            fallback_decoder: msgspec.json.Decoder[Any] = model_decoder(fallback)
+            return fallback_decoder.decode(payload.d)
+
+    async def dispatch(self, payload: events.Dispatch, /) -> None:
+        listeners = self._listeners.get(payload.t or "")
+        if not listeners:
+            return
+
+        try:
+            data = self.decode(payload)
+
+        except msgspec.DecodeError:
+            _log.exception("Dropping %s event with undecodable data", payload.t)
+            return
+
+        for listener in tuple(listeners):
+            try:
+                await listener(data)
+
+            except Exception:
+                _log.exception("Listener %r of %s event failed", listener, payload.t)
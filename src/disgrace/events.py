@@ -2,15 +2,19 @@ from typing import Any, ClassVar, Literal
 
 import msgspec
 
+from disgrace.structs import channel, gateway, interaction, user
 
-class BasePayload(msgspec.Struct, tag_field="op"):
+
+class BasePayload[D = object | None](msgspec.Struct, tag_field="op", omit_defaults=True):
     op: ClassVar[Any | int]
-    d: object | None
-    s: int | None
-    t: str | None
+    d: D
+    s: int | None = None
+    t: str | None = None
+
 
+class Dispatch(BasePayload[msgspec.Raw], tag=0):
+    """Payload of an event, with its data undecoded; see `DISPATCH_TYPES`."""
 
-class Dispatch(BasePayload, tag=0):
     op: ClassVar[Literal[0]]
 
 
@@ -38,20 +42,77 @@ class Reconnect(BasePayload, tag=7):
     op: ClassVar[Literal[7]]
 
 
-class RequestGuildMembers(BasePayload, tag=8):
+class RequestGuildMembers(BasePayload[gateway.RawRequestGuildMembers], tag=8):
     op: ClassVar[Literal[8]]
 
 
-class InvalidSession(BasePayload, tag=9):
+class InvalidSession(BasePayload[bool], tag=9):
     op: ClassVar[Literal[9]]
 
 
-class Hello(BasePayload, tag=10):
+class Hello(BasePayload[gateway.RawHello], tag=10):
     op: ClassVar[Literal[10]]
 
+
 class HeartbeatACK(BasePayload, tag=11):
     op: ClassVar[Literal[11]]
 
 
 class RequestSoundboardSounds(BasePayload, tag=31):
     op: ClassVar[Literal[31]]
+
+
+type AnyPayload = (
+    Dispatch
+    | Heartbeat
+    | Identify
+    | PresenceUpdate
+    | VoiceStateUpdate
+    | Resume
+    | Reconnect
+    | RequestGuildMembers
+    | InvalidSession
+    | Hello
+    | HeartbeatACK
+    | RequestSoundboardSounds
+)
+
+DISPATCH_TYPES: dict[str, type] = {
+    "READY": gateway.RawReady,
+    "RESUMED": object,
+    "GUILD_CREATE": gateway.RawGuildCreate,
+    "GUILD_UPDATE": gateway.RawGuild,
+    "GUILD_DELETE": gateway.RawUnavailableGuild,
+    "GUILD_ROLE_CREATE": gateway.RawGuildRoleUpdate,
+    "GUILD_ROLE_UPDATE": gateway.RawGuildRoleUpdate,
+    "GUILD_ROLE_DELETE": gateway.RawGuildRoleDelete,
+    "GUILD_EMOJIS_UPDATE": gateway.RawGuildEmojisUpdate,
+    "GUILD_MEMBER_ADD": gateway.RawGuildMemberAdd,
+    "GUILD_MEMBER_UPDATE": gateway.RawGuildMemberUpdate,
+    "GUILD_MEMBER_REMOVE": gateway.RawGuildMemberRemove,
+    "GUILD_MEMBERS_CHUNK": gateway.RawGuildMembersChunk,
+    "CHANNEL_CREATE": channel.RawChannel,
+    "CHANNEL_UPDATE": channel.RawChannel,
+    "CHANNEL_DELETE": channel.RawChannel,
+    "THREAD_CREATE": channel.RawChannel,
+    "THREAD_UPDATE": channel.RawChannel,
+    "THREAD_DELETE": gateway.RawThreadDelete,
+    "MESSAGE_CREATE": gateway.RawMessageCreate,
+    "MESSAGE_UPDATE": gateway.RawMessageCreate,
+    "MESSAGE_DELETE": gateway.RawMessageDelete,
+    "MESSAGE_DELETE_BULK": gateway.RawMessageDeleteBulk,
+    "USER_UPDATE": user.RawUser,
+    "INTERACTION_CREATE": interaction.RawInteraction,
+}
+"""Types the data of dispatch events is decoded into.
+
+Events not listed here decode to builtins.
+"""
+
+UNAVAILABLE_TYPES: dict[str, type] = {
+    "GUILD_CREATE": gateway.RawUnavailableGuild,
+}
+"""Types the data of dispatch events is decoded into when it does not fit its type.
+
+During outages, Discord sends the guilds it cannot load as just their ID.
+"""
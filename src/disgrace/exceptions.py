@@ -4,6 +4,7 @@
 - `ClientException` +
   - `InvalidData`
   - `LoginFailure`
+  - `ResourceTooLarge`
   - `SessionStartLimitReached` +
   - `ConnectionClosed`
   - `PrivilegedIntentsRequired`
@@ -16,12 +17,15 @@
   - `Forbidden` +
   - `NotFound` +
   - `DiscordServerError`
+  - `RateLimited`
 - `WebhookTokenMissing` ?
 - `LocalizationKeyError` ?
 """
 # + - likely a good idea
 # ? - may not be needed
 
+import httpx
+
 
 class DiscordException(Exception): ...
 
@@ -29,10 +33,44 @@ class DiscordException(Exception): ...
 class ClientException(DiscordException): ...
 
 
+class LoginFailure(ClientException): ...
+
+
+class ResourceTooLarge(ClientException):
+    def __init__(self, filename: str, size: int, limit: int, /) -> None:
+        self.filename = filename
+        self.size = size
+        self.limit = limit
+        super().__init__(f"{filename!r} exceeds the size limit of {limit} bytes")
+
+
+class SessionStartLimitReached(ClientException):
+    def __init__(self, remaining: int, reset_after: float, /) -> None:
+        self.remaining = remaining
+        self.reset_after = reset_after
+        super().__init__(
+            f"Only {remaining} session starts remaining, resets in {reset_after:.0f}s"
+        )
+
+
+class ConnectionClosed(ClientException):
+    def __init__(self, code: int, reason: str = "", /) -> None:
+        self.code = code
+        self.reason = reason
+        super().__init__(f"Gateway connection closed with code {code}: {reason}")
+
+
+class PrivilegedIntentsRequired(ClientException): ...
+
+
 class GatewayNotFound(DiscordException): ...
 
 
-class HttpException(DiscordException): ...
+class HttpException(DiscordException):
+    def __init__(self, response: httpx.Response, /) -> None:
+        self.response = response
+        self.status = response.status_code
+        super().__init__(f"{response.status_code} {response.reason_phrase}")
 
 
 class Forbidden(HttpException): ...
@@ -42,3 +80,23 @@ class NotFound(HttpException): ...
 
 
 class DiscordServerError(HttpException): ...
+
+
+class RateLimited(HttpException):
+    """A request was rate limited on every attempt."""
+
+    def __init__(self, response: httpx.Response, attempts: int, /) -> None:
+        super().__init__(response)
+        self.attempts = attempts
+        self.args = (f"Rate limited after {attempts} attempts",)
+
+
+class InteractionException(ClientException): ...
+
+
+class InteractionTimedOut(InteractionException):
+    """The time to respond to the interaction has run out."""
+
+
+class InteractionResponded(InteractionException):
+    """The interaction has already been responded to."""
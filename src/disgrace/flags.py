@@ -82,3 +82,71 @@ class ChannelFlags(enum.Flag):
     pinned = 1 << 1
     require_tag = 1 << 4
     hide_media_download_options = 1 << 15
+
+
+# https://discord.com/developers/docs/events/gateway#gateway-intents
+class Intents(enum.Flag):
+    none = 0
+    guilds = 1 << 0
+    guild_members = 1 << 1
+    """Privileged intent."""
+    guild_moderation = 1 << 2
+    guild_expressions = 1 << 3
+    guild_integrations = 1 << 4
+    guild_webhooks = 1 << 5
+    guild_invites = 1 << 6
+    guild_voice_states = 1 << 7
+    guild_presences = 1 << 8
+    """Privileged intent."""
+    guild_messages = 1 << 9
+    guild_message_reactions = 1 << 10
+    guild_message_typing = 1 << 11
+    direct_messages = 1 << 12
+    direct_message_reactions = 1 << 13
+    direct_message_typing = 1 << 14
+    message_content = 1 << 15
+    """Privileged intent."""
+    guild_scheduled_events = 1 << 16
+    auto_moderation_configuration = 1 << 20
+    auto_moderation_execution = 1 << 21
+    guild_message_polls = 1 << 24
+    direct_message_polls = 1 << 25
+
+    privileged = guild_members | guild_presences | message_content
+    """All privileged intents."""
+    default = (
+        guilds
+        | guild_moderation
+        | guild_expressions
+        | guild_integrations
+        | guild_webhooks
+        | guild_invites
+        | guild_voice_states
+        | guild_messages
+        | guild_message_reactions
+        | guild_message_typing
+        | direct_messages
+        | direct_message_reactions
+        | direct_message_typing
+        | guild_scheduled_events
+        | auto_moderation_configuration
+        | auto_moderation_execution
+        | guild_message_polls
+        | direct_message_polls
+    )
+    """All non-privileged intents."""
+
+
+class CacheFlags(enum.Flag):
+    """Entities kept in the `State` cache."""
+
+    none = 0
+    guilds = 1 << 0
+    channels = 1 << 1
+    roles = 1 << 2
+    emojis = 1 << 3
+    members = 1 << 4
+    users = 1 << 5
+    messages = 1 << 6
+
+    all = guilds | channels | roles | emojis | members | users | messages
@@ -0,0 +1,575 @@
+"""Connection to Discord's gateway.
+
+Frames are compressed at the transport level (``zlib-stream`` or ``zstd-stream``);
+each connection keeps a single decompression context alive for its whole lifetime,
+as required by Discord, and feeds the inflated payloads to a shared decoder.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.sharedctypes
+import multiprocessing.synchronize
+import platform
+import random
+import ssl
+import time
+import zlib
+from collections import abc, deque
+from typing import Any, Final, Literal, Protocol, Self
+
+import anyio
+import anyio.abc
+import attrs
+import httpx
+import msgspec
+import wsproto
+import wsproto.events
+from wsproto.connection import ConnectionState
+
+from disgrace import codecs, events
+from disgrace.exceptions import ConnectionClosed, LoginFailure, PrivilegedIntentsRequired
+from disgrace.flags import Intents
+from disgrace.ratelimit import GlobalLimiter
+from disgrace.sessions import SessionState
+from disgrace.structs import misc
+from disgrace.urls import API_VERSION
+
+__all__ = (
+    "Compression",
+    "GatewayConnection",
+    "IdentifyLimiter",
+    "LocalIdentifyLimiter",
+    "SharedIdentifyLimiter",
+    "best_compression",
+)
+
+type Compression = Literal["zlib-stream", "zstd-stream"]
+type DispatchHandler = abc.Callable[[events.Dispatch], abc.Awaitable[None]]
+
+DEFAULT_GATEWAY: Final = "wss://gateway.discord.gg"
+ZLIB_SUFFIX: Final = b"\x00\x00\xff\xff"
+IDENTIFY_INTERVAL: Final = 5.0
+"""Seconds between identifies within a single max_concurrency bucket."""
+SEND_LIMIT: Final = 120
+"""Number of payloads a connection may send per `SEND_PERIOD`."""
+SEND_PERIOD: Final = 60.0
+_SEND_RESERVE: Final = 5
+"""Sends per period left over for heartbeats, identifies and resumes."""
+
+_decoder = codecs.decoder(events.AnyPayload)
+_log = logging.getLogger(__name__)
+
+
+class _ReadySession(misc.BaseStruct):
+    """The subset of READY the connection itself needs."""
+
+    session_id: str
+    resume_gateway_url: str
+
+
+_ready_decoder = codecs.decoder(_ReadySession)
+
+_FATAL_CLOSE_CODES: Final = frozenset({4004, 4010, 4011, 4012, 4013, 4014})
+_NEW_SESSION_CLOSE_CODES: Final = frozenset({1000, 4007, 4009})
+
+
+# ------------------------------------- compression --------------------------------------
+class _Inflator(Protocol):
+    def feed(self, data: bytes, /) -> bytes | None:
+        """Feed a frame, returning the payload if it is complete."""
+        ...
+
+
+@attrs.define
+class _ZlibInflator:
+    _decompress: abc.Callable[[abc.Buffer], bytes] = attrs.field(
+        factory=lambda: zlib.decompressobj().decompress, init=False
+    )
+    _buffer: bytearray = attrs.field(factory=bytearray, init=False)
+
+    def feed(self, data: bytes, /) -> bytes | None:
+        self._buffer += data
+        if not self._buffer.endswith(ZLIB_SUFFIX):
+            return None
+
+        payload = self._decompress(self._buffer)
+        self._buffer.clear()
+        return payload
+
+
+def _zstd_decompressor() -> abc.Callable[[bytes], bytes] | None:
+    try:
+        from compression import zstd  # pyright: ignore[reportMissingImports, reportUnknownVariableType]  # noqa: PLC0415
+
+        return zstd.ZstdDecompressor().decompress  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    except ImportError:
+        pass
+
+    try:
+        import zstandard  # noqa: PLC0415
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress
+
+    except ImportError:
+        return None
+
+
+@attrs.define
+class _ZstdInflator:
+    _decompress: abc.Callable[[bytes], bytes] = attrs.field(init=False)
+
+    def __attrs_post_init__(self) -> None:
+        decompress = _zstd_decompressor()
+        if decompress is None:
+            msg = "zstd-stream compression requires the zstd extra"
+            raise RuntimeError(msg)
+        self._decompress = decompress
+
+    def feed(self, data: bytes, /) -> bytes | None:
+        # every message is flushed by the server, there is nothing to buffer
+        return self._decompress(data)
+
+
+def best_compression() -> Compression:
+    """Return the most efficient transport compression available."""
+    return "zlib-stream" if _zstd_decompressor() is None else "zstd-stream"
+
+
+# ------------------------------------ identify limit ------------------------------------
+class IdentifyLimiter(Protocol):
+    """Paces IDENTIFYs according to the session start ``max_concurrency``.
+
+    Shard ``i`` belongs to bucket ``i % max_concurrency``; each bucket may identify
+    once every `IDENTIFY_INTERVAL` seconds.
+    """
+
+    __slots__ = ()
+
+    async def wait(self, shard_id: int, /) -> None: ...
+
+
+@attrs.define
+class LocalIdentifyLimiter:
+    """Identify limiter for shards running within a single event loop."""
+
+    max_concurrency: int = 1
+    _next_slot: dict[int, float] = attrs.field(factory=dict[int, float], init=False)
+
+    async def wait(self, shard_id: int, /) -> None:
+        bucket = shard_id % self.max_concurrency
+        now = anyio.current_time()
+        # reserve the slot before sleeping, so that concurrent shards queue up
+        slot = max(now, self._next_slot.get(bucket, now))
+        self._next_slot[bucket] = slot + IDENTIFY_INTERVAL
+        await anyio.sleep(slot - now)
+
+
+_spawn_context: Final = multiprocessing.get_context("spawn")
+
+
+@attrs.define
+class SharedIdentifyLimiter:
+    """Identify limiter shared by shards running in several processes.
+
+    Must be created in the parent process and passed to workers started
+    in the ``spawn`` context.
+    """
+
+    max_concurrency: int
+    _lock: multiprocessing.synchronize.Lock = attrs.field(
+        factory=_spawn_context.Lock, init=False
+    )
+    _next_slot: "multiprocessing.sharedctypes.SynchronizedArray[float]" = attrs.field(
+        init=False
+    )
+
+    def __attrs_post_init__(self) -> None:
+        self._next_slot = _spawn_context.Array("d", self.max_concurrency, lock=False)
+
+    def _reserve(self, bucket: int) -> float:
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot[bucket])
+            self._next_slot[bucket] = slot + IDENTIFY_INTERVAL
+            return slot - now
+
+    async def wait(self, shard_id: int, /) -> None:
+        bucket = shard_id % self.max_concurrency
+        await anyio.sleep(await anyio.to_thread.run_sync(self._reserve, bucket))
+
+
+# -------------------------------------- websocket ---------------------------------------
+@attrs.define
+class _WebSocket:
+    """Minimal websocket client on top of an anyio stream."""
+
+    stream: anyio.abc.ByteStream
+    connection: wsproto.WSConnection
+    _events: deque[wsproto.events.Event] = attrs.field(
+        factory=deque[wsproto.events.Event], init=False
+    )
+    _send_lock: anyio.Lock = attrs.field(factory=anyio.Lock, init=False)
+
+    @classmethod
+    async def connect(cls, url: httpx.URL) -> Self:
+        tls = url.scheme == "wss"
+        stream = await anyio.connect_tcp(
+            url.host,
+            url.port or (443 if tls else 80),
+            tls=tls,
+            ssl_context=ssl.create_default_context() if tls else None,
+            tls_standard_compatible=False,
+        )
+        self = cls(stream, wsproto.WSConnection(wsproto.ConnectionType.CLIENT))
+        target = url.raw_path.decode()
+        await self._send(wsproto.events.Request(host=url.host, target=target))
+
+        event = await self._next_event()
+        if not isinstance(event, wsproto.events.AcceptConnection):
+            await stream.aclose()
+            msg = f"Gateway refused the websocket handshake: {event}"
+            raise ConnectionError(msg)
+
+        return self
+
+    async def send(self, data: str | bytes, /) -> None:
+        if isinstance(data, bytes):
+            await self._send(wsproto.events.BytesMessage(data))
+        else:
+            await self._send(wsproto.events.TextMessage(data))
+
+    async def receive(self) -> bytes:
+        """Receive a whole message. Text messages are returned encoded."""
+        parts: list[bytes] = []
+        while True:
+            event = await self._next_event()
+            match event:
+                case wsproto.events.BytesMessage():
+                    parts.append(bytes(event.data))
+
+                case wsproto.events.TextMessage():
+                    parts.append(event.data.encode())
+
+                case wsproto.events.Ping():
+                    await self._send(event.response())
+                    continue
+
+                case wsproto.events.CloseConnection():
+                    if self.connection.state is ConnectionState.REMOTE_CLOSING:
+                        await self._send(event.response())
+                    await self.stream.aclose()
+                    raise ConnectionClosed(event.code, event.reason or "")
+
+                case _:
+                    continue
+
+            if event.message_finished:
+                return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    async def close(self, code: int = 1000) -> None:
+        if self.connection.state is ConnectionState.OPEN:
+            with anyio.move_on_after(5, shield=True):
+                await self._send(wsproto.events.CloseConnection(code))
+        await self.stream.aclose()
+
+    async def _send(self, event: wsproto.events.Event) -> None:
+        async with self._send_lock:
+            await self.stream.send(self.connection.send(event))
+
+    async def _next_event(self) -> wsproto.events.Event:
+        while not self._events:
+            try:
+                data = await self.stream.receive()
+            except (anyio.EndOfStream, anyio.BrokenResourceError):
+                self.connection.receive_data(None)
+            else:
+                self.connection.receive_data(data)
+            self._events.extend(self.connection.events())
+
+        return self._events.popleft()
+
+
+# --------------------------------------- gateway ----------------------------------------
+def _new_send_limiter() -> GlobalLimiter:
+    return GlobalLimiter(SEND_LIMIT - _SEND_RESERVE, SEND_PERIOD)
+
+
+_UNLIMITED_PAYLOADS: Final = (events.Heartbeat, events.Identify, events.Resume)
+
+
+class _Reconnect(Exception):
+    def __init__(self, *, resume: bool) -> None:
+        self.resume = resume
+
+
+@attrs.define
+class GatewayConnection:
+    """A single shard's connection to the gateway.
+
+    Reconnects and resumes on its own; dispatch events are passed to `on_dispatch`.
+    """
+
+    token: str = attrs.field(repr=False)
+    intents: Intents = Intents.default
+    shard_id: int = 0
+    shard_count: int = 1
+    compression: Compression | None = attrs.Factory(best_compression)
+    """Transport compression to negotiate, if any."""
+    url: str = DEFAULT_GATEWAY
+    """URL of the gateway to connect to when starting a new session."""
+    on_dispatch: DispatchHandler | None = None
+    identify_limiter: IdentifyLimiter = attrs.Factory(LocalIdentifyLimiter)
+
+    session_id: str | None = attrs.field(default=None, init=False)
+    resume_gateway_url: str | None = attrs.field(default=None, init=False)
+    sequence: int | None = attrs.field(default=None, init=False)
+    latency: float = attrs.field(default=float("inf"), init=False)
+    """Time between the last heartbeat and its acknowledgement."""
+
+    _socket: _WebSocket | None = attrs.field(default=None, init=False)
+    _send_limiter: GlobalLimiter = attrs.field(factory=_new_send_limiter, init=False)
+    _ready: anyio.Event = attrs.field(factory=anyio.Event, init=False)
+    """Set once the session is identified or resumed, replaced on disconnect."""
+    _last_heartbeat: float = attrs.field(default=0.0, init=False)
+    _acked: bool = attrs.field(default=True, init=False)
+
+    @property
+    def can_resume(self) -> bool:
+        return self.session_id is not None and self.sequence is not None
+
+    @property
+    def session(self) -> SessionState | None:
+        """State needed to resume the current session, if there is one."""
+        if self.session_id is None or self.sequence is None:
+            return None
+        return SessionState(
+            session_id=self.session_id,
+            resume_gateway_url=self.resume_gateway_url or self.url,
+            sequence=self.sequence,
+            shard_count=self.shard_count,
+        )
+
+    def restore(self, session: SessionState, /) -> bool:
+        """Resume given session on the next connect.
+
+        Sessions started with a different shard count are ignored.
+        Returns whether the session was restored.
+        """
+        if session.shard_count != self.shard_count:
+            return False
+        self.session_id = session.session_id
+        self.resume_gateway_url = session.resume_gateway_url
+        self.sequence = session.sequence
+        return True
+
+    def gateway_url(self, *, resume: bool = False) -> httpx.URL:
+        base = self.resume_gateway_url if resume and self.resume_gateway_url else self.url
+        params = {"v": API_VERSION, "encoding": "json"}
+        if self.compression is not None:
+            params["compress"] = self.compression
+        return httpx.URL(base).copy_merge_params(params)
+
+    async def run(self) -> None:
+        """Stay connected until cancelled or a fatal close code is received."""
+        if self._ready.is_set():
+            # left set by the previous run
+            self._ready = anyio.Event()
+        try:
+            await self._run()
+
+        finally:
+            # wake those waiting to send, so they find the connection stopped
+            self._ready.set()
+
+    async def _run(self) -> None:
+        resume = self.can_resume
+        while True:
+            try:
+                await self._connect_once(resume=resume)
+
+            except _Reconnect as reconnect:
+                resume = reconnect.resume and self.can_resume
+
+            except ConnectionClosed as exc:
+                if exc.code == 4004:  # noqa: PLR2004
+                    raise LoginFailure from exc
+                if exc.code == 4014:  # noqa: PLR2004
+                    raise PrivilegedIntentsRequired from exc
+                if exc.code in _FATAL_CLOSE_CODES:
+                    raise
+                resume = exc.code not in _NEW_SESSION_CLOSE_CODES and self.can_resume
+
+            except (OSError, anyio.BrokenResourceError, anyio.EndOfStream):
+                resume = self.can_resume
+                await anyio.sleep(1 + random.random() * 4)
+
+            if not resume:
+                self.session_id = self.sequence = None
+
+    async def send(self, payload: events.BasePayload[Any], /) -> None:
+        """Send a payload, waiting if the connection would exceed its send limit.
+
+        Heartbeats, identifies and resumes are never held back; the limit of the rest
+        leaves some room for them. The rest also wait until the session is identified
+        or resumed, as Discord closes connections sending them any earlier.
+        """
+        if not isinstance(payload, _UNLIMITED_PAYLOADS):
+            while True:
+                ready = self._ready
+                await ready.wait()
+                await self._send_limiter.acquire()
+                if ready is self._ready:
+                    break
+                # disconnected while waiting for the limit; wait for the next session
+
+        if self._socket is None:
+            msg = "Not connected to the gateway"
+            raise RuntimeError(msg)
+        # JSON payloads must be sent as text frames
+        await self._socket.send(codecs.encode_text(payload))
+
+    async def close(self, code: int = 1000) -> None:
+        if self._socket is not None:
+            await self._socket.close(code)
+
+    async def _connect_once(self, *, resume: bool) -> None:
+        inflator: _Inflator | None
+        match self.compression:
+            case "zlib-stream":
+                inflator = _ZlibInflator()
+            case "zstd-stream":
+                inflator = _ZstdInflator()
+            case None:
+                inflator = None
+
+        if not resume:
+            # wait before connecting, so that the socket does not idle in the queue
+            await self.identify_limiter.wait(self.shard_id)
+
+        self._socket = socket = await _WebSocket.connect(self.gateway_url(resume=resume))
+        # the limit applies per connection
+        self._send_limiter = _new_send_limiter()
+        try:
+            await self._session(socket, inflator, resume=resume)
+
+        except BaseExceptionGroup as group:
+            # surface the reason for disconnecting to `run`
+            if len(group.exceptions) == 1:
+                raise group.exceptions[0] from None
+            raise
+
+        finally:
+            self._socket = None
+            if self._ready.is_set():
+                # those waiting on an unset event keep waiting for the next session
+                self._ready = anyio.Event()
+            with anyio.CancelScope(shield=True):
+                await socket.close(4000)
+
+    async def _session(
+        self, socket: _WebSocket, inflator: _Inflator | None, *, resume: bool
+    ) -> None:
+        async with anyio.create_task_group() as tg:
+            hello = await self._receive(socket, inflator)
+            if not isinstance(hello, events.Hello):
+                msg = f"Expected Hello, got {hello}"
+                raise ConnectionError(msg)
+
+            self._acked = True
+            interval = hello.d.heartbeat_interval / 1000
+            tg.start_soon(self._heartbeat_loop, interval)
+
+            if resume:
+                await self.send(self._resume_payload())
+            else:
+                await self.send(self._identify_payload())
+
+            while True:
+                payload = await self._receive(socket, inflator)
+                await self._handle(payload)
+
+    async def _receive(
+        self, socket: _WebSocket, inflator: _Inflator | None
+    ) -> events.AnyPayload:
+        while True:
+            data = await socket.receive()
+            if inflator is not None:
+                inflated = inflator.feed(data)
+                if inflated is None:
+                    continue
+                data = inflated
+
+            try:
+                return _decoder.decode(data)
+
+            except msgspec.ValidationError:
+                # an opcode or payload shape this library does not know yet
+                _log.warning("Ignoring unexpected gateway payload: %r", data[:200])
+
+            except msgspec.DecodeError:
+                # not even JSON; the stream cannot be trusted anymore
+                raise _Reconnect(resume=True) from None
+
+    async def _handle(self, payload: events.AnyPayload) -> None:
+        match payload:
+            case events.Dispatch():
+                self.sequence = payload.s
+                if payload.t == "READY":
+                    ready = _ready_decoder.decode(payload.d)
+                    self.session_id = ready.session_id
+                    self.resume_gateway_url = ready.resume_gateway_url
+
+                if payload.t in {"READY", "RESUMED"}:
+                    self._ready.set()
+
+                if self.on_dispatch is not None:
+                    await self.on_dispatch(payload)
+
+            case events.Heartbeat():
+                await self.send(events.Heartbeat(d=self.sequence))
+
+            case events.HeartbeatACK():
+                self._acked = True
+                self.latency = anyio.current_time() - self._last_heartbeat
+
+            case events.Reconnect():
+                raise _Reconnect(resume=True)
+
+            case events.InvalidSession():
+                await anyio.sleep(1 + random.random() * 4)
+                raise _Reconnect(resume=payload.d)
+
+            case _:
+                pass
+
+    async def _heartbeat_loop(self, interval: float) -> None:
+        await anyio.sleep(interval * random.random())
+        while True:
+            if not self._acked:
+                # zombied connection
+                raise _Reconnect(resume=True)
+
+            self._acked = False
+            self._last_heartbeat = anyio.current_time()
+            await self.send(events.Heartbeat(d=self.sequence))
+            await anyio.sleep(interval)
+
+    def _identify_payload(self) -> events.Identify:
+        return events.Identify(
+            d={
+                "token": self.token,
+                "intents": self.intents.value,
+                "shard": [self.shard_id, self.shard_count],
+                "properties": {
+                    "os": platform.system().lower(),
+                    "browser": "disgrace",
+                    "device": "disgrace",
+                },
+            }
+        )
+
+    def _resume_payload(self) -> events.Resume:
+        return events.Resume(
+            d={"token": self.token, "session_id": self.session_id, "seq": self.sequence}
+        )
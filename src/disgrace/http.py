@@ -1,23 +1,172 @@
-import enum
 from collections import abc
-from typing import Any, ClassVar
+from contextvars import ContextVar
+from http import HTTPStatus
+from typing import Any, Final, cast
 
+import anyio
 import attrs
+import httpx
+import msgspec
+
+from disgrace import codecs
+from disgrace.exceptions import (
+    DiscordServerError,
+    Forbidden,
+    HttpException,
+    NotFound,
+    RateLimited,
+)
+from disgrace.multipart import MultipartStream
+from disgrace.ratelimit import RateLimitBackend, RateLimiter
+from disgrace.resource import AnyResource
+from disgrace.route import Route
+
+__all__ = (
+    "DEFAULT_POOL_LIMITS",
+    "HTTPClient",
+    "Route",
+    "create_session",
+    "read",
+    "request",
+)
+
+_MAX_ATTEMPTS: Final = 5
+
+DEFAULT_POOL_LIMITS: Final = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60
+)
+"""Connection pool limits used unless specified otherwise."""
+
+
+def create_session(
+    *, http2: bool = False, limits: httpx.Limits = DEFAULT_POOL_LIMITS
+) -> httpx.AsyncClient:
+    """Create the connection pool shared by REST requests and CDN downloads.
+
+    HTTP/2 requires the ``http2`` extra; it multiplexes concurrent requests
+    over a single connection per host.
+    """
+    return httpx.AsyncClient(
+        base_url=Route.BASE, http2=http2, limits=limits, follow_redirects=True
+    )
 
 
 @attrs.define
-class Route:
-    BASE: ClassVar[str] = "https://discord.com/api/v10"
+class HTTPClient:
+    """Sends requests to the REST API, respecting rate limits.
+
+    The underlying session is kept alive for the lifetime of the client
+    and reused for downloading assets.
+    """
+
+    token: str = attrs.field(repr=False)
+    limiter: RateLimitBackend = attrs.Factory(RateLimiter)
+    session: httpx.AsyncClient = attrs.Factory(create_session)
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def read(self, url: str | httpx.URL, /) -> bytes:
+        """Download the contents of a CDN or other external URL."""
+        response = await self.session.get(url)
+        if not response.is_success:
+            raise HttpException(response)
+        return response.content
+
+    async def request(
+        self,
+        route: Route,
+        *,
+        json: object = None,
+        files: abc.Sequence[AnyResource] = (),
+        reason: str | None = None,
+    ) -> Any:
+        headers = {"Authorization": f"Bot {self.token}"}
+        if reason is not None:
+            headers["X-Audit-Log-Reason"] = reason
+
+        for attempt in range(_MAX_ATTEMPTS):
+            async with self.limiter.acquire(route) as ticket:
+                response = await self.session.send(
+                    self._build_request(route, headers, json, files)
+                )
+                if response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR:
+                    # errors of proxies in front of the API come without the headers
+                    ticket.update(response.headers)
+
+                if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+                    data = msgspec.json.decode(response.content)
+                    retry_after = float(data["retry_after"])
+                    if data.get("global", False):
+                        ticket.block_global(retry_after)
+                    else:
+                        ticket.block(retry_after)
+                    if attempt + 1 < _MAX_ATTEMPTS:
+                        continue
+                    raise RateLimited(response, _MAX_ATTEMPTS)
+
+            if response.is_success:
+                return msgspec.json.decode(response.content) if response.content else None
+
+            if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                if attempt + 1 < _MAX_ATTEMPTS:
+                    await anyio.sleep(1 + attempt * 2)
+                    continue
+                raise DiscordServerError(response)
+
+            if response.status_code == HTTPStatus.FORBIDDEN:
+                raise Forbidden(response)
+
+            if response.status_code == HTTPStatus.NOT_FOUND:
+                raise NotFound(response)
+
+            raise HttpException(response)
+
+        # every attempt either returns, raises or retries up to the last one
+        raise AssertionError
+
+    def _build_request(
+        self,
+        route: Route,
+        headers: dict[str, str],
+        json: object,
+        files: abc.Sequence[AnyResource],
+    ) -> httpx.Request:
+        if files:
+            body = MultipartStream(codecs.encode(json), files, self.session)
+            return self.session.build_request(
+                route.method,
+                route.path,
+                headers=headers | body.headers,
+                # memoryviews of memory resources are sent as is, like bytes
+                content=cast("abc.AsyncIterable[bytes]", body),
+            )
+
+        if json is not None:
+            headers = headers | {"Content-Type": "application/json"}
+        return self.session.build_request(
+            route.method,
+            route.path,
+            headers=headers,
+            content=None if json is None else codecs.encode(json),
+        )
+
+
+current_client = ContextVar[HTTPClient]("current_client")
 
-    class Method(enum.StrEnum):
-        GET = "GET"
-        PUT = "PUT"
-        POST = "POST"
-        PATCH = "PATCH"
-        DELETE = "DELETE"
 
-    method: Method
-    path: str
+async def request(
+    route: Route,
+    *,
+    json: object = None,
+    files: abc.Sequence[AnyResource] = (),
+    reason: str | None = None,
+) -> Any:
+    return await current_client.get().request(
+        route, json=json, files=files, reason=reason
+    )
 
 
-async def request(route: Route, *, files: abc.Sequence[object] = ()) -> Any: ...
+async def read(url: str | httpx.URL, /) -> bytes:
+    """Download a URL, such as a `WebResource`'s, through the current client's pool."""
+    return await current_client.get().read(url)
@@ -0,0 +1,292 @@
+"""Receiving interactions over HTTP rather than the gateway.
+
+`InteractionServer` is an ASGI application to be set as the interactions endpoint URL
+of an application. Every request is signed by Discord with Ed25519; signatures are
+checked by `SignatureVerifier`, which needs the ``ed25519`` extra (or ``cryptography``).
+Checks of concurrent requests are gathered into batches, each verified by one call into
+a worker thread, so that the event loop stays free without a thread hop per request.
+
+Interactions are passed to a listener through an `InteractionScheduler`, which has to
+be running; the server starts it on ASGI lifespan startup. The initial response of an
+interaction, including a deferral by the scheduler, is sent as the HTTP response.
+"""
+
+import logging
+from collections import abc
+from typing import Any, Final
+
+import anyio
+import anyio.to_thread
+import attrs
+import msgspec
+
+from disgrace import codecs
+from disgrace.deadlines import InteractionScheduler, Listener
+from disgrace.structs.interaction import (
+    InteractionTypeNS,
+    RawInteraction,
+    RawInteractionResponse,
+)
+
+__all__ = ("InteractionServer", "SignatureVerifier")
+
+type Scope = abc.MutableMapping[str, Any]
+type Message = abc.MutableMapping[str, Any]
+type Receive = abc.Callable[[], abc.Awaitable[Message]]
+type Send = abc.Callable[[Message], abc.Awaitable[None]]
+type Verify = abc.Callable[[bytes, bytes], bool]
+"""Checks the signature of a message."""
+
+MAX_BODY_SIZE: Final = 1 << 20
+_PONG: Final = codecs.encode(RawInteractionResponse(type=1))
+_JSON_HEADERS: Final = ((b"content-type", b"application/json"),)
+
+_decoder = codecs.decoder(RawInteraction)
+_log = logging.getLogger(__name__)
+
+
+# --------------------------------------- signatures -------------------------------------
+def _ed25519_verifier(public_key: bytes, /) -> Verify | None:
+    try:
+        from nacl.exceptions import BadSignatureError  # pyright: ignore[reportMissingImports, reportUnknownVariableType]  # noqa: PLC0415
+        from nacl.signing import VerifyKey  # pyright: ignore[reportMissingImports, reportUnknownVariableType]  # noqa: PLC0415
+
+    except ImportError:
+        pass
+
+    else:
+        verify_key = VerifyKey(public_key)  # pyright: ignore[reportUnknownVariableType]
+
+        def verify_nacl(message: bytes, signature: bytes) -> bool:
+            try:
+                verify_key.verify(message, signature)  # pyright: ignore[reportUnknownMemberType]
+
+            except BadSignatureError:
+                return False
+            return True
+
+        return verify_nacl
+
+    try:
+        from cryptography.exceptions import InvalidSignature  # pyright: ignore[reportMissingImports, reportUnknownVariableType]  # noqa: PLC0415
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey  # pyright: ignore[reportMissingImports, reportUnknownVariableType]  # noqa: PLC0415
+
+    except ImportError:
+        return None
+
+    key = Ed25519PublicKey.from_public_bytes(public_key)  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    def verify_cryptography(message: bytes, signature: bytes) -> bool:
+        try:
+            key.verify(signature, message)  # pyright: ignore[reportUnknownMemberType]
+
+        except InvalidSignature:
+            return False
+        return True
+
+    return verify_cryptography
+
+
+@attrs.define(eq=False)
+class _Check:
+    message: bytes
+    signature: bytes
+    valid: bool = False
+    done: anyio.Event = attrs.Factory(anyio.Event)
+
+
+@attrs.define
+class SignatureVerifier:
+    """Checks request signatures in batches, in a worker thread.
+
+    The first request to find no batch underway verifies the checks queued in the
+    meantime, batch after batch, until none are left.
+    """
+
+    public_key: str
+    """Public key of the application, hex encoded."""
+    max_batch: int = 256
+    check: Verify | None = attrs.field(default=None, kw_only=True)
+    """Checks a signature; Ed25519 with the public key if not given."""
+    _verify: Verify = attrs.field(init=False)
+    _queue: list[_Check] = attrs.field(factory=list[_Check], init=False)
+    _verifying: bool = attrs.field(default=False, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        verify = self.check or _ed25519_verifier(bytes.fromhex(self.public_key))
+        if verify is None:
+            msg = "Verifying interactions requires the ed25519 extra"
+            raise RuntimeError(msg)
+        self._verify = verify
+
+    async def verify(self, timestamp: bytes, body: bytes, signature: bytes, /) -> bool:
+        """Return whether the hex encoded signature of a request is valid."""
+        try:
+            check = _Check(timestamp + body, bytes.fromhex(signature.decode()))
+
+        except (ValueError, UnicodeDecodeError):
+            return False
+
+        self._queue.append(check)
+        if not self._verifying:
+            self._verifying = True
+            try:
+                # the batch is verified for every request in it, even if this one's
+                # request is cancelled in the meantime
+                with anyio.CancelScope(shield=True):
+                    while self._queue:
+                        batch = self._queue[: self.max_batch]
+                        del self._queue[: self.max_batch]
+                        try:
+                            await anyio.to_thread.run_sync(self._verify_batch, batch)
+
+                        except Exception:
+                            # the checks left unverified stay invalid
+                            _log.exception("Verifying a batch of signatures failed")
+
+                        finally:
+                            for checked in batch:
+                                checked.done.set()
+
+            finally:
+                self._verifying = False
+
+        await check.done.wait()
+        return check.valid
+
+    def _verify_batch(self, batch: list[_Check], /) -> None:
+        verify = self._verify
+        for check in batch:
+            check.valid = verify(check.message, check.signature)
+
+
+# ----------------------------------------- server ---------------------------------------
+@attrs.define
+class InteractionServer:
+    """ASGI application receiving interactions.
+
+    Each interaction is passed to the listener, such as the `dispatch` method of
+    an `InteractionRouter`, in a task of the scheduler.
+    """
+
+    verifier: SignatureVerifier
+    listener: Listener
+    scheduler: InteractionScheduler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] != "POST":
+            await _reply(send, 405)
+            return
+
+        received_at = anyio.current_time()
+        headers = dict[bytes, bytes](scope["headers"])
+        body = await _read_body(receive)
+        if body is None:
+            await _reply(send, 413)
+            return
+
+        signature = headers.get(b"x-signature-ed25519")
+        timestamp = headers.get(b"x-signature-timestamp")
+        if (
+            signature is None
+            or timestamp is None
+            or not await self.verifier.verify(timestamp, body, signature)
+        ):
+            await _reply(send, 401)
+            return
+
+        try:
+            interaction = _decoder.decode(body)
+
+        except msgspec.DecodeError:
+            await _reply(send, 400)
+            return
+
+        if interaction.type == InteractionTypeNS.ping:
+            await _reply(send, 200, _PONG)
+            return
+
+        await self._respond(interaction, received_at, send)
+
+    async def _respond(
+        self, interaction: RawInteraction, received_at: float, send: Send, /
+    ) -> None:
+        response: list[bytes] = []
+        ready = anyio.Event()
+        sent = anyio.Event()
+
+        async def send_initial(initial: RawInteractionResponse) -> None:
+            response.append(codecs.encode(initial))
+            ready.set()
+            # follow-ups may only be sent once Discord has the initial response
+            await sent.wait()
+
+        pending = self.scheduler.handle(
+            interaction, self.listener, received_at=received_at, send=send_initial
+        )
+        with anyio.move_on_after(pending.deadline - anyio.current_time()):
+            await ready.wait()
+
+        try:
+            if response:
+                await _reply(send, 200, response[0])
+            else:
+                await _reply(send, 500)
+
+        finally:
+            sent.set()
+
+    async def _lifespan(self, receive: Receive, send: Send, /) -> None:
+        async with anyio.create_task_group() as tg:
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    try:
+                        await tg.start(self.scheduler.run)
+
+                    except Exception as exc:
+                        await send(
+                            {"type": "lifespan.startup.failed", "message": str(exc)}
+                        )
+                        return
+
+                    await send({"type": "lifespan.startup.complete"})
+
+                elif message["type"] == "lifespan.shutdown":
+                    tg.cancel_scope.cancel()
+                    break
+
+        await send({"type": "lifespan.shutdown.complete"})
+
+
+async def _read_body(receive: Receive, /) -> bytes | None:
+    """Return the body of a request, or `None` if it is too large."""
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk: bytes = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_SIZE:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def _reply(send: Send, status: int, body: bytes = b"", /) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": _JSON_HEADERS if body else (),
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -14,3 +14,4 @@ ApplicationId = NewType("ApplicationId", SnowflakeId)
 StickerId = NewType("StickerId", SnowflakeId)
 StickerPackId = NewType("StickerPackId", SnowflakeId)
 AttachmentId = NewType("AttachmentId", SnowflakeId)
+InteractionId = NewType("InteractionId", SnowflakeId)
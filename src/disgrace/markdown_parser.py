@@ -0,0 +1,524 @@
+"""Parser of discord flavored markdown.
+
+`parse` turns message content into a `Document`: a tuple of blocks (paragraphs,
+headings, subtext, list items, quotes and code blocks), each holding its inline nodes.
+Nodes are frozen structs, tagged by their ``type``, so that a document can be encoded
+with msgspec as is.
+
+Blocks do not store their position within the text; the document keeps the length of
+each instead. `Document.update` can thus reuse the blocks before and after an edit
+untouched and re-parse only the region in between, which is what MESSAGE_UPDATE calls
+for: edits tend to be small, while the content can be up to 4000 characters long.
+"""
+
+import re
+from typing import Final, Literal, Self
+
+import msgspec
+
+from disgrace import ids
+
+__all__ = (
+    "Block",
+    "Bold",
+    "ChannelMention",
+    "CodeBlock",
+    "CustomEmoji",
+    "Document",
+    "Heading",
+    "Inline",
+    "InlineCode",
+    "Italic",
+    "Link",
+    "ListItem",
+    "Paragraph",
+    "Quote",
+    "RoleMention",
+    "Spoiler",
+    "Strikethrough",
+    "Subtext",
+    "Text",
+    "Timestamp",
+    "Underline",
+    "UserMention",
+    "parse",
+)
+
+
+class Node(msgspec.Struct, frozen=True, gc=False, tag_field="type", tag=str.lower): ...
+
+
+# -------------------------------------- inline nodes ------------------------------------
+class Text(Node, frozen=True, gc=False):
+    text: str
+
+
+class Bold(Node, frozen=True, gc=False):
+    children: "tuple[Inline, ...]"
+
+
+class Italic(Node, frozen=True, gc=False):
+    children: "tuple[Inline, ...]"
+
+
+class Underline(Node, frozen=True, gc=False):
+    children: "tuple[Inline, ...]"
+
+
+class Strikethrough(Node, frozen=True, gc=False):
+    children: "tuple[Inline, ...]"
+
+
+class Spoiler(Node, frozen=True, gc=False):
+    children: "tuple[Inline, ...]"
+
+
+class InlineCode(Node, frozen=True, gc=False):
+    code: str
+
+
+class Link(Node, frozen=True, gc=False):
+    """A masked link."""
+
+    children: "tuple[Inline, ...]"
+    url: str
+
+
+class Timestamp(Node, frozen=True, gc=False):
+    timestamp: int
+    style: Literal["f", "F", "d", "D", "t", "T", "R"] = "f"
+
+
+class UserMention(Node, frozen=True, gc=False):
+    id: ids.UserId
+
+
+class RoleMention(Node, frozen=True, gc=False):
+    id: ids.RoleId
+
+
+class ChannelMention(Node, frozen=True, gc=False):
+    id: ids.ChannelId
+
+
+class CustomEmoji(Node, frozen=True, gc=False):
+    id: ids.GuildEmojiId
+    name: str
+    animated: bool = False
+
+
+type Inline = (
+    Text
+    | Bold
+    | Italic
+    | Underline
+    | Strikethrough
+    | Spoiler
+    | InlineCode
+    | Link
+    | Timestamp
+    | UserMention
+    | RoleMention
+    | ChannelMention
+    | CustomEmoji
+)
+
+
+# -------------------------------------- block nodes -------------------------------------
+class Paragraph(Node, frozen=True, gc=False):
+    children: tuple[Inline, ...]
+
+
+class Heading(Node, frozen=True, gc=False):
+    level: int
+    children: tuple[Inline, ...]
+
+
+class Subtext(Node, frozen=True, gc=False):
+    children: tuple[Inline, ...]
+
+
+class ListItem(Node, frozen=True, gc=False):
+    """An item of a list; consecutive items make up the list."""
+
+    depth: int
+    number: int | None
+    """Number of an ordered item; `None` for bullet points."""
+    children: tuple[Inline, ...]
+
+
+class CodeBlock(Node, frozen=True, gc=False):
+    code: str
+    language: str = ""
+
+
+class Quote(Node, frozen=True, gc=False):
+    children: "tuple[Block, ...]"
+
+
+type Block = Paragraph | Heading | Subtext | ListItem | CodeBlock | Quote
+
+
+# ---------------------------------------- document --------------------------------------
+class Document(msgspec.Struct, frozen=True, gc=False):
+    text: str
+    blocks: tuple[Block, ...]
+    lengths: tuple[int, ...]
+    """Length of the source of each block."""
+
+    def update(self, text: str, /) -> Self:
+        """Return the document of an edited version of the text.
+
+        Only the blocks around the edit are parsed again; the rest are reused.
+        """
+        old = self.text
+        if text == old:
+            return self
+
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        delta = len(text) - len(old)
+
+        # a block's end depends on the line following it, so start one block earlier;
+        # an unclosed code fence depends on every line following it, so start there
+        index = start = 0
+        fence: tuple[int, int] | None = None
+        for index, (block, length) in enumerate(
+            zip(self.blocks, self.lengths, strict=True)
+        ):
+            if start + length > prefix:
+                break
+            if fence is None and _is_unclosed_fence(old, start, block):
+                fence = index, start
+            start += length
+        else:
+            index = len(self.blocks)
+        if fence is not None:
+            index, start = fence
+        elif index:
+            index -= 1
+            start -= self.lengths[index]
+
+        # old block boundaries which, shifted by the edit, are safe to resume at
+        resume: dict[int, int] = {}
+        boundary = len(old)
+        for i in range(len(self.lengths) - 1, index, -1):
+            boundary -= self.lengths[i]
+            if boundary < len(old) - suffix:
+                break
+            resume[boundary + delta] = i
+
+        blocks = list(self.blocks[:index])
+        lengths = list(self.lengths[:index])
+        position = start
+        while position < len(text):
+            if (reused := resume.get(position)) is not None:
+                blocks += self.blocks[reused:]
+                lengths += self.lengths[reused:]
+                break
+            block, end = _parse_block(text, position)
+            blocks.append(block)
+            lengths.append(end - position)
+            position = end
+
+        return type(self)(text, tuple(blocks), tuple(lengths))
+
+
+def parse(text: str, /) -> Document:
+    blocks: list[Block] = []
+    lengths: list[int] = []
+    position = 0
+    while position < len(text):
+        block, end = _parse_block(text, position)
+        blocks.append(block)
+        lengths.append(end - position)
+        position = end
+    return Document(text, tuple(blocks), tuple(lengths))
+
+
+def _common_prefix(a: str, b: str, /) -> int:
+    # compare halves at C speed rather than character by character
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int, /) -> int:
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle : len(a) - low] == b[len(b) - middle : len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+# ---------------------------------------- blocks ----------------------------------------
+_HEADING: Final = re.compile(r"(#{1,3}) +(?=\S)")
+_SUBTEXT: Final = re.compile(r"-# +(?=\S)")
+_LIST_ITEM: Final = re.compile(r"( *)(?:([-*])|([0-9]{1,9})\.) +(?=\S)")
+_FENCE_LANGUAGE: Final = re.compile(r"[\w+#.-]+(?=\n)")
+
+
+def _line_end(text: str, position: int, /) -> int:
+    """Return the position past the end of the line, including its newline."""
+    end = text.find("\n", position)
+    return len(text) if end == -1 else end + 1
+
+
+def _content_end(text: str, end: int, /) -> int:
+    """Return the end of a line's content, excluding its newline."""
+    return end - 1 if text.endswith("\n", 0, end) else end
+
+
+def _is_special_line(text: str, position: int, /, *, quotes: bool = True) -> bool:
+    """Return whether a line starts a block other than a paragraph."""
+    return (
+        text.startswith("```", position)
+        or (quotes and text.startswith(("> ", ">>> "), position))
+        or _HEADING.match(text, position) is not None
+        or _SUBTEXT.match(text, position) is not None
+        or _LIST_ITEM.match(text, position) is not None
+    )
+
+
+def _parse_block(
+    text: str, position: int, /, *, quotes: bool = True
+) -> tuple[Block, int]:
+    """Parse the block starting at given line, returning it with its end.
+
+    Quotes do not nest; within one, given ``quotes=False``, quote markers are text.
+    """
+    if text.startswith("```", position) and (code := _parse_code_block(text, position)):
+        return code
+
+    if quotes and text.startswith(">>> ", position):
+        return Quote(_parse_quoted(text[position + 4 :])), len(text)
+
+    line_end = _line_end(text, position)
+    if quotes and text.startswith("> ", position):
+        lines: list[str] = []
+        end = position
+        while text.startswith("> ", end):
+            line_end = _line_end(text, end)
+            lines.append(text[end + 2 : line_end])
+            end = line_end
+        return Quote(_parse_quoted("".join(lines))), end
+
+    content_end = _content_end(text, line_end)
+    if match := _HEADING.match(text, position):
+        level = len(match[1])
+        return Heading(level, _parse_inline(text, match.end(), content_end)), line_end
+
+    if match := _SUBTEXT.match(text, position):
+        return Subtext(_parse_inline(text, match.end(), content_end)), line_end
+
+    if match := _LIST_ITEM.match(text, position):
+        indent, _, number = match.groups()
+        return ListItem(
+            len(indent) // 2,
+            None if number is None else int(number),
+            _parse_inline(text, match.end(), content_end),
+        ), line_end
+
+    # a paragraph runs until a line starting another block
+    end = line_end
+    while end < len(text) and not _is_special_line(text, end, quotes=quotes):
+        end = _line_end(text, end)
+    return Paragraph(_parse_inline(text, position, _content_end(text, end))), end
+
+
+def _is_unclosed_fence(text: str, start: int, block: Block, /) -> bool:
+    return isinstance(block, Paragraph) and text.startswith("```", start)
+
+
+def _parse_quoted(text: str, /) -> tuple[Block, ...]:
+    blocks: list[Block] = []
+    position = 0
+    while position < len(text):
+        block, position = _parse_block(text, position, quotes=False)
+        blocks.append(block)
+    return tuple(blocks)
+
+
+def _parse_code_block(text: str, position: int, /) -> tuple[CodeBlock, int] | None:
+    start = position + 3
+    close = text.find("```", start)
+    if close == -1:
+        return None
+
+    language = ""
+    if match := _FENCE_LANGUAGE.match(text, start, close):
+        language = match[0]
+        start = match.end() + 1
+    elif text.startswith("\n", start):
+        start += 1
+
+    end = close + 3
+    if text.startswith("\n", end):
+        end += 1
+    return CodeBlock(text[start:close], language), end
+
+
+# ---------------------------------------- inline ----------------------------------------
+_SPECIAL: Final = re.compile(r"[\\*_~|`\[<]")
+_DELIMITERS: Final = (
+    ("**", Bold),
+    ("__", Underline),
+    ("~~", Strikethrough),
+    ("||", Spoiler),
+    ("*", Italic),
+    ("_", Italic),
+)
+_LINK: Final = re.compile(r"\[([^\[\]\n]+)\]\(<?(https?://[^\s<>()]+)>?\)")
+_TIMESTAMP: Final = re.compile(r"<t:(-?[0-9]{1,17})(?::([fFdDtTR]))?>")
+_TAG: Final = re.compile(r"<(?:(@[!&]?)|(#)|(a?):(\w{2,32}):)([0-9]{1,20})>", re.ASCII)
+_MAX_DEPTH: Final = 64
+"""Depth of nested formatting beyond which delimiters are left as text."""
+
+
+def _parse_inline(
+    text: str, start: int, end: int, depth: int = 0, /
+) -> tuple[Inline, ...]:
+    nodes: list[Inline] = []
+    literal: list[str] = []
+    position = start
+
+    def flush() -> None:
+        if joined := "".join(literal):
+            nodes.append(Text(joined))
+        literal.clear()
+
+    while (match := _SPECIAL.search(text, position, end)) is not None:
+        index = match.start()
+        literal.append(text[position:index])
+        result = _parse_special(text, index, end, depth)
+        if result is None:
+            literal.append(text[index])
+            position = index + 1
+            continue
+
+        node, position = result
+        if isinstance(node, str):
+            literal.append(node)
+        else:
+            flush()
+            nodes.append(node)
+
+    literal.append(text[position:end])
+    flush()
+    return tuple(nodes)
+
+
+def _parse_special(
+    text: str, index: int, end: int, depth: int, /
+) -> tuple[Inline | str, int] | None:
+    """Parse the construct at given position, returning it with its end.
+
+    Escaped characters are returned as strings.
+    """
+    char = text[index]
+    if char == "\\":
+        if index + 1 < end and not text[index + 1].isalnum():
+            return text[index + 1], index + 2
+        return None
+
+    if char == "`":
+        return _parse_code_span(text, index, end)
+
+    if depth >= _MAX_DEPTH:
+        return None
+
+    if char == "[":
+        if match := _LINK.match(text, index, end):
+            label = _parse_inline(text, match.start(1), match.end(1), depth + 1)
+            return Link(label, match[2]), match.end()
+        return None
+
+    if char == "<":
+        return _parse_tag(text, index, end)
+
+    for delimiter, kind in _DELIMITERS:
+        if text.startswith(delimiter, index, end):
+            result = _parse_delimited(text, index, end, delimiter)
+            if result is not None:
+                inner_start, inner_end, close_end = result
+                inner = _parse_inline(text, inner_start, inner_end, depth + 1)
+                return kind(inner), close_end
+    return None
+
+
+def _parse_code_span(text: str, index: int, end: int, /) -> tuple[Inline | str, int]:
+    # ``code`` may contain single backticks; ```code``` may span lines
+    run = index
+    while run < end and text[run] == "`":
+        run += 1
+    fence = text[index : min(run, index + 3)]
+    close = text.find(fence, index + len(fence) + 1, end)
+    if close == -1:
+        # an unclosed run of backticks is literal as a whole
+        return text[index:run], run
+    return InlineCode(text[index + len(fence) : close]), close + len(fence)
+
+
+def _parse_tag(text: str, index: int, end: int, /) -> tuple[Inline, int] | None:
+    if match := _TIMESTAMP.match(text, index, end):
+        timestamp, style = match.groups()
+        if style is None:
+            return Timestamp(int(timestamp)), match.end()
+        return Timestamp(int(timestamp), style), match.end()  # pyright: ignore[reportArgumentType]
+
+    match = _TAG.match(text, index, end)
+    if match is None:
+        return None
+
+    user, channel, animated, name, digits = match.groups()
+    id = ids.SnowflakeId(int(digits))
+    if user == "@&":
+        return RoleMention(ids.RoleId(id)), match.end()
+    if user is not None:
+        return UserMention(ids.UserId(id)), match.end()
+    if channel is not None:
+        return ChannelMention(ids.ChannelId(id)), match.end()
+    return CustomEmoji(ids.GuildEmojiId(id), name, bool(animated)), match.end()
+
+
+def _parse_delimited(
+    text: str, index: int, end: int, delimiter: str, /
+) -> tuple[int, int, int] | None:
+    """Find the closing delimiter, returning the span of the inner text and the end."""
+    start = index + len(delimiter)
+    if start >= end or text[start].isspace():
+        return None
+    if delimiter == "_" and index and _is_word_char(text[index - 1]):
+        return None
+
+    close = text.find(delimiter, start + 1, end)
+    while close != -1:
+        after = close + len(delimiter)
+        if len(delimiter) == 1:
+            if text.startswith(delimiter, after, end):
+                # a double delimiter within, as in *italic **bold** italic*
+                close = text.find(delimiter, after + 1, end)
+                continue
+            if delimiter == "_" and after < end and _is_word_char(text[after]):
+                close = text.find(delimiter, after, end)
+                continue
+
+        elif after < end and text[after] == delimiter[0]:
+            # the closing delimiter is the last of a run, as in ***bold italic***
+            close += 1
+            continue
+
+        return start, close, after
+    return None
+
+
+def _is_word_char(char: str, /) -> bool:
+    return char.isalnum() or char == "_"
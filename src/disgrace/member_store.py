@@ -0,0 +1,296 @@
+"""Columnar storage of guild members.
+
+Keeping every member of a large guild as a struct costs well over a kilobyte apiece;
+most of it in per-object overhead and in strings of snowflakes and timestamps.
+`GuildMembers` instead keeps one typed `array` per field, with a row per member:
+
+- user IDs as unsigned 64-bit integers;
+- join and boost times as signed 64-bit microseconds since the epoch;
+- roles as an index into the guild's interned role sets, since most members share
+  the exact same handful of roles;
+- rarely set fields, such as nicknames, in dictionaries holding only the members
+  which have them.
+
+A member costs some 30 bytes of columns plus its entry in the ID to row index.
+"""
+
+import datetime
+from array import array
+from collections import abc
+from typing import Final, cast
+
+import attrs
+import msgspec
+
+from disgrace import ids
+from disgrace.models.common import cast_int_ids
+from disgrace.structs import raw_ids
+from disgrace.structs.gateway import RawGuildMemberUpdate
+from disgrace.structs.guild import RawMember
+from disgrace.structs.misc import AssetHash, ISOTimestamp
+
+__all__ = ("GuildMembers", "Member", "MemberStore")
+
+_NO_TIME: Final = -(1 << 63)
+"""Stand-in for a missing timestamp in a time column."""
+_EPOCH: Final = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+
+# bits of the `_state` column
+_DEAF: Final = 1 << 0
+_MUTE: Final = 1 << 1
+_PENDING: Final = 1 << 2
+
+
+def _to_micros(timestamp: ISOTimestamp | None, /) -> int:
+    if timestamp is None:
+        return _NO_TIME
+    delta = datetime.datetime.fromisoformat(timestamp) - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(micros: int, /) -> datetime.datetime | None:
+    if micros == _NO_TIME:
+        return None
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+
+@attrs.define(frozen=True)
+class Member:
+    """Snapshot of a member's row, created on lookup."""
+
+    id: ids.UserId
+    guild_id: ids.GuildId
+    roles: tuple[ids.RoleId, ...]
+    joined_at: datetime.datetime | None
+    premium_since: datetime.datetime | None
+    nick: str | None
+    avatar: AssetHash | None
+    flags: int
+    deaf: bool
+    mute: bool
+    pending: bool
+
+
+@attrs.define
+class GuildMembers:
+    """Members of a single guild, stored column-wise."""
+
+    guild_id: ids.GuildId
+    _rows: dict[ids.UserId, int] = attrs.field(
+        factory=dict[ids.UserId, int], init=False, repr=False
+    )
+    """Maps user IDs onto their row."""
+
+    # columns
+    _user_ids: array[int] = attrs.field(
+        factory=lambda: array("Q"), init=False, repr=False
+    )
+    _joined_at: array[int] = attrs.field(
+        factory=lambda: array("q"), init=False, repr=False
+    )
+    _premium_since: array[int] = attrs.field(
+        factory=lambda: array("q"), init=False, repr=False
+    )
+    _role_sets: array[int] = attrs.field(
+        factory=lambda: array("I"), init=False, repr=False
+    )
+    _flags: array[int] = attrs.field(factory=lambda: array("I"), init=False, repr=False)
+    _state: array[int] = attrs.field(factory=lambda: array("B"), init=False, repr=False)
+
+    # sparse columns, keyed by user ID so that moving rows leaves them be
+    _nicks: dict[ids.UserId, str] = attrs.field(
+        factory=dict[ids.UserId, str], init=False, repr=False
+    )
+    _avatars: dict[ids.UserId, AssetHash] = attrs.field(
+        factory=dict[ids.UserId, AssetHash], init=False, repr=False
+    )
+
+    # interning of roles
+    _role_ids: list[ids.RoleId] = attrs.field(
+        factory=list[ids.RoleId], init=False, repr=False
+    )
+    _role_indices: dict[ids.RoleId, int] = attrs.field(
+        factory=dict[ids.RoleId, int], init=False, repr=False
+    )
+    _sets: list[tuple[int, ...]] = attrs.field(
+        factory=lambda: [()], init=False, repr=False
+    )
+    """Distinct sets of role indices; members refer to them by position."""
+    _set_indices: dict[tuple[int, ...], int] = attrs.field(
+        factory=lambda: {(): 0}, init=False, repr=False
+    )
+    _raw_set_indices: dict[tuple[raw_ids.RoleId, ...], int] = attrs.field(
+        factory=lambda: {(): 0}, init=False, repr=False
+    )
+    """Role lists as sent by Discord, so that repeated lists skip parsing the IDs."""
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, user_id: ids.UserId, /) -> bool:
+        return user_id in self._rows
+
+    def __iter__(self) -> abc.Iterator[ids.UserId]:
+        return iter(self._rows)
+
+    def get(self, user_id: ids.UserId, /) -> Member | None:
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+
+        state = self._state[row]
+        return Member(
+            id=user_id,
+            guild_id=self.guild_id,
+            roles=self._roles_at(row),
+            joined_at=_from_micros(self._joined_at[row]),
+            premium_since=_from_micros(self._premium_since[row]),
+            nick=self._nicks.get(user_id),
+            avatar=self._avatars.get(user_id),
+            flags=self._flags[row],
+            deaf=bool(state & _DEAF),
+            mute=bool(state & _MUTE),
+            pending=bool(state & _PENDING),
+        )
+
+    def roles_of(self, user_id: ids.UserId, /) -> tuple[ids.RoleId, ...]:
+        row = self._rows.get(user_id)
+        return () if row is None else self._roles_at(row)
+
+    def with_role(self, role_id: ids.RoleId, /) -> list[ids.UserId]:
+        """Return the IDs of the members having given role."""
+        index = self._role_indices.get(role_id)
+        if index is None:
+            return []
+
+        matching = {i for i, role_set in enumerate(self._sets) if index in role_set}
+        user_ids = self._user_ids
+        return [
+            ids.UserId(ids.SnowflakeId(user_ids[row]))
+            for row, role_set in enumerate(self._role_sets)
+            if role_set in matching
+        ]
+
+    def upsert(
+        self, user_id: ids.UserId, member: RawMember | RawGuildMemberUpdate, /
+    ) -> None:
+        """Insert a member, or update the fields present in a (partial) member."""
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+            self._joined_at.append(_NO_TIME)
+            self._premium_since.append(_NO_TIME)
+            self._role_sets.append(0)
+            self._flags.append(0)
+            self._state.append(0)
+
+        self._role_sets[row] = self._intern_roles(member.roles)
+        if member.joined_at is not None:
+            self._joined_at[row] = _to_micros(member.joined_at)
+        self._premium_since[row] = _to_micros(member.premium_since)
+        if not isinstance(member.flags, msgspec.UnsetType):
+            self._flags[row] = member.flags
+
+        state = self._state[row] & ~_PENDING | (_PENDING if member.pending else 0)
+        if not isinstance(member.deaf, msgspec.UnsetType):
+            state = state & ~_DEAF | (_DEAF if member.deaf else 0)
+        if not isinstance(member.mute, msgspec.UnsetType):
+            state = state & ~_MUTE | (_MUTE if member.mute else 0)
+        self._state[row] = state
+
+        _set_sparse(self._nicks, user_id, member.nick)
+        _set_sparse(self._avatars, user_id, member.avatar)
+
+    def remove(self, user_id: ids.UserId, /) -> bool:
+        """Remove a member, returning whether it was stored."""
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return False
+
+        # move the last row into the hole, so that the columns stay dense
+        last = len(self._user_ids) - 1
+        for column in (
+            self._user_ids,
+            self._joined_at,
+            self._premium_since,
+            self._role_sets,
+            self._flags,
+            self._state,
+        ):
+            column[row] = column[last]
+            del column[last]
+
+        if row != last:
+            self._rows[ids.UserId(ids.SnowflakeId(self._user_ids[row]))] = row
+
+        self._nicks.pop(user_id, None)
+        self._avatars.pop(user_id, None)
+        return True
+
+    def _intern_roles(self, raw_role_ids: abc.Sequence[raw_ids.RoleId], /) -> int:
+        raw_key = tuple(raw_role_ids)
+        set_index = self._raw_set_indices.get(raw_key)
+        if set_index is not None:
+            return set_index
+
+        indices: list[int] = []
+        role_ids = cast("abc.Iterable[ids.RoleId]", cast_int_ids(raw_key))
+        for role_id in role_ids:
+            index = self._role_indices.get(role_id)
+            if index is None:
+                index = self._role_indices[role_id] = len(self._role_ids)
+                self._role_ids.append(role_id)
+            indices.append(index)
+
+        key = tuple(sorted(indices))
+        set_index = self._set_indices.get(key)
+        if set_index is None:
+            set_index = self._set_indices[key] = len(self._sets)
+            self._sets.append(key)
+        self._raw_set_indices[raw_key] = set_index
+        return set_index
+
+    def _roles_at(self, row: int, /) -> tuple[ids.RoleId, ...]:
+        role_ids = self._role_ids
+        return tuple(role_ids[index] for index in self._sets[self._role_sets[row]])
+
+
+def _set_sparse[K, V](column: dict[K, V], key: K, value: V | None, /) -> None:
+    if value is None:
+        column.pop(key, None)
+    else:
+        column[key] = value
+
+
+@attrs.define
+class MemberStore:
+    """Columnar members of every guild, by guild ID."""
+
+    guilds: dict[ids.GuildId, GuildMembers] = attrs.field(
+        factory=dict[ids.GuildId, GuildMembers], init=False, repr=False
+    )
+
+    def __len__(self) -> int:
+        return sum(map(len, self.guilds.values()))
+
+    def guild(self, guild_id: ids.GuildId, /) -> GuildMembers:
+        """Return the members of a guild, creating an empty store if there is none."""
+        try:
+            return self.guilds[guild_id]
+
+        except KeyError:
+            members = self.guilds[guild_id] = GuildMembers(guild_id)
+            return members
+
+    def get(self, guild_id: ids.GuildId, user_id: ids.UserId, /) -> Member | None:
+        members = self.guilds.get(guild_id)
+        return None if members is None else members.get(user_id)
+
+    def remove(self, guild_id: ids.GuildId, user_id: ids.UserId, /) -> None:
+        members = self.guilds.get(guild_id)
+        if members is not None:
+            members.remove(user_id)
+
+    def drop_guild(self, guild_id: ids.GuildId, /) -> None:
+        self.guilds.pop(guild_id, None)
@@ -0,0 +1,168 @@
+"""Bounded cache of recent messages.
+
+Messages are by far the most numerous entity a bot sees, so unlike the rest of `State`
+they are kept under a budget. Every channel holds at most `max_per_channel` of its most
+recent messages, on top of which the whole cache is limited by count and, optionally,
+by size. Once over budget, the least recently used messages are evicted first; messages
+not touched for `ttl` seconds expire.
+"""
+
+import time
+from collections import OrderedDict
+
+import attrs
+
+from disgrace import codecs, ids
+from disgrace.models.common import cast_int_id
+from disgrace.structs.gateway import RawMessageCreate
+
+__all__ = ("CacheStats", "MessageCache")
+
+
+@attrs.define
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    """Messages dropped to stay within the budget."""
+    expirations: int = 0
+    """Messages dropped for not being used within the TTL."""
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@attrs.define
+class _Entry:
+    message: RawMessageCreate
+    channel_id: ids.ChannelId
+    size: int
+    used_at: float
+
+
+@attrs.define
+class MessageCache:
+    """LRU cache of messages with per-channel rings and idle expiry.
+
+    Lookups and updates are O(1). Expiry is checked lazily, on every insertion
+    and lookup, so no background task is needed.
+    """
+
+    max_messages: int = 1000
+    """Number of messages kept across all channels."""
+    max_per_channel: int = 100
+    """Number of the most recent messages kept per channel."""
+    max_bytes: int | None = None
+    """Approximate memory budget, measured as the messages' JSON size."""
+    ttl: float | None = None
+    """Seconds since its last use after which a message expires."""
+    stats: CacheStats = attrs.field(factory=CacheStats, init=False)
+
+    _entries: OrderedDict[ids.MessageId, _Entry] = attrs.field(
+        factory=OrderedDict[ids.MessageId, _Entry], init=False
+    )
+    """Entries ordered from the least to the most recently used."""
+    _channels: dict[ids.ChannelId, dict[ids.MessageId, None]] = attrs.field(
+        factory=dict[ids.ChannelId, dict[ids.MessageId, None]], init=False
+    )
+    """Message IDs of each channel, in order of arrival."""
+    _bytes: int = attrs.field(default=0, init=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, message_id: ids.MessageId, /) -> bool:
+        return message_id in self._entries
+
+    @property
+    def size(self) -> int:
+        """Approximate size of the cached messages, in bytes."""
+        return self._bytes
+
+    def get(self, message_id: ids.MessageId, /) -> RawMessageCreate | None:
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._entries.get(message_id)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self.stats.hits += 1
+        entry.used_at = now
+        self._entries.move_to_end(message_id)
+        return entry.message
+
+    def channel_messages(self, channel_id: ids.ChannelId, /) -> list[RawMessageCreate]:
+        """Return the cached messages of a channel, from oldest to newest."""
+        self._expire(time.monotonic())
+        return [
+            self._entries[message_id].message
+            for message_id in self._channels.get(channel_id, ())
+        ]
+
+    def add(self, message: RawMessageCreate, /) -> None:
+        """Insert a message, or replace its cached version."""
+        now = time.monotonic()
+        message_id = cast_int_id(message.id)
+        channel_id = cast_int_id(message.channel_id)
+        size = len(codecs.encode(message)) if self.max_bytes is not None else 0
+
+        self._expire(now)
+        entry = self._entries.get(message_id)
+        if entry is not None:
+            # an edit; the message keeps its place in the channel
+            self._bytes += size - entry.size
+            entry.message, entry.size, entry.used_at = message, size, now
+            self._entries.move_to_end(message_id)
+
+        else:
+            ring = self._channels.get(channel_id, {})
+            while len(ring) >= self.max_per_channel:
+                self._remove(next(iter(ring)))
+                self.stats.evictions += 1
+
+            self._entries[message_id] = _Entry(message, channel_id, size, now)
+            self._channels.setdefault(channel_id, {})[message_id] = None
+            self._bytes += size
+
+        while len(self._entries) > self.max_messages or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def pop(self, message_id: ids.MessageId, /) -> RawMessageCreate | None:
+        """Remove a message, returning its cached version if there was one."""
+        entry = self._remove(message_id)
+        return None if entry is None else entry.message
+
+    def clear_channel(self, channel_id: ids.ChannelId, /) -> None:
+        for message_id in tuple(self._channels.get(channel_id, ())):
+            self._remove(message_id)
+
+    def _remove(self, message_id: ids.MessageId, /) -> _Entry | None:
+        entry = self._entries.pop(message_id, None)
+        if entry is None:
+            return None
+
+        self._bytes -= entry.size
+        ring = self._channels[entry.channel_id]
+        del ring[message_id]
+        if not ring:
+            del self._channels[entry.channel_id]
+        return entry
+
+    def _expire(self, now: float, /) -> None:
+        if self.ttl is None:
+            return
+
+        # least recently used first, so expired entries are all at the front
+        deadline = now - self.ttl
+        while self._entries:
+            message_id, entry = next(iter(self._entries.items()))
+            if entry.used_at > deadline:
+                break
+            self._remove(message_id)
+            self.stats.expirations += 1
@@ -1,12 +1,30 @@
 import datetime
+from array import array
+from collections import abc
 from typing import TYPE_CHECKING, overload
 
-from disgrace import ids
+import msgspec
+
+from disgrace import codecs, ids
 from disgrace.abc import Snowflake
+from disgrace.color import Color
 from disgrace.structs import raw_ids
 from disgrace.utils import snowflake_time
 
 
+def model_decoder[T](type: type[T], /) -> msgspec.json.Decoder[T]:
+    """Return a decoder of JSON straight into a model.
+
+    Decoding is lax, so that string snowflakes decode into `ids`. Models keep asset
+    hashes and raw colors under the names Discord uses, building assets on access.
+    """
+    return codecs.decoder(type, strict=False)
+
+
+def to_color(value: int | None, /) -> Color:
+    return Color.none if not value else Color(value)
+
+
 @property
 def created_at(self: Snowflake[ids.SnowflakeId]) -> datetime.datetime:
     return snowflake_time(self.id)
@@ -76,3 +94,12 @@ def cast_int_id(id: raw_ids.SnowflakeId, /) -> ids.SnowflakeId:
 
 def cast_str_id(id: ids.SnowflakeId, /) -> raw_ids.SnowflakeId:
     return raw_ids.SnowflakeId(str(id))
+
+
+def cast_int_ids(raw: abc.Iterable[raw_ids.SnowflakeId], /) -> array[int]:
+    """Convert many snowflakes at once, into a column of unsigned 64-bit integers.
+
+    Saves a Python-level call per ID over `cast_int_id`. Where the JSON is at hand,
+    decoding it laxly, as `model_decoder` does, parses the IDs faster still.
+    """
+    return array("Q", map(int, raw))
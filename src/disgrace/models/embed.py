@@ -7,6 +7,7 @@ import msgspec
 
 from disgrace.color import Color
 from disgrace.limits import EmbedLimits
+from disgrace.models.common import to_color
 from disgrace.structs import embed
 from disgrace.utils import isoformat_utc
 
@@ -132,7 +133,7 @@ class EmbedBuilder(msgspec.Struct, kw_only=True):
             description=self.description,
             url=self.url,
             timestamp=self.timestamp,
-            color=self.color or self.default_color,
+            color_value=(self.color or self.default_color).value,
             footer=self.footer,
             image=self.image,
             thumbnail=self.thumbnail,
@@ -146,13 +147,17 @@ class Embed(msgspec.Struct, frozen=True, kw_only=True):
     description: str = ""
     url: str = ""
     timestamp: datetime.datetime | None = None
-    color: Color = msgspec.field(default_factory=lambda: EmbedBuilder.default_color)
+    color_value: int | None = msgspec.field(default=None, name="color")
     footer: Footer | None = None
     image: Media | None = None
     thumbnail: Media | None = None
     author: Author | None = None
     fields: abc.Sequence[Field] = ()
 
+    @property
+    def color(self) -> Color:
+        return to_color(self.color_value)
+
     def to_struct(self) -> embed.RawEmbed:
         if __debug__:
             self.validate()
@@ -163,7 +168,7 @@ class Embed(msgspec.Struct, frozen=True, kw_only=True):
             timestamp=msgspec.UNSET
             if self.timestamp is None
             else isoformat_utc(self.timestamp),
-            color=self.color.value or msgspec.UNSET,
+            color=self.color_value or msgspec.UNSET,
             footer=msgspec.UNSET if self.footer is None else self.footer.to_struct(),
             image=msgspec.UNSET if self.image is None else self.image.to_struct(),
             thumbnail=msgspec.UNSET
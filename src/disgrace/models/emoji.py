@@ -1,22 +1,79 @@
+import functools
+import importlib.resources
 from collections import abc
-from typing import Literal, override
+from typing import Literal, Self, override
 
 import msgspec
 
 import disgrace.abc
-from disgrace import ids
+from disgrace import codecs, ids
 from disgrace.asset import Asset
 from disgrace.structs import emoji
 
 from .common import cast_str_id, created_at
 
-# TODO: cache unicode emojis?
-_UNICODE_EMOJI_TABLE: abc.Mapping[str, "UnicodeEmoji"] = {}
+_UNICODE_EMOJI_TABLE: dict[str, "UnicodeEmoji"] = {}
+"""Interned unicode emojis of the bundled table, by name."""
+_VS16 = "\N{VARIATION SELECTOR-16}"
 
 
-class UnicodeEmoji(disgrace.abc.Mentionable, msgspec.Struct):
+@functools.cache
+def _shortcodes() -> dict[str, str]:
+    """Return the bundled table of shortcodes to emojis, loading it on first use."""
+    data = importlib.resources.files("disgrace").joinpath("data/unicode_emojis.json")
+    return codecs.decode(data.read_bytes(), dict[str, str])
+
+
+def unicode_emoji_names() -> abc.Collection[str]:
+    """Return the names of the emojis in the bundled table."""
+    return _shortcodes().values()
+
+
+@functools.cache
+def _shortcodes_by_emoji() -> dict[str, str]:
+    # the table lists the shortcode Discord displays first
+    by_emoji: dict[str, str] = {}
+    for code, name in _shortcodes().items():
+        by_emoji.setdefault(name.replace(_VS16, ""), code)
+    return by_emoji
+
+
+class UnicodeEmoji(msgspec.Struct, frozen=True, gc=False):
+    """A standard emoji.
+
+    Emojis of the bundled table are interned; `get` returns the one instance of each,
+    rather than creating a new one. Sequences outside of it are created anew, so that
+    arbitrary text cannot grow the table.
+    """
+
     name: str
 
+    @classmethod
+    def get(cls, name: str, /) -> Self:
+        """Return the emoji of given name, such as ``"👍"``."""
+        try:
+            return _UNICODE_EMOJI_TABLE[name]  # pyright: ignore[reportReturnType]
+
+        except KeyError:
+            emoji = cls(name)
+            if name.replace(_VS16, "") in _shortcodes_by_emoji():
+                _UNICODE_EMOJI_TABLE[name] = emoji
+            return emoji
+
+    @classmethod
+    def from_shortcode(cls, shortcode: str, /) -> Self | None:
+        """Return the emoji of given shortcode, such as ``":thumbsup:"``.
+
+        Shortcodes are those of Discord, skin tones included: ``":thumbsup_tone3:"``.
+        """
+        name = _shortcodes().get(shortcode.strip(":"))
+        return None if name is None else cls.get(name)
+
+    @property
+    def shortcode(self) -> str | None:
+        """The shortcode Discord displays for the emoji, if it is in the bundled table."""
+        return _shortcodes_by_emoji().get(self.name.replace(_VS16, ""))
+
     @property
     def id(self) -> None:
         return None
@@ -41,8 +98,9 @@ class UnicodeEmoji(disgrace.abc.Mentionable, msgspec.Struct):
     def __hash__(self) -> int:
         return hash(self.name)
 
+    __str__ = disgrace.abc.Mentionable.__str__
+
     @property
-    @override
     def mention(self) -> str:
         return self.name
 
@@ -50,7 +108,18 @@ class UnicodeEmoji(disgrace.abc.Mentionable, msgspec.Struct):
         return emoji.PartialEmoji(id=None, name=self.name)
 
 
-class GuildEmoji(disgrace.abc.Mentionable, msgspec.Struct):
+def emoji_from_partial(partial: emoji.PartialEmoji, /) -> "GuildEmoji | UnicodeEmoji":
+    """Return the emoji of a partial emoji, interning unicode emojis."""
+    if partial.id is None:
+        return UnicodeEmoji.get(partial.name)
+    return GuildEmoji(
+        ids.GuildEmojiId(ids.SnowflakeId(int(partial.id))),
+        partial.name,
+        animated=partial.animated,
+    )
+
+
+class GuildEmoji(msgspec.Struct):
     id: ids.GuildEmojiId
     name: str
     animated: bool = False
@@ -62,8 +131,9 @@ class GuildEmoji(disgrace.abc.Mentionable, msgspec.Struct):
     __hash__ = disgrace.abc.Snowflake[ids.GuildEmojiId].__hash__
     created_at = created_at
 
+    __str__ = disgrace.abc.Mentionable.__str__
+
     @property
-    @override
     def mention(self) -> str:
         if self.animated:
             return f"<a:{self.name}:{self.id}>"
@@ -78,7 +148,7 @@ class GuildEmoji(disgrace.abc.Mentionable, msgspec.Struct):
         return Asset.from_emoji(self.id, self.animated)
 
 
-class AppEmoji(disgrace.abc.Mentionable, msgspec.Struct):
+class AppEmoji(msgspec.Struct):
     id: ids.AppEmojiId
     name: str
     animated: bool = False
@@ -99,8 +169,9 @@ class AppEmoji(disgrace.abc.Mentionable, msgspec.Struct):
     __hash__ = disgrace.abc.Snowflake[ids.AppEmojiId].__hash__
     created_at = created_at
 
+    __str__ = disgrace.abc.Mentionable.__str__
+
     @property
-    @override
     def mention(self) -> str:
         if self.animated:
             return f"<a:{self.name}:{self.id}>"
@@ -8,6 +8,7 @@ from disgrace import ids
 from disgrace.asset import Asset
 from disgrace.enums import Locale
 from disgrace.models.common import created_at
+from disgrace.structs.misc import AssetHash
 
 from .emoji import GuildEmoji, UnicodeEmoji
 
@@ -20,12 +21,21 @@ type Sticker = object
 class WelcomeScreenChannel(msgspec.Struct, kw_only=True):
     channel_id: ids.ChannelId
     description: str
-    emoji: GuildEmoji | UnicodeEmoji | None = None
+    emoji_id: ids.GuildEmojiId | None = None
+    emoji_name: str | None = None
+
+    @property
+    def emoji(self) -> GuildEmoji | UnicodeEmoji | None:
+        if self.emoji_id is not None:
+            return GuildEmoji(self.emoji_id, self.emoji_name or "")
+        if self.emoji_name is not None:
+            return UnicodeEmoji.get(self.emoji_name)
+        return None
 
 
 class WelcomeScreen(msgspec.Struct, kw_only=True):
     description: str | None = None
-    channels: abc.Sequence[WelcomeScreenChannel]
+    channels: abc.Sequence[WelcomeScreenChannel] = msgspec.field(name="welcome_channels")
 
 
 class IncidentsData(msgspec.Struct, kw_only=True):
@@ -38,9 +48,11 @@ class IncidentsData(msgspec.Struct, kw_only=True):
 class Guild(msgspec.Struct, kw_only=True):
     id: ids.GuildId
     name: str
-    icon: Asset.StaticOrGifAsset | None = None
-    splash: Asset.StaticAsset | None = None
-    discovery_splash: Asset.StaticAsset | None = None
+    icon_hash: AssetHash | None = msgspec.field(default=None, name="icon")
+    splash_hash: AssetHash | None = msgspec.field(default=None, name="splash")
+    discovery_splash_hash: AssetHash | None = msgspec.field(
+        default=None, name="discovery_splash"
+    )
     owner_id: ids.UserId
     # permissions
     afk_channel_id: ids.ChannelId | None = None
@@ -62,7 +74,7 @@ class Guild(msgspec.Struct, kw_only=True):
     max_members: int = 0
     vanity_url_code: str | None = None
     description: str | None = None
-    banner: Asset.StaticOrGifAsset | None = None
+    banner_hash: AssetHash | None = msgspec.field(default=None, name="banner")
     premium_tier: int = 0
     premium_subscription_count: int = 0
     preferred_locale: Locale = Locale.en_US
@@ -81,3 +93,27 @@ class Guild(msgspec.Struct, kw_only=True):
     __eq__ = disgrace.abc.Snowflake[ids.GuildId].__eq__
     __hash__ = disgrace.abc.Snowflake[ids.GuildId].__hash__
     created_at = created_at
+
+    @property
+    def icon(self) -> Asset.StaticOrGifAsset | None:
+        if self.icon_hash is None:
+            return None
+        return Asset.guild_icon(self.id, self.icon_hash)
+
+    @property
+    def splash(self) -> Asset.StaticAsset | None:
+        if self.splash_hash is None:
+            return None
+        return Asset.guild_splash(self.id, self.splash_hash)
+
+    @property
+    def discovery_splash(self) -> Asset.StaticAsset | None:
+        if self.discovery_splash_hash is None:
+            return None
+        return Asset.guild_discovery_splash(self.id, self.discovery_splash_hash)
+
+    @property
+    def banner(self) -> Asset.StaticOrGifAsset | None:
+        if self.banner_hash is None:
+            return None
+        return Asset.guild_banner(self.id, self.banner_hash)
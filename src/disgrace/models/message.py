@@ -8,6 +8,9 @@ from disgrace import ids
 from disgrace.enums import MessageType
 from disgrace.flags import AttachmentFlags, MessageFlags
 from disgrace.models.embed import Embed
+from disgrace.models.emoji import GuildEmoji, UnicodeEmoji, emoji_from_partial
+from disgrace.models.user import User
+from disgrace.structs.emoji import PartialEmoji
 
 
 class Attachment(msgspec.Struct, kw_only=True):
@@ -53,21 +56,34 @@ class VoiceAttachment(msgspec.Struct, kw_only=True):
     flags: AttachmentFlags = AttachmentFlags.none
 
 
+class Reaction(msgspec.Struct, kw_only=True):
+    count: int
+    me: bool
+    me_burst: bool = False
+    partial_emoji: PartialEmoji = msgspec.field(name="emoji")
+
+    @property
+    def emoji(self) -> GuildEmoji | UnicodeEmoji:
+        return emoji_from_partial(self.partial_emoji)
+
+
 class Message(msgspec.Struct, kw_only=True):
     id: ids.MessageId
     channel_id: ids.ChannelId
-    author: disgrace.abc.User
+    author: User
     content: str
-    created_at: datetime.datetime
-    edited_at: datetime.datetime | None
+    created_at: datetime.datetime = msgspec.field(name="timestamp")
+    edited_at: datetime.datetime | None = msgspec.field(name="edited_timestamp")
     tts: bool
-    mentions_everyone: bool
-    mentions: abc.Sequence[disgrace.abc.User]
-    role_mentions: abc.Sequence[ids.RoleId]
-    channel_mentions: abc.Sequence[object] = ()
+    mentions_everyone: bool = msgspec.field(name="mention_everyone")
+    mentions: abc.Sequence[User]
+    role_mentions: abc.Sequence[ids.RoleId] = msgspec.field(name="mention_roles")
+    channel_mentions: abc.Sequence[object] = msgspec.field(
+        default=(), name="mention_channels"
+    )
     attachments: abc.Sequence[object]
     embeds: abc.Sequence[Embed]
-    reactions: abc.Sequence[object] = ()
+    reactions: abc.Sequence[Reaction] = ()
     # nonce
     pinned: bool
     type: MessageType
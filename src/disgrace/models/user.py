@@ -1,4 +1,4 @@
-from typing import ClassVar, Self, override
+from typing import ClassVar, Self
 
 import msgspec
 
@@ -8,45 +8,71 @@ from disgrace.asset import Asset
 from disgrace.color import Color
 from disgrace.enums import Locale, UserPremiumType
 from disgrace.flags import UserFlags
+from disgrace.structs.misc import AssetHash
 
-from .common import created_at
+from .common import created_at, to_color
 
 
+# Fields holding asset hashes and raw colors keep the names Discord uses in JSON,
+# so that models decode straight from it; the richer types are built on access.
 class AvatarDecoration(msgspec.Struct, kw_only=True):
-    asset: Asset.PngAsset
+    asset_hash: AssetHash = msgspec.field(name="asset")
     sku_id: ids.SkuId
 
+    @property
+    def asset(self) -> Asset.PngAsset:
+        return Asset.avatar_decoration(self.asset_hash)
+
 
-class User(disgrace.abc.Mentionable, msgspec.Struct, kw_only=True):
+class User(msgspec.Struct, kw_only=True):
     null: ClassVar[Self]
 
     id: ids.UserId
     username: str
     discriminator: str = "0"
     global_name: str | None = None
-    avatar: Asset.StaticOrGifAsset | None = None
+    avatar_hash: AssetHash | None = msgspec.field(default=None, name="avatar")
     bot: bool = False
     system: bool = False
     mfa_enabled: bool = False
-    banner: Asset.StaticOrGifAsset | None = None
-    accent_color: Color = Color.none
+    banner_hash: AssetHash | None = msgspec.field(default=None, name="banner")
+    accent_color_value: int | None = msgspec.field(default=None, name="accent_color")
     locale: Locale = Locale.en_US
     verified: bool = False
     email: str | None = None
     flags: UserFlags = UserFlags.none
     premium_type: UserPremiumType = UserPremiumType.none
     public_flags: UserFlags = UserFlags.none
-    avatar_decoration: AvatarDecoration | None = None
+    avatar_decoration: AvatarDecoration | None = msgspec.field(
+        default=None, name="avatar_decoration_data"
+    )
 
     __eq__ = disgrace.abc.Snowflake[ids.UserId].__eq__
     __hash__ = disgrace.abc.Snowflake[ids.UserId].__hash__
     created_at = created_at
 
+    @property
+    def avatar(self) -> Asset.StaticOrGifAsset | None:
+        if self.avatar_hash is None:
+            return None
+        return Asset.user_avatar(self.id, self.avatar_hash)
+
+    @property
+    def banner(self) -> Asset.StaticOrGifAsset | None:
+        if self.banner_hash is None:
+            return None
+        return Asset.user_banner(self.id, self.banner_hash)
+
+    @property
+    def accent_color(self) -> Color:
+        return to_color(self.accent_color_value)
+
     def __bool__(self) -> bool:
         return bool(self.id)
 
+    __str__ = disgrace.abc.Mentionable.__str__
+
     @property
-    @override
     def mention(self) -> str:
         return f"<@{self.id}>"
 
@@ -56,5 +82,5 @@ User.null = User(
     username="unknown-user",
     discriminator="0",
     global_name=None,
-    avatar=None,
+    avatar_hash=None,
 )
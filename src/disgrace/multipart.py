@@ -0,0 +1,179 @@
+"""Streaming ``multipart/form-data`` bodies for uploading attachments.
+
+Bodies are produced chunk by chunk as the transport consumes them, so the memory used
+by an upload stays bounded regardless of the size of the attachments.
+"""
+
+import io
+import mimetypes
+import os
+import secrets
+from collections import abc
+from typing import Final
+
+import anyio
+import attrs
+import httpx
+
+from disgrace.exceptions import HttpException, ResourceTooLarge
+from disgrace.limits import MessageLimits
+from disgrace.resource import AnyResource, FileResource, MemoryResource, WebResource
+
+__all__ = ("MultipartStream",)
+
+CHUNK_SIZE: Final = 1 << 16
+"""Size of the chunks the body is produced in."""
+
+
+def _filename(resource: AnyResource, /) -> str:
+    spoiler = not isinstance(resource, WebResource) and resource.spoiler
+    if spoiler and not resource.filename.startswith("SPOILER_"):
+        return f"SPOILER_{resource.filename}"
+    return resource.filename
+
+
+def _quote(value: str, /) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r\n", " ")
+
+
+@attrs.define
+class MultipartStream:
+    """Async iterable ``multipart/form-data`` body of a message with attachments.
+
+    `FileResource`s are read in `CHUNK_SIZE` pieces as they are sent, `MemoryResource`s
+    are sent straight from their buffer. `WebResource`s are downloaded using `session`
+    as the upload consumes them, so at most one chunk of each is held in memory.
+    The stream can be iterated multiple times, which allows retrying the request.
+    """
+
+    payload_json: bytes
+    files: abc.Sequence[AnyResource]
+    session: httpx.AsyncClient | None = None
+    """Client used to download `WebResource`s."""
+    file_size_limit: int = MessageLimits.file_size
+    boundary: str = attrs.Factory(lambda: secrets.token_hex(16))
+
+    def __attrs_post_init__(self) -> None:
+        if len(self.files) > MessageLimits.files:
+            msg = f"len(files) > {MessageLimits.files} (= {len(self.files)})"
+            raise ValueError(msg)
+
+        for file in self.files:
+            size = self._size(file)
+            if size is not None and size > self.file_size_limit:
+                raise ResourceTooLarge(file.filename, size, self.file_size_limit)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Headers describing the body."""
+        headers = {"Content-Type": self.content_type}
+        length = self.content_length()
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        return headers
+
+    def content_length(self) -> int | None:
+        """Size of the whole body, or `None` if any part has an unknown size."""
+        total = len(self._json_header()) + len(self.payload_json) + len(self._closing())
+
+        for i, file in enumerate(self.files):
+            size = self._size(file)
+            if size is None:
+                return None
+            total += len(self._file_header(i, file)) + size
+
+        return total
+
+    async def __aiter__(self) -> abc.AsyncIterator[bytes | memoryview]:
+        yield self._json_header()
+        yield self.payload_json
+
+        for i, file in enumerate(self.files):
+            yield self._file_header(i, file)
+
+            match file:
+                case FileResource():
+                    async with await anyio.open_file(file.path, "rb") as fp:
+                        while chunk := await fp.read(CHUNK_SIZE):
+                            yield chunk
+
+                case MemoryResource():
+                    for chunk in _iter_memory(file):
+                        yield chunk
+
+                case WebResource():
+                    async for chunk in self._iter_web(file):
+                        yield chunk
+
+        yield self._closing()
+
+    async def _iter_web(self, file: WebResource, /) -> abc.AsyncIterator[bytes]:
+        if self.session is None:
+            msg = "Uploading a WebResource requires a session"
+            raise RuntimeError(msg)
+
+        async with self.session.stream("GET", file.url) as response:
+            if not response.is_success:
+                await response.aread()
+                raise HttpException(response)
+
+            declared = int(response.headers.get("content-length", 0))
+            if declared > self.file_size_limit:
+                raise ResourceTooLarge(file.filename, declared, self.file_size_limit)
+
+            received = 0
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                received += len(chunk)
+                if received > self.file_size_limit:
+                    raise ResourceTooLarge(file.filename, received, self.file_size_limit)
+                yield chunk
+
+    def _json_header(self) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            'Content-Disposition: form-data; name="payload_json"\r\n'
+            "Content-Type: application/json\r\n\r\n"
+        ).encode()
+
+    def _file_header(self, index: int, file: AnyResource) -> bytes:
+        filename = _filename(file)
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return (
+            f"\r\n--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="files[{index}]"; '
+            f'filename="{_quote(filename)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+
+    def _closing(self) -> bytes:
+        return f"\r\n--{self.boundary}--\r\n".encode()
+
+    @staticmethod
+    def _size(file: AnyResource, /) -> int | None:
+        match file:
+            case FileResource():
+                return os.stat(file.path).st_size  # noqa: PTH116
+
+            case MemoryResource():
+                if isinstance(file.stream, io.StringIO):
+                    return len(file.stream.getvalue().encode())
+                return file.stream.getbuffer().nbytes
+
+            case WebResource():
+                return None
+
+
+def _iter_memory(file: MemoryResource, /) -> abc.Iterator[memoryview | bytes]:
+    if isinstance(file.stream, io.StringIO):
+        # text has to be encoded; there is no buffer to share
+        yield file.stream.getvalue().encode()
+        return
+
+    # slices share the buffer with the stream, nothing is copied
+    view = file.stream.getbuffer()
+    for offset in range(0, len(view), CHUNK_SIZE):
+        yield view[offset : offset + CHUNK_SIZE]
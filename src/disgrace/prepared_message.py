@@ -0,0 +1,133 @@
+"""Messages encoded ahead of sending.
+
+Sending a message encodes its embeds, components and the rest on every call, even when
+the same announcement goes out to thousands of channels. `PreparedMessage` encodes them
+once, on creation; each send only splices its own fields, such as the content or a
+nonce, onto the encoded bytes.
+"""
+
+from collections import abc
+from typing import Any, Final
+
+import attrs
+import msgspec
+
+from disgrace import codecs, ids, ui
+from disgrace.allowed_mentions import AllowedMentions
+from disgrace.flags import MessageFlags
+from disgrace.http import Route, request
+from disgrace.models.common import cast_str_id
+from disgrace.models.embed import Embed
+from disgrace.structs.message import RawCreateMessage, RawMessageReference
+
+__all__ = ("PreparedMessage",)
+
+_CONTENT_KEY: Final = b'"content":'
+_NONCE_KEY: Final = b'"nonce":'
+_REFERENCE_KEY: Final = b'"message_reference":'
+
+
+@attrs.define(init=False)
+class PreparedMessage:
+    """A message encoded once, to be sent any number of times.
+
+    The message is encoded on creation; components of a `ui.ComponentTree` changed
+    afterwards are not reflected.
+    """
+
+    content: str | None
+    """Content sent unless replaced on sending."""
+    _head: bytes
+    """Encoded parameters other than the content, without the closing brace."""
+    _separator: bytes
+    """Separator of the next field spliced after the head."""
+    _encoded: msgspec.Raw
+    """Parameters with the default content, as sent without any replacements."""
+
+    def __init__(
+        self,
+        content: str | None = None,
+        *,
+        embeds: Embed | abc.Sequence[Embed] = (),
+        flags: MessageFlags = MessageFlags.none,
+        allowed_mentions: AllowedMentions | None = None,
+        components: ui.MessageComponents | ui.ComponentTree = (),
+        tts: bool = False,
+    ) -> None:
+        if isinstance(embeds, Embed):
+            embeds = (embeds,)
+
+        raw_components: Any
+        if isinstance(components, ui.ComponentTree):
+            raw_components = components.encode()
+            flags |= MessageFlags.is_components_v2
+        else:
+            raw_components = [
+                ui.ActionRow(
+                    components=list(row) if isinstance(row, abc.Sequence) else [row]
+                ).to_struct()
+                for row in components
+            ] or msgspec.UNSET
+
+        static = codecs.encode(
+            RawCreateMessage(
+                tts=tts,
+                embeds=[embed.to_struct() for embed in embeds] or msgspec.UNSET,
+                allowed_mentions=msgspec.UNSET
+                if allowed_mentions is None
+                else allowed_mentions,
+                components=raw_components,
+                flags=flags.value,
+            )
+        )
+        self.content = content
+        self._head = static[:-1]
+        self._separator = b"," if len(static) > len(b"{}") else b""
+        self._encoded = self._splice(content, None, None)
+
+    def encode(
+        self,
+        *,
+        content: str | None = None,
+        nonce: int | str | None = None,
+        reply_to: ids.MessageId | None = None,
+    ) -> msgspec.Raw:
+        """Return the JSON parameters of the message, to be passed as a request's body.
+
+        Only the given fields are encoded; the rest is reused as is.
+        """
+        if content is None and nonce is None and reply_to is None:
+            return self._encoded
+        return self._splice(self.content if content is None else content, nonce, reply_to)
+
+    async def send(
+        self,
+        channel_id: ids.ChannelId,
+        /,
+        *,
+        content: str | None = None,
+        nonce: int | str | None = None,
+        reply_to: ids.MessageId | None = None,
+    ) -> Any:
+        """Send the message to a channel, returning the created message's data."""
+        route = Route(Route.Method.POST, f"/channels/{channel_id}/messages")
+        return await request(
+            route, json=self.encode(content=content, nonce=nonce, reply_to=reply_to)
+        )
+
+    def _splice(
+        self, content: str | None, nonce: int | str | None, reply_to: ids.MessageId | None
+    ) -> msgspec.Raw:
+        parts = [self._head]
+        separator = self._separator
+        if content is not None:
+            parts += (separator, _CONTENT_KEY, codecs.encode(content))
+            separator = b","
+        if nonce is not None:
+            parts += (separator, _NONCE_KEY, codecs.encode(nonce))
+            separator = b","
+        if reply_to is not None:
+            reference = RawMessageReference(message_id=cast_str_id(reply_to))
+            parts += (separator, _REFERENCE_KEY, codecs.encode(reference))
+        parts.append(b"}")
+        return msgspec.Raw(b"".join(parts))
@@ -0,0 +1,386 @@
+"""Client-side bookkeeping of Discord's REST rate limits.
+
+Discord groups routes into buckets identified by the ``X-RateLimit-Bucket`` header.
+A bucket is further split by the route's major parameters (channel, guild, webhook),
+so two channels never share a limit even though their routes hash the same.
+
+The limiter is pluggable through `RateLimitBackend`. `RateLimiter` keeps the state
+in-process, while `SharedRateLimiter` defers to a `RateLimitServer` over a Unix socket,
+so that several processes running the same token share buckets and the global limit.
+"""
+
+import contextlib
+import os
+from collections import abc, deque
+from typing import Final, Protocol
+
+import anyio
+import anyio.abc
+import anyio.streams.buffered
+import attrs
+import msgspec
+
+from disgrace import codecs
+from disgrace._typeshed import Pathish
+from disgrace.route import Route
+
+__all__ = (
+    "Bucket",
+    "GlobalLimiter",
+    "RateLimitBackend",
+    "RateLimitServer",
+    "RateLimitTicket",
+    "RateLimiter",
+    "SharedRateLimiter",
+)
+
+_UNLIMITED: Final = 1 << 31
+"""Stand-in limit for routes which respond without rate limit headers."""
+
+
+@attrs.define
+class Bucket:
+    """Rate limit state of a single (bucket hash, major parameters) pair.
+
+    Requests acquire the bucket in FIFO order; a request only waits when the bucket
+    has been exhausted within the current window.
+    """
+
+    limit: int | None = None
+    """Number of requests per window. `None` until the first response arrives."""
+    remaining: int = 1
+    """Number of requests which can still be made within the current window."""
+    reset_at: float = 0.0
+    """Event loop time at which the window resets."""
+    _lock: anyio.Lock = attrs.field(factory=anyio.Lock, init=False)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests queued on this bucket."""
+        return self._lock.statistics().tasks_waiting
+
+    @property
+    def idle(self) -> bool:
+        """Whether no request holds the bucket and its window has reset."""
+        return not self._lock.locked() and anyio.current_time() >= self.reset_at
+
+    @contextlib.asynccontextmanager
+    async def acquire(self) -> abc.AsyncGenerator[None]:
+        async with self._lock:
+            if self.limit is None:
+                # Limits are unknown until the first response tells us;
+                # keep the lock held for the whole request so nothing races it.
+                yield
+                return
+
+            now = anyio.current_time()
+            if self.remaining <= 0 and now < self.reset_at:
+                await anyio.sleep(self.reset_at - now)
+                now = anyio.current_time()
+
+            if now >= self.reset_at:
+                self.remaining = self.limit
+
+            self.remaining -= 1
+
+        yield
+
+    def update(self, headers: abc.Mapping[str, str], /) -> None:
+        """Update the bucket state from response headers."""
+        if "x-ratelimit-limit" not in headers:
+            # keep the limits learned so far; only a route never sending the headers
+            # is taken as unlimited
+            if self.limit is None:
+                self.limit = self.remaining = _UNLIMITED
+            return
+
+        limit = int(headers["x-ratelimit-limit"])
+        remaining = int(headers["x-ratelimit-remaining"])
+        reset_at = anyio.current_time() + float(headers["x-ratelimit-reset-after"])
+
+        # Responses may arrive out of order; within the same window,
+        # trust whichever of ours and the server's count is lower.
+        if self.limit is not None and abs(reset_at - self.reset_at) < 1:
+            remaining = min(remaining, self.remaining)
+
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+    def block(self, seconds: float, /) -> None:
+        """Exhaust the bucket for given number of seconds."""
+        self.remaining = 0
+        self.reset_at = anyio.current_time() + seconds
+
+
+@attrs.define
+class GlobalLimiter:
+    """Sliding-window limiter for the per-token global rate limit."""
+
+    limit: int = 50
+    """Number of requests per `period`."""
+    period: float = 1.0
+    """Length of the window, in seconds."""
+    _sent: deque[float] = attrs.field(init=False)
+    """Times of the last `limit` requests."""
+    _blocked_until: float = attrs.field(default=0.0, init=False)
+    _lock: anyio.Lock = attrs.field(factory=anyio.Lock, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self._sent = deque(maxlen=self.limit)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = anyio.current_time()
+            if now < self._blocked_until:
+                await anyio.sleep(self._blocked_until - now)
+                now = anyio.current_time()
+
+            if len(self._sent) == self.limit and self._sent[0] + self.period > now:
+                await anyio.sleep(self._sent[0] + self.period - now)
+                now = anyio.current_time()
+
+            self._sent.append(now)
+
+    def block(self, seconds: float, /) -> None:
+        """Stop all requests for given number of seconds."""
+        self._blocked_until = max(self._blocked_until, anyio.current_time() + seconds)
+
+
+class RateLimitTicket(Protocol):
+    """Permission to perform a single request, handed out by a `RateLimitBackend`."""
+
+    __slots__ = ()
+
+    def update(self, headers: abc.Mapping[str, str], /) -> None:
+        """Feed the response headers back to the limiter."""
+        ...
+
+    def block(self, seconds: float, /) -> None:
+        """Exhaust the request's bucket for given number of seconds."""
+        ...
+
+    def block_global(self, seconds: float, /) -> None:
+        """Stop all requests for given number of seconds."""
+        ...
+
+
+class RateLimitBackend(Protocol):
+    """Object deciding when a request may be sent."""
+
+    __slots__ = ()
+
+    def acquire(
+        self, route: Route, /
+    ) -> contextlib.AbstractAsyncContextManager[RateLimitTicket]:
+        """Wait until the route can be requested.
+
+        The ticket must be updated before the context exits, unless the request failed
+        with a server error.
+        """
+        ...
+
+
+@attrs.define
+class _LocalTicket:
+    limiter: "RateLimiter"
+    route: Route
+    bucket: Bucket
+
+    def update(self, headers: abc.Mapping[str, str], /) -> None:
+        self.limiter.update(self.route, self.bucket, headers)
+
+    def block(self, seconds: float, /) -> None:
+        self.bucket.block(seconds)
+
+    def block_global(self, seconds: float, /) -> None:
+        self.limiter.global_limiter.block(seconds)
+
+
+@attrs.define
+class RateLimiter:
+    """Queues requests per bucket, so that they never race into 429s.
+
+    Requests to unrelated buckets do not block each other, apart from the global limit.
+    Every channel, guild and webhook gets buckets of its own; those left idle past
+    their window are dropped every `sweep_interval`, and start over unknown when used
+    again.
+    """
+
+    global_limiter: GlobalLimiter = attrs.Factory(GlobalLimiter)
+    sweep_interval: float = 60.0
+    """Seconds between evictions of idle buckets."""
+    _buckets: dict[str, Bucket] = attrs.field(factory=dict[str, Bucket], init=False)
+    _hashes: dict[str, str] = attrs.field(factory=dict[str, str], init=False)
+    """Maps route keys onto bucket hashes learned from responses."""
+    _next_sweep: float = attrs.field(default=0.0, init=False)
+
+    def get_bucket(self, route: Route, /) -> Bucket:
+        now = anyio.current_time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self._sweep()
+
+        route_key = route.key
+        bucket_hash = self._hashes.get(route_key, route_key)
+        key = f"{bucket_hash}:{route.major_parameters}"
+
+        try:
+            return self._buckets[key]
+
+        except KeyError:
+            bucket = self._buckets[key] = Bucket()
+            return bucket
+
+    def _sweep(self) -> None:
+        idle = [key for key, bucket in self._buckets.items() if bucket.idle]
+        for key in idle:
+            del self._buckets[key]
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, route: Route, /) -> abc.AsyncGenerator[RateLimitTicket]:
+        bucket = self.get_bucket(route)
+        async with bucket.acquire():
+            await self.global_limiter.acquire()
+            yield _LocalTicket(self, route, bucket)
+
+    def update(
+        self, route: Route, bucket: Bucket, headers: abc.Mapping[str, str], /
+    ) -> None:
+        """Update the state of a bucket and learn its hash from response headers."""
+        bucket.update(headers)
+        bucket_hash = headers.get("x-ratelimit-bucket")
+
+        if bucket_hash is None or self._hashes.get(route.key) == bucket_hash:
+            return
+
+        old_key = f"{self._hashes.get(route.key, route.key)}:{route.major_parameters}"
+        self._hashes[route.key] = bucket_hash
+        # requests already queued on the old key keep using the same object
+        self._buckets.setdefault(f"{bucket_hash}:{route.major_parameters}", bucket)
+        if self._buckets.get(old_key) is bucket and not bucket.waiting:
+            del self._buckets[old_key]
+
+
+# ------------------------------------ shared backend ------------------------------------
+_RELEVANT_HEADERS: Final = (
+    "x-ratelimit-limit",
+    "x-ratelimit-remaining",
+    "x-ratelimit-reset-after",
+    "x-ratelimit-bucket",
+)
+
+
+class _Acquire(msgspec.Struct, tag=True):
+    method: str
+    path: str
+
+
+class _Granted(msgspec.Struct, tag=True): ...
+
+
+class _Release(msgspec.Struct, tag=True, omit_defaults=True):
+    headers: dict[str, str] | None = None
+    block: float = 0
+    block_global: float = 0
+
+
+_client_decoder = codecs.decoder(_Granted)
+_server_decoder = codecs.decoder(_Acquire | _Release)
+
+
+@attrs.define
+class _SharedTicket:
+    release: _Release = attrs.Factory(_Release)
+
+    def update(self, headers: abc.Mapping[str, str], /) -> None:
+        self.release.headers = {
+            key: headers[key] for key in _RELEVANT_HEADERS if key in headers
+        }
+
+    def block(self, seconds: float, /) -> None:
+        self.release.block = seconds
+
+    def block_global(self, seconds: float, /) -> None:
+        self.release.block_global = seconds
+
+
+@attrs.define
+class SharedRateLimiter:
+    """Backend deferring to a `RateLimitServer` listening on a Unix socket.
+
+    Each request holds its own connection to the server, so a worker dying mid-request
+    releases its bucket as soon as the socket closes.
+    """
+
+    path: Pathish
+    """Path to the server's socket."""
+
+    @contextlib.asynccontextmanager
+    async def acquire(self, route: Route, /) -> abc.AsyncGenerator[RateLimitTicket]:
+        async with await anyio.connect_unix(os.fspath(self.path)) as stream:
+            receiver = anyio.streams.buffered.BufferedByteReceiveStream(stream)
+            await _send(stream, _Acquire(route.method, route.path))
+            _client_decoder.decode(await receiver.receive_until(b"\n", 1 << 16))
+
+            ticket = _SharedTicket()
+            try:
+                yield ticket
+
+            finally:
+                with anyio.CancelScope(shield=True):
+                    await _send(stream, ticket.release)
+
+
+@attrs.define
+class RateLimitServer:
+    """Serves a `RateLimiter` to `SharedRateLimiter` clients over a Unix socket."""
+
+    path: Pathish
+    """Path to bind the socket to."""
+    limiter: RateLimiter = attrs.Factory(RateLimiter)
+
+    async def serve(
+        self, *, task_status: anyio.abc.TaskStatus[None] = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        """Accept clients until cancelled.
+
+        Compatible with `TaskGroup.start`, which returns once the socket is bound.
+        """
+        async with await anyio.create_unix_listener(os.fspath(self.path)) as listener:
+            task_status.started()
+            await listener.serve(self._handle)
+
+    async def _handle(self, stream: anyio.abc.SocketStream) -> None:
+        async with stream:
+            receiver = anyio.streams.buffered.BufferedByteReceiveStream(stream)
+            try:
+                message = _server_decoder.decode(
+                    await receiver.receive_until(b"\n", 1 << 16)
+                )
+                if not isinstance(message, _Acquire):
+                    return
+
+                route = Route(Route.Method(message.method), message.path)
+                async with self.limiter.acquire(route) as ticket:
+                    await _send(stream, _Granted())
+                    release = _server_decoder.decode(
+                        await receiver.receive_until(b"\n", 1 << 16)
+                    )
+                    if not isinstance(release, _Release):
+                        return
+
+                    if release.headers is not None:
+                        ticket.update(release.headers)
+                    if release.block:
+                        ticket.block(release.block)
+                    if release.block_global:
+                        ticket.block_global(release.block_global)
+
+            except (anyio.EndOfStream, anyio.BrokenResourceError, msgspec.DecodeError):
+                # client went away; the bucket is released by leaving the context
+                return
+
+
+async def _send(stream: anyio.abc.ByteSendStream, message: msgspec.Struct) -> None:
+    await stream.send(codecs.encode(message) + b"\n")
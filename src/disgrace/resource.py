@@ -6,7 +6,9 @@ import msgspec
 
 from disgrace._typeshed import Pathish
 
-__all__ = ("FileResource", "MemoryResource", "WebResource")
+__all__ = ("AnyResource", "FileResource", "MemoryResource", "WebResource")
+
+type AnyResource = FileResource | MemoryResource | WebResource
 
 
 class FileResource(msgspec.Struct):
@@ -25,7 +27,11 @@ class WebResource(msgspec.Struct):
 
     def __post_init__(self) -> None:
         if not self.filename:
-            self.filename = httpx.URL(self.url).path.rsplit("/", 1)[-1]
+            if isinstance(self.url, httpx.URL):
+                path = self.url.path
+            else:
+                path = self.url.partition("?")[0].partition("#")[0]
+            self.filename = path.rpartition("/")[2]
 
 
 class MemoryResource(msgspec.Struct):
@@ -0,0 +1,45 @@
+"""Routes of the REST API, as identified by rate limits."""
+
+import enum
+import functools
+import re
+from typing import ClassVar, Final
+
+import attrs
+
+__all__ = ("Route",)
+
+_MAJOR_PARAMETERS: Final = re.compile(r"^/(channels|guilds|webhooks)/(\d+)(?:/([^/]+))?")
+_ROUTE_IDS: Final = re.compile(r"(?<=/)\d{15,21}(?=/|$)|(?<=/reactions/)[^/]+")
+
+
+@attrs.define
+class Route:
+    BASE: ClassVar[str] = "https://discord.com/api/v10"
+
+    class Method(enum.StrEnum):
+        GET = "GET"
+        PUT = "PUT"
+        POST = "POST"
+        PATCH = "PATCH"
+        DELETE = "DELETE"
+
+    method: Method
+    path: str
+
+    @functools.cached_property
+    def major_parameters(self) -> str:
+        """The top-level resource of the path which splits rate limit buckets."""
+        match = _MAJOR_PARAMETERS.match(self.path)
+        if match is None:
+            return ""
+
+        resource, id, token = match.groups()
+        if resource == "webhooks" and token is not None:
+            return f"{resource}/{id}/{token}"
+        return f"{resource}/{id}"
+
+    @functools.cached_property
+    def key(self) -> str:
+        """The method and path with IDs erased, identifying the route itself."""
+        return f"{self.method} {_ROUTE_IDS.sub('_', self.path)}"
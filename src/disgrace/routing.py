@@ -0,0 +1,208 @@
+"""Routing of component and modal interactions to handlers by their custom ID.
+
+The custom ID is the only link between a sent component and the code handling it.
+`InteractionRouter` maps custom IDs onto handlers either exactly, through a dictionary,
+or by a pattern of segments such as ``vote:{poll_id}:{choice}``, through a trie of the
+literal segments. Resolving a custom ID thus costs a lookup per segment, no matter how
+many routes are registered; the captured segments are passed to the handler as keyword
+arguments.
+"""
+
+from collections import abc
+from typing import Final, Protocol
+
+import attrs
+import msgspec
+
+from disgrace.dispatch import EventDispatcher
+from disgrace.structs.interaction import RawInteractionData
+
+__all__ = ("Handler", "InteractionRouter", "Routable")
+
+type Handler = abc.Callable[..., abc.Awaitable[None]]
+"""Called with the interaction and the captured segments as keyword arguments."""
+
+
+class Routable(Protocol):
+    """An interaction, or a wrapper of one, such as `deadlines.PendingInteraction`."""
+
+    __slots__ = ()
+
+    @property
+    def data(self) -> RawInteractionData | msgspec.UnsetType: ...
+
+
+_CAPTURE_START: Final = "{"
+_CAPTURE_END: Final = "}"
+
+
+@attrs.define(eq=False)
+class _Route:
+    pattern: str
+    handler: Handler
+    names: tuple[str, ...]
+    """Names of the captured segments, in order."""
+
+
+@attrs.define(eq=False)
+class _Node:
+    literals: dict[str, "_Node"] = attrs.field(factory=dict[str, "_Node"])
+    capture: "_Node | None" = None
+    route: _Route | None = None
+
+    def is_empty(self) -> bool:
+        return not self.literals and self.capture is None and self.route is None
+
+
+@attrs.define
+class InteractionRouter:
+    """Routes interactions with a custom ID to the handler registered for it.
+
+    Exact custom IDs take precedence over patterns; among patterns, a literal segment
+    takes precedence over a capture.
+    """
+
+    separator: str = ":"
+    """Separator of the segments of patterns."""
+    _exact: dict[str, Handler] = attrs.field(factory=dict[str, Handler], init=False)
+    _root: _Node = attrs.field(factory=_Node, init=False)
+
+    def subscribe(self, dispatcher: EventDispatcher, /) -> None:
+        dispatcher.subscribe("INTERACTION_CREATE", self.dispatch)
+
+    def add(self, pattern: str, handler: Handler, /) -> None:
+        """Route the custom IDs matching a pattern to a handler.
+
+        A pattern is either an exact custom ID, or consists of segments split by
+        the separator, where a segment in braces, such as ``{poll_id}``, captures
+        the segment of the custom ID under that name.
+        """
+        segments = pattern.split(self.separator)
+        names = tuple(
+            _capture_name(segment, pattern)
+            for segment in segments
+            if segment.startswith(_CAPTURE_START)
+        )
+        if not names:
+            if pattern in self._exact:
+                msg = f"{pattern!r} is already routed"
+                raise ValueError(msg)
+            self._exact[pattern] = handler
+            return
+
+        if len(set(names)) != len(names):
+            msg = f"{pattern!r} captures a segment name more than once"
+            raise ValueError(msg)
+
+        node = self._root
+        for segment in segments:
+            if segment.startswith(_CAPTURE_START):
+                if node.capture is None:
+                    node.capture = _Node()
+                node = node.capture
+            else:
+                node = node.literals.setdefault(segment, _Node())
+
+        if node.route is not None:
+            msg = f"{pattern!r} conflicts with {node.route.pattern!r}"
+            raise ValueError(msg)
+        node.route = _Route(pattern, handler, names)
+
+    def remove(self, pattern: str, /) -> None:
+        """Remove the route of a pattern."""
+        if self._exact.pop(pattern, None) is not None:
+            return
+
+        path = [self._root]
+        for segment in pattern.split(self.separator):
+            node = path[-1]
+            child = (
+                node.capture
+                if segment.startswith(_CAPTURE_START)
+                else node.literals.get(segment)
+            )
+            if child is None:
+                break
+            path.append(child)
+
+        else:
+            if (route := path[-1].route) is not None and route.pattern == pattern:
+                path[-1].route = None
+                _prune(path, pattern.split(self.separator))
+                return
+
+        msg = f"{pattern!r} is not routed"
+        raise KeyError(msg)
+
+    def resolve(self, custom_id: str, /) -> tuple[Handler, dict[str, str]] | None:
+        """Return the handler of a custom ID along with the captured segments."""
+        handler = self._exact.get(custom_id)
+        if handler is not None:
+            return handler, {}
+
+        values: list[str] = []
+        route = _match(self._root, custom_id.split(self.separator), 0, values)
+        if route is None:
+            return None
+        return route.handler, dict(zip(route.names, values, strict=True))
+
+    async def dispatch(self, interaction: Routable, /) -> None:
+        """Call the handler of an interaction, if there is one; a `Listener`."""
+        await self.route(interaction)
+
+    async def route(self, interaction: Routable, /) -> bool:
+        """Call the handler of an interaction, returning whether there was one."""
+        if isinstance(interaction.data, msgspec.UnsetType) or isinstance(
+            custom_id := interaction.data.custom_id, msgspec.UnsetType
+        ):
+            return False
+
+        resolved = self.resolve(custom_id)
+        if resolved is None:
+            return False
+
+        handler, params = resolved
+        await handler(interaction, **params)
+        return True
+
+
+def _capture_name(segment: str, pattern: str, /) -> str:
+    name = segment[1:-1]
+    if not segment.endswith(_CAPTURE_END) or not name.isidentifier():
+        msg = f"Invalid capture {segment!r} in {pattern!r}"
+        raise ValueError(msg)
+    return name
+
+
+def _match(
+    node: _Node, segments: list[str], index: int, values: list[str]
+) -> _Route | None:
+    """Return the route matching the segments from given index, capturing values."""
+    if index == len(segments):
+        return node.route
+
+    segment = segments[index]
+    child = node.literals.get(segment)
+    if child is not None and (route := _match(child, segments, index + 1, values)):
+        return route
+
+    if node.capture is not None:
+        # fall back to capturing the segment when the literal leads nowhere
+        values.append(segment)
+        if route := _match(node.capture, segments, index + 1, values):
+            return route
+        values.pop()
+    return None
+
+
+def _prune(path: list[_Node], segments: list[str], /) -> None:
+    """Remove the nodes left empty at the end of a path."""
+    for parent, node, segment in zip(
+        reversed(path[:-1]), reversed(path[1:]), reversed(segments), strict=True
+    ):
+        if not node.is_empty():
+            return
+        if parent.capture is node:
+            parent.capture = None
+        else:
+            del parent.literals[segment]
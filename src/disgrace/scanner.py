@@ -0,0 +1,215 @@
+"""Single-pass extraction of mentions and emojis from message content.
+
+`scan` finds user, role and channel mentions, custom emojis and unicode emojis in one
+pass over the text. A single character class locates the positions where a token may
+start; ``<...>`` forms are then matched by one anchored pattern, while unicode emojis
+are matched against a trie of the bundled emojis, extended by skin tones, variation
+selectors, ZWJ sequences and flags on the fly. Text made of ASCII alone, as most
+messages are, is only searched for ``<``.
+
+Markdown is not taken into account; mentions within code blocks are found, too.
+"""
+
+import functools
+import re
+from typing import Final
+
+import msgspec
+
+from disgrace import ids
+from disgrace.models.emoji import UnicodeEmoji, unicode_emoji_names
+
+__all__ = (
+    "ChannelMention",
+    "CustomEmoji",
+    "EmojiToken",
+    "RoleMention",
+    "Token",
+    "UserMention",
+    "scan",
+)
+
+_TAG: Final = re.compile(r"<(?:(@[!&]?)|(#)|(a?):(\w{2,32}):)([0-9]{1,20})>", re.ASCII)
+"""Pattern of the ``<...>`` forms, tried only where a ``<`` is found."""
+_TAG_START: Final = re.compile("<")
+
+_VS16: Final = "\N{VARIATION SELECTOR-16}"
+_ZWJ: Final = "\N{ZERO WIDTH JOINER}"
+_KEYCAP: Final = "\N{COMBINING ENCLOSING KEYCAP}"
+_SKIN_TONES: Final = frozenset(map(chr, range(0x1F3FB, 0x1F400)))
+_REGIONAL_INDICATORS: Final = frozenset(map(chr, range(0x1F1E6, 0x1F200)))
+_TAGS: Final = frozenset(map(chr, range(0xE0020, 0xE0080)))
+_KEYCAP_BASES: Final = frozenset("#*0123456789")
+_RANGE_GAP: Final = 256
+"""Greatest distance between emojis merged into a single range of candidates."""
+
+
+class _Span(msgspec.Struct, frozen=True, gc=False):
+    start: int
+    end: int
+
+
+class UserMention(_Span, frozen=True, gc=False):
+    id: ids.UserId
+
+
+class RoleMention(_Span, frozen=True, gc=False):
+    id: ids.RoleId
+
+
+class ChannelMention(_Span, frozen=True, gc=False):
+    id: ids.ChannelId
+
+
+class CustomEmoji(_Span, frozen=True, gc=False):
+    id: ids.GuildEmojiId
+    name: str
+    animated: bool
+
+
+class EmojiToken(_Span, frozen=True, gc=False):
+    emoji: UnicodeEmoji
+
+
+type Token = UserMention | RoleMention | ChannelMention | CustomEmoji | EmojiToken
+
+type _Trie = dict[str, _Trie]
+_END: Final = ""
+"""Key of the trie marking the end of an emoji."""
+
+
+@functools.cache
+def _trie() -> _Trie:
+    root: _Trie = {}
+    for name in unicode_emoji_names():
+        node = root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+
+    for indicator in _REGIONAL_INDICATORS:
+        root.setdefault(indicator, {})[_END] = {}
+    return root
+
+
+@functools.cache
+def _candidates() -> re.Pattern[str]:
+    """Return a pattern matching the characters a token may start or end with.
+
+    The starts of emojis form the class as a few ranges, since a class of many
+    characters outside of the BMP is tested one by one; the trie rejects the other
+    characters of the ranges. Keycaps, starting with a digit, are found by their end.
+    """
+    ranges: list[list[int]] = []
+    for code in sorted(ord(char) for char in _trie() if not char.isascii()):
+        if ranges and code - ranges[-1][1] <= _RANGE_GAP:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+
+    chars = "".join(
+        f"{re.escape(chr(low))}-{re.escape(chr(high))}" for low, high in ranges
+    )
+    return re.compile(f"[<{_KEYCAP}{chars}]")
+
+
+def scan(content: str, /) -> list[Token]:
+    """Return the mentions and emojis within given text, in order of appearance."""
+    tokens: list[Token] = []
+    if content.isascii():
+        # neither emojis nor keycaps are made of ASCII alone
+        if "<" not in content:
+            return tokens
+        search = _TAG_START.search
+    else:
+        search = _candidates().search
+
+    trie = _trie()
+    position = 0
+    while (match := search(content, position)) is not None:
+        start = match.start()
+        token: Token | None
+        match content[start]:
+            case "<":
+                token = _scan_tag(content, start)
+            case "\N{COMBINING ENCLOSING KEYCAP}":
+                token = _scan_keycap(content, start, position)
+            case _:
+                token = _scan_emoji(content, start, trie)
+
+        if token is None:
+            position = start + 1
+        else:
+            tokens.append(token)
+            position = token.end
+
+    return tokens
+
+
+def _scan_tag(content: str, start: int, /) -> Token | None:
+    match = _TAG.match(content, start)
+    if match is None:
+        return None
+
+    user, channel, animated, name, digits = match.groups()
+    id, end = ids.SnowflakeId(int(digits)), match.end()
+    if user == "@&":
+        return RoleMention(start, end, ids.RoleId(id))
+    if user is not None:
+        return UserMention(start, end, ids.UserId(id))
+    if channel is not None:
+        return ChannelMention(start, end, ids.ChannelId(id))
+    return CustomEmoji(start, end, ids.GuildEmojiId(id), name, bool(animated))
+
+
+def _scan_keycap(content: str, end: int, position: int, /) -> EmojiToken | None:
+    start = end - 2 if content.startswith(_VS16, end - 1) else end - 1
+    if start < position or content[start] not in _KEYCAP_BASES:
+        return None
+    return EmojiToken(start, end + 1, UnicodeEmoji.get(content[start : end + 1]))
+
+
+def _scan_emoji(content: str, start: int, trie: _Trie, /) -> EmojiToken | None:
+    end = _match_emoji(content, start, trie)
+    if end is None:
+        return None
+
+    # join the emojis of a ZWJ sequence, such as a family
+    while content.startswith(_ZWJ, end):
+        joined = _match_emoji(content, end + 1, trie)
+        if joined is None:
+            break
+        end = joined
+
+    return EmojiToken(start, end, UnicodeEmoji.get(content[start:end]))
+
+
+def _match_emoji(content: str, start: int, trie: _Trie, /) -> int | None:
+    """Return the end of the longest emoji starting at given position."""
+    node = trie
+    end = None
+    position = start
+    length = len(content)
+    while position < length and (child := node.get(content[position])) is not None:
+        node = child
+        position += 1
+        if _END in node:
+            end = position
+
+    if end is None:
+        return None
+
+    if content[start] in _REGIONAL_INDICATORS:
+        # a flag is a pair of regional indicators, of which the table lists the known
+        if end == start + 1 and end < length and content[end] in _REGIONAL_INDICATORS:
+            return end + 1
+        return end
+
+    if end < length and content[end] in _SKIN_TONES:
+        end += 1
+    if content.startswith(_VS16, end):
+        end += 1
+    # subdivision flags, such as England's
+    while end < length and content[end] in _TAGS:
+        end += 1
+    return end
@@ -0,0 +1,91 @@
+"""Persisting gateway sessions across restarts.
+
+A shard which knows its session ID and last sequence number can RESUME instead of
+IDENTIFYing after a restart; Discord then replays the events it missed, rather than
+sending every guild over again and spending an identify.
+"""
+
+import os
+import pathlib
+from collections import abc
+from typing import Protocol
+
+import anyio
+import attrs
+import msgspec
+
+from disgrace import codecs
+from disgrace._typeshed import Pathish
+
+__all__ = ("FileSessionStore", "MemorySessionStore", "SessionState", "SessionStore")
+
+
+class SessionState(msgspec.Struct, kw_only=True):
+    """What a shard needs to resume its session."""
+
+    session_id: str
+    resume_gateway_url: str
+    sequence: int
+    shard_count: int
+    """Shard count the session was started with; sessions do not survive resharding."""
+
+
+class SessionStore(Protocol):
+    """Storage of shards' session states, keyed by shard ID."""
+
+    __slots__ = ()
+
+    async def load(self) -> abc.Mapping[int, SessionState]:
+        """Return the stored sessions."""
+        ...
+
+    async def save(self, sessions: abc.Mapping[int, SessionState], /) -> None:
+        """Replace the stored sessions."""
+        ...
+
+
+@attrs.define
+class MemorySessionStore:
+    """Keeps sessions in memory, for restarting shards within one process."""
+
+    sessions: dict[int, SessionState] = attrs.Factory(dict[int, SessionState])
+
+    async def load(self) -> abc.Mapping[int, SessionState]:
+        return self.sessions
+
+    async def save(self, sessions: abc.Mapping[int, SessionState], /) -> None:
+        self.sessions = dict(sessions)
+
+
+_decoder = codecs.decoder(dict[int, SessionState])
+
+
+@attrs.define
+class FileSessionStore:
+    """Keeps sessions in a JSON file.
+
+    The file is replaced atomically, so a crash mid-write leaves the previous sessions.
+    A missing or corrupt file reads as no sessions.
+    """
+
+    path: Pathish
+
+    async def load(self) -> abc.Mapping[int, SessionState]:
+        try:
+            data = await anyio.Path(self.path).read_bytes()
+            return _decoder.decode(data)
+
+        except (FileNotFoundError, msgspec.DecodeError):
+            return {}
+
+    async def save(self, sessions: abc.Mapping[int, SessionState], /) -> None:
+        await anyio.to_thread.run_sync(self._write, codecs.encode(sessions))
+
+    def _write(self, data: bytes, /) -> None:
+        path = pathlib.Path(self.path)
+        temp = path.with_name(f".{path.name}.tmp")
+        with temp.open("wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        temp.replace(path)
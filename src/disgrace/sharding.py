@@ -0,0 +1,369 @@
+"""Running many gateway shards at once.
+
+Discord lets a bot identify ``max_concurrency`` shards every 5 seconds; shard ``i``
+belongs to bucket ``i % max_concurrency``. `ShardManager` starts all of its shards at
+once and lets an `IdentifyLimiter` pace them, so the buckets identify in parallel
+instead of one shard after another.
+
+Given a `SessionStore`, the sessions of the shards are saved when the manager stops
+and resumed on the next start.
+
+Dispatch events of all shards are queued up and passed to the dispatcher by a task of
+their own, in the order they arrive; shards keep reading and heartbeating while
+listeners work through the backlog.
+
+Shards run as tasks of a single event loop. `run_processes` spreads them across worker
+processes instead, sharing one identify limiter between all of them.
+"""
+
+import math
+import multiprocessing
+import signal
+from collections import abc
+
+import anyio
+import anyio.abc
+import anyio.streams.memory
+import attrs
+import msgspec
+
+from disgrace import events, ids
+from disgrace.dispatch import EventDispatcher
+from disgrace.exceptions import SessionStartLimitReached
+from disgrace.flags import Intents
+from disgrace.gateway import (
+    Compression,
+    GatewayConnection,
+    IdentifyLimiter,
+    LocalIdentifyLimiter,
+    SharedIdentifyLimiter,
+    best_compression,
+)
+from disgrace.http import HTTPClient, Route
+from disgrace.ratelimit import RateLimitBackend, RateLimiter
+from disgrace.sessions import SessionState, SessionStore
+from disgrace.structs.gateway import RawGatewayBot
+
+__all__ = ("ShardManager", "fetch_gateway", "run_processes", "shard_id_for")
+
+type Setup = abc.Callable[["ShardManager"], object]
+type _Events = anyio.streams.memory.MemoryObjectSendStream[events.Dispatch]
+
+
+async def fetch_gateway(http: HTTPClient, /) -> RawGatewayBot:
+    """Fetch the recommended shard count and session start limits."""
+    data = await http.request(Route(Route.Method.GET, "/gateway/bot"))
+    return msgspec.convert(data, RawGatewayBot)
+
+
+def shard_id_for(guild_id: ids.GuildId, shard_count: int, /) -> int:
+    """Return the ID of the shard receiving the events of a guild."""
+    return (guild_id >> 22) % shard_count
+
+
+@attrs.define
+class _Generation:
+    """Set of shards started together for a given shard count."""
+
+    shard_count: int
+    shards: dict[int, GatewayConnection]
+    ready: dict[int, anyio.Event]
+    scope: anyio.CancelScope = attrs.Factory(anyio.CancelScope)
+
+
+@attrs.define
+class ShardManager:
+    """Runs a set of shards within a single event loop.
+
+    Dispatch events of all shards are passed to `dispatcher`.
+    """
+
+    http: HTTPClient
+    intents: Intents = Intents.default
+    dispatcher: EventDispatcher = attrs.Factory(EventDispatcher)
+    shard_count: int | None = None
+    """Total number of shards. `None` uses the count recommended by Discord."""
+    shard_ids: abc.Sequence[int] | None = None
+    """Shards run by this manager. `None` runs all of them."""
+    compression: Compression | None = attrs.Factory(best_compression)
+    identify_limiter: IdentifyLimiter | None = None
+    """Limiter pacing identifies. `None` creates one from the session start limits."""
+    session_store: SessionStore | None = None
+    """Store to resume sessions from on start and save them to on stop."""
+
+    _active: _Generation | None = attrs.field(default=None, init=False)
+    _task_group: anyio.abc.TaskGroup | None = attrs.field(default=None, init=False)
+    _events: _Events | None = attrs.field(default=None, init=False)
+    """Queue of the dispatch events awaiting the dispatcher."""
+
+    @property
+    def shards(self) -> abc.Mapping[int, GatewayConnection]:
+        """Shards currently delivering events, by their ID."""
+        return {} if self._active is None else self._active.shards
+
+    def shard_for(self, guild_id: ids.GuildId, /) -> GatewayConnection:
+        """Return the active shard of a guild.
+
+        Raises `KeyError` if the guild belongs to a shard not run by this manager.
+        """
+        if self._active is None:
+            msg = "The manager is not running"
+            raise RuntimeError(msg)
+        return self._active.shards[shard_id_for(guild_id, self._active.shard_count)]
+
+    async def run(
+        self, *, task_status: anyio.abc.TaskStatus[None] = anyio.TASK_STATUS_IGNORED
+    ) -> None:
+        """Start the shards and keep them running until cancelled.
+
+        Compatible with `TaskGroup.start`, which returns once every shard is ready.
+        """
+        gateway = await fetch_gateway(self.http)
+        self.shard_count = shard_count = self.shard_count or gateway.shards
+        shard_ids = self._shard_ids(shard_count)
+        sessions: abc.Mapping[int, SessionState] = (
+            {} if self.session_store is None else await self.session_store.load()
+        )
+        resumable = sum(
+            1
+            for shard_id in shard_ids
+            if shard_id in sessions and sessions[shard_id].shard_count == shard_count
+        )
+        self._check_start_limit(gateway, len(shard_ids) - resumable)
+
+        if self.identify_limiter is None:
+            limit = gateway.session_start_limit
+            self.identify_limiter = LocalIdentifyLimiter(limit.max_concurrency)
+
+        try:
+            async with anyio.create_task_group() as tg:
+                self._task_group = tg
+                self._events, receive = anyio.create_memory_object_stream[
+                    events.Dispatch
+                ](math.inf)
+                tg.start_soon(self._deliver, receive)
+                generation = self._start(gateway.url, shard_count, shard_ids, sessions)
+                self._active = generation
+                await self._wait_ready(generation)
+                task_status.started()
+
+        finally:
+            with anyio.CancelScope(shield=True):
+                await self.save_sessions()
+            self._task_group = self._active = self._events = None
+
+    async def save_sessions(self) -> None:
+        """Save the sessions of the active shards to the `session_store`."""
+        if self.session_store is None:
+            return
+
+        sessions: dict[int, SessionState] = {}
+        for shard_id, shard in self.shards.items():
+            if (session := shard.session) is not None:
+                sessions[shard_id] = session
+        await self.session_store.save(sessions)
+
+    async def reshard(self, shard_count: int | None = None) -> None:
+        """Move over to a new shard count without interrupting event delivery.
+
+        The new shards connect alongside the old ones, which keep delivering events
+        until all of the new shards are ready and the old ones are shut down. Events the
+        new shards receive before then are dropped, not buffered: the old shards deliver
+        the same events, and replaying them would dispatch each twice. This includes the
+        new shards' READY and initial GUILD_CREATE events, so state built from them is
+        not refreshed. Events arriving on the old shards as they are shut down may be
+        lost.
+        """
+        if self._task_group is None or self._active is None:
+            msg = "The manager is not running"
+            raise RuntimeError(msg)
+
+        gateway = await fetch_gateway(self.http)
+        shard_count = shard_count or gateway.shards
+        shard_ids = self._shard_ids(shard_count)
+        self._check_start_limit(gateway, len(shard_ids))
+
+        old = self._active
+        new = self._start(gateway.url, shard_count, shard_ids)
+        try:
+            await self._wait_ready(new)
+
+        except BaseException:
+            new.scope.cancel()
+            raise
+
+        self._active = new
+        self.shard_count = shard_count
+        old.scope.cancel()
+
+    def _shard_ids(self, shard_count: int) -> abc.Sequence[int]:
+        if self.shard_ids is None:
+            return range(shard_count)
+        return [shard_id for shard_id in self.shard_ids if shard_id < shard_count]
+
+    @staticmethod
+    def _check_start_limit(gateway: RawGatewayBot, sessions: int) -> None:
+        limit = gateway.session_start_limit
+        if limit.remaining < sessions:
+            raise SessionStartLimitReached(limit.remaining, limit.reset_after / 1000)
+
+    def _start(
+        self,
+        url: str,
+        shard_count: int,
+        shard_ids: abc.Iterable[int],
+        sessions: abc.Mapping[int, SessionState] | None = None,
+    ) -> _Generation:
+        assert self._task_group is not None
+        assert self.identify_limiter is not None
+        generation = _Generation(shard_count, {}, {})
+
+        for shard_id in shard_ids:
+            generation.ready[shard_id] = anyio.Event()
+            shard = generation.shards[shard_id] = GatewayConnection(
+                self.http.token,
+                self.intents,
+                shard_id,
+                shard_count,
+                compression=self.compression,
+                url=url,
+                on_dispatch=self._dispatch_handler(generation, shard_id),
+                identify_limiter=self.identify_limiter,
+            )
+            if sessions and shard_id in sessions:
+                shard.restore(sessions[shard_id])
+
+        self._task_group.start_soon(self._run_generation, generation)
+        return generation
+
+    async def _run_generation(self, generation: _Generation) -> None:
+        with generation.scope:
+            async with anyio.create_task_group() as tg:
+                for shard in generation.shards.values():
+                    tg.start_soon(shard.run)
+
+    async def _deliver(
+        self,
+        receive: anyio.streams.memory.MemoryObjectReceiveStream[events.Dispatch],
+    ) -> None:
+        async with receive:
+            async for payload in receive:
+                await self.dispatcher.dispatch(payload)
+
+    @staticmethod
+    async def _wait_ready(generation: _Generation) -> None:
+        for event in generation.ready.values():
+            await event.wait()
+
+    def _dispatch_handler(
+        self, generation: _Generation, shard_id: int
+    ) -> abc.Callable[[events.Dispatch], abc.Awaitable[None]]:
+        ready = generation.ready[shard_id]
+
+        async def on_dispatch(payload: events.Dispatch) -> None:
+            if payload.t in {"READY", "RESUMED"}:
+                ready.set()
+            # events of a generation not yet switched over to duplicate the active one's
+            if generation is self._active and self._events is not None:
+                self._events.send_nowait(payload)
+
+        return on_dispatch
+
+
+# -------------------------------------- processes ---------------------------------------
+def _worker(
+    token: str,
+    intents: Intents,
+    shard_count: int,
+    shard_ids: abc.Sequence[int],
+    identify_limiter: SharedIdentifyLimiter,
+    rate_limiter: RateLimitBackend | None,
+    session_store: SessionStore | None,
+    setup: Setup,
+) -> None:
+    async def main() -> None:
+        http = HTTPClient(token, limiter=rate_limiter or RateLimiter())
+        manager = ShardManager(
+            http,
+            intents,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            identify_limiter=identify_limiter,
+            session_store=session_store,
+        )
+        setup(manager)
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(_cancel_on_signal, tg.cancel_scope)
+                await manager.run()
+
+        finally:
+            await http.aclose()
+
+    anyio.run(main)
+
+
+async def _cancel_on_signal(scope: anyio.CancelScope) -> None:
+    # stop gracefully on termination, so that the sessions get saved
+    with anyio.open_signal_receiver(signal.SIGTERM, signal.SIGINT) as signals:
+        async for _ in signals:
+            scope.cancel()
+            return
+
+
+async def run_processes(
+    http: HTTPClient,
+    setup: Setup,
+    *,
+    processes: int,
+    intents: Intents = Intents.default,
+    shard_count: int | None = None,
+    rate_limiter: RateLimitBackend | None = None,
+    session_store: abc.Callable[[int], SessionStore] | None = None,
+) -> None:
+    """Spread the shards across worker processes and wait until they exit.
+
+    Each worker creates its own `ShardManager` and passes it to `setup`, which should
+    subscribe the listeners; `setup` must therefore be picklable. Identifies of all
+    workers are paced by a single `SharedIdentifyLimiter`. Pass a `SharedRateLimiter`
+    as `rate_limiter` to share REST rate limits between the workers, too.
+    `session_store`, given the index of a worker, returns the store of its sessions.
+    """
+    gateway = await fetch_gateway(http)
+    shard_count = shard_count or gateway.shards
+    # the session start limit is checked by each worker, knowing what it can resume
+    limiter = SharedIdentifyLimiter(gateway.session_start_limit.max_concurrency)
+
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(
+                http.token,
+                intents,
+                shard_count,
+                range(index, shard_count, processes),
+                limiter,
+                rate_limiter,
+                None if session_store is None else session_store(index),
+                setup,
+            ),
+            name=f"disgrace-shards-{index}",
+        )
+        for index in range(min(processes, shard_count))
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for worker in workers:
+            await anyio.to_thread.run_sync(worker.join, abandon_on_cancel=True)
+
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+        with anyio.CancelScope(shield=True):
+            for worker in workers:
+                await anyio.to_thread.run_sync(worker.join)
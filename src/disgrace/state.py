@@ -1,3 +1,370 @@
+"""In-memory cache of Discord entities, kept up to date by gateway events.
+
+Entities are stored as the raw structs they arrive as, in dictionaries keyed by their
+`ids`, so that every lookup is a single hash. Collections nested in a guild (channels,
+roles, emojis and members) live in their own maps; the guild itself is stored with them
+emptied, so that an update to one of them never leaves a stale copy behind.
+Members are kept column-wise in a `MemberStore`, messages in a bounded `MessageCache`.
+"""
+
+from collections import abc
 from contextvars import ContextVar
+from typing import cast
+
+import attrs
+import msgspec
+
+from disgrace import ids
+from disgrace.dispatch import EventDispatcher, Listener
+from disgrace.flags import CacheFlags
+from disgrace.member_store import Member, MemberStore
+from disgrace.message_cache import MessageCache
+from disgrace.models.common import cast_int_id, cast_int_ids
+from disgrace.structs.channel import RawChannel
+from disgrace.structs.emoji import RawGuildEmoji
+from disgrace.structs.gateway import (
+    RawGuildCreate,
+    RawGuildEmojisUpdate,
+    RawGuildMemberAdd,
+    RawGuildMemberRemove,
+    RawGuildMembersChunk,
+    RawGuildMemberUpdate,
+    RawGuildRoleDelete,
+    RawGuildRoleUpdate,
+    RawMessageCreate,
+    RawMessageDelete,
+    RawMessageDeleteBulk,
+    RawReady,
+    RawThreadDelete,
+    RawUnavailableGuild,
+)
+from disgrace.structs.guild import RawGuild, RawMember
+from disgrace.structs.permissions import RawRole
+from disgrace.structs.user import RawUser
+
+__all__ = ("State", "state")
+
+
+@attrs.define
+class State:
+    """Cache of guilds, channels, roles, emojis, members, users and messages.
+
+    Entity types missing from `flags` are neither stored nor looked up, and the events
+    which only concern them are not listened to at all.
+    """
+
+    flags: CacheFlags = CacheFlags.all
+    messages: MessageCache = attrs.Factory(MessageCache)
+    user: RawUser | None = attrs.field(default=None, init=False)
+    """The connected bot user."""
+
+    guilds: dict[ids.GuildId, RawGuild] = attrs.field(
+        init=False, factory=dict[ids.GuildId, RawGuild]
+    )
+    channels: dict[ids.ChannelId, RawChannel] = attrs.field(
+        init=False, factory=dict[ids.ChannelId, RawChannel]
+    )
+    roles: dict[ids.RoleId, RawRole] = attrs.field(
+        init=False, factory=dict[ids.RoleId, RawRole]
+    )
+    emojis: dict[ids.GuildEmojiId, RawGuildEmoji] = attrs.field(
+        init=False, factory=dict[ids.GuildEmojiId, RawGuildEmoji]
+    )
+    users: dict[ids.UserId, RawUser] = attrs.field(
+        init=False, factory=dict[ids.UserId, RawUser]
+    )
+    members: MemberStore = attrs.field(init=False, factory=MemberStore)
+    unavailable: set[ids.GuildId] = attrs.field(init=False, factory=set[ids.GuildId])
+    """Guilds unavailable due to an outage; their entities are kept as last seen."""
+
+    # per-guild indexes, for dropping everything a guild owns when it goes away
+    _guild_channels: dict[ids.GuildId, set[ids.ChannelId]] = attrs.field(
+        init=False, factory=dict[ids.GuildId, set[ids.ChannelId]]
+    )
+    _guild_roles: dict[ids.GuildId, set[ids.RoleId]] = attrs.field(
+        init=False, factory=dict[ids.GuildId, set[ids.RoleId]]
+    )
+    _guild_emojis: dict[ids.GuildId, set[ids.GuildEmojiId]] = attrs.field(
+        init=False, factory=dict[ids.GuildId, set[ids.GuildEmojiId]]
+    )
+    _guild_users: dict[ids.GuildId, set[ids.UserId]] = attrs.field(
+        init=False, factory=dict[ids.GuildId, set[ids.UserId]]
+    )
+    _user_guild_counts: dict[ids.UserId, int] = attrs.field(
+        init=False, factory=dict[ids.UserId, int]
+    )
+    """Number of guilds each cached user is seen in; users of none are dropped."""
+
+    def subscribe(self, dispatcher: EventDispatcher, /) -> None:
+        """Listen to the events updating the cached entity types.
+
+        Should be called before any other listener subscribes, so that listeners see
+        the cache already updated.
+        """
+        handlers: dict[str, tuple[CacheFlags, Listener]] = {
+            "READY": (CacheFlags.all, self._ready),
+            "GUILD_CREATE": (CacheFlags.all, self._guild_create),
+            "GUILD_UPDATE": (
+                CacheFlags.guilds | CacheFlags.roles | CacheFlags.emojis,
+                self._guild_update,
+            ),
+            "GUILD_DELETE": (CacheFlags.all, self._guild_delete),
+            "CHANNEL_CREATE": (CacheFlags.channels, self._channel_update),
+            "CHANNEL_UPDATE": (CacheFlags.channels, self._channel_update),
+            "CHANNEL_DELETE": (CacheFlags.channels, self._channel_delete),
+            "THREAD_CREATE": (CacheFlags.channels, self._channel_update),
+            "THREAD_UPDATE": (CacheFlags.channels, self._channel_update),
+            "THREAD_DELETE": (CacheFlags.channels, self._channel_delete),
+            "GUILD_ROLE_CREATE": (CacheFlags.roles, self._role_update),
+            "GUILD_ROLE_UPDATE": (CacheFlags.roles, self._role_update),
+            "GUILD_ROLE_DELETE": (CacheFlags.roles, self._role_delete),
+            "GUILD_EMOJIS_UPDATE": (CacheFlags.emojis, self._emojis_update),
+            "GUILD_MEMBER_ADD": (
+                CacheFlags.members | CacheFlags.users,
+                self._member_add,
+            ),
+            "GUILD_MEMBER_UPDATE": (
+                CacheFlags.members | CacheFlags.users,
+                self._member_update,
+            ),
+            "GUILD_MEMBER_REMOVE": (
+                CacheFlags.members | CacheFlags.users,
+                self._member_remove,
+            ),
+            "GUILD_MEMBERS_CHUNK": (
+                CacheFlags.members | CacheFlags.users,
+                self._members_chunk,
+            ),
+            "USER_UPDATE": (CacheFlags.all, self._user_update),
+            "MESSAGE_CREATE": (CacheFlags.messages, self._message_create),
+            "MESSAGE_UPDATE": (CacheFlags.messages, self._message_create),
+            "MESSAGE_DELETE": (CacheFlags.messages, self._message_delete),
+            "MESSAGE_DELETE_BULK": (CacheFlags.messages, self._message_delete_bulk),
+        }
+        for event, (flags, handler) in handlers.items():
+            if flags & self.flags:
+                dispatcher.subscribe(event, handler)
+
+    # -------------------------------------- lookups -------------------------------------
+    def get_guild(self, guild_id: ids.GuildId, /) -> RawGuild | None:
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id: ids.ChannelId, /) -> RawChannel | None:
+        return self.channels.get(channel_id)
+
+    def get_role(self, role_id: ids.RoleId, /) -> RawRole | None:
+        return self.roles.get(role_id)
+
+    def get_emoji(self, emoji_id: ids.GuildEmojiId, /) -> RawGuildEmoji | None:
+        return self.emojis.get(emoji_id)
+
+    def get_user(self, user_id: ids.UserId, /) -> RawUser | None:
+        return self.users.get(user_id)
+
+    def get_member(self, guild_id: ids.GuildId, user_id: ids.UserId, /) -> Member | None:
+        return self.members.get(guild_id, user_id)
+
+    def guild_channels(self, guild_id: ids.GuildId, /) -> list[RawChannel]:
+        return [self.channels[id] for id in self._guild_channels.get(guild_id, ())]
+
+    def guild_roles(self, guild_id: ids.GuildId, /) -> list[RawRole]:
+        return [self.roles[id] for id in self._guild_roles.get(guild_id, ())]
+
+    def guild_emojis(self, guild_id: ids.GuildId, /) -> list[RawGuildEmoji]:
+        return [self.emojis[id] for id in self._guild_emojis.get(guild_id, ())]
+
+    # -------------------------------------- storing -------------------------------------
+    def _store_guild(self, guild: RawGuild, /) -> None:
+        guild_id = cast_int_id(guild.id)
+
+        if self.flags & CacheFlags.roles:
+            self._replace_roles(guild_id, guild.roles)
+
+        if self.flags & CacheFlags.emojis:
+            self._replace_emojis(guild_id, guild.emojis)
+
+        if self.flags & CacheFlags.guilds:
+            self.guilds[guild_id] = msgspec.structs.replace(guild, roles=(), emojis=())
+
+    def _replace_roles(self, guild_id: ids.GuildId, roles: abc.Iterable[RawRole]) -> None:
+        for role_id in self._guild_roles.pop(guild_id, ()):
+            self.roles.pop(role_id, None)
+
+        index = self._guild_roles[guild_id] = set[ids.RoleId]()
+        for role in roles:
+            role_id = cast_int_id(role.id)
+            self.roles[role_id] = role
+            index.add(role_id)
+
+    def _replace_emojis(
+        self, guild_id: ids.GuildId, emojis: abc.Iterable[RawGuildEmoji]
+    ) -> None:
+        for emoji_id in self._guild_emojis.pop(guild_id, ()):
+            self.emojis.pop(emoji_id, None)
+
+        index = self._guild_emojis[guild_id] = set[ids.GuildEmojiId]()
+        for emoji in emojis:
+            emoji_id = cast_int_id(emoji.id)
+            self.emojis[emoji_id] = emoji
+            index.add(emoji_id)
+
+    def _store_channel(self, channel: RawChannel, guild_id: ids.GuildId | None) -> None:
+        channel_id = cast_int_id(channel.id)
+        self.channels[channel_id] = channel
+        if guild_id is not None:
+            self._guild_channels.setdefault(guild_id, set()).add(channel_id)
+
+    def _store_member(self, guild_id: ids.GuildId, member: RawMember, /) -> None:
+        if isinstance(member.user, msgspec.UnsetType):
+            return
+
+        user_id = cast_int_id(member.user.id)
+        if self.flags & CacheFlags.users:
+            self._store_user(guild_id, member.user)
+        if self.flags & CacheFlags.members:
+            self.members.guild(guild_id).upsert(user_id, member)
+
+    def _store_user(self, guild_id: ids.GuildId, user: RawUser, /) -> None:
+        user_id = cast_int_id(user.id)
+        self.users[user_id] = user
+        index = self._guild_users.setdefault(guild_id, set())
+        if user_id not in index:
+            index.add(user_id)
+            self._user_guild_counts[user_id] = self._user_guild_counts.get(user_id, 0) + 1
+
+    def _release_user(self, user_id: ids.UserId, /) -> None:
+        count = self._user_guild_counts.pop(user_id, 1) - 1
+        if count > 0:
+            self._user_guild_counts[user_id] = count
+        else:
+            self.users.pop(user_id, None)
+
+    def _drop_guild(self, guild_id: ids.GuildId, /) -> None:
+        self.guilds.pop(guild_id, None)
+        self.members.drop_guild(guild_id)
+
+        for channel_id in self._guild_channels.pop(guild_id, ()):
+            self.channels.pop(channel_id, None)
+        for role_id in self._guild_roles.pop(guild_id, ()):
+            self.roles.pop(role_id, None)
+        for emoji_id in self._guild_emojis.pop(guild_id, ()):
+            self.emojis.pop(emoji_id, None)
+        for user_id in self._guild_users.pop(guild_id, ()):
+            self._release_user(user_id)
+
+    # --------------------------------------- events -------------------------------------
+    async def _ready(self, data: RawReady) -> None:
+        self.user = data.user
+
+    async def _user_update(self, data: RawUser) -> None:
+        self.user = data
+
+    async def _guild_create(self, data: RawGuildCreate | RawUnavailableGuild) -> None:
+        guild_id = cast_int_id(data.id)
+        if isinstance(data, RawUnavailableGuild):
+            self.unavailable.add(guild_id)
+            return
+
+        self.unavailable.discard(guild_id)
+        self._drop_guild(guild_id)
+
+        if self.flags & CacheFlags.channels:
+            for channel in (*data.channels, *data.threads):
+                self._store_channel(channel, guild_id)
+
+        if self.flags & (CacheFlags.members | CacheFlags.users):
+            for member in data.members:
+                self._store_member(guild_id, member)
+
+        # the member and channel lists are stored separately, don't keep them alive
+        self._store_guild(
+            msgspec.structs.replace(data, members=(), channels=(), threads=())
+        )
+
+    async def _guild_update(self, data: RawGuild) -> None:
+        self._store_guild(data)
+
+    async def _guild_delete(self, data: RawUnavailableGuild) -> None:
+        guild_id = cast_int_id(data.id)
+        if data.unavailable:
+            # an outage, not a removal; the guild is sent again once it is over
+            self.unavailable.add(guild_id)
+            return
+
+        self.unavailable.discard(guild_id)
+        if self.flags & CacheFlags.messages:
+            for channel_id in self._guild_channels.get(guild_id, ()):
+                self.messages.clear_channel(channel_id)
+        self._drop_guild(guild_id)
+
+    async def _channel_update(self, data: RawChannel) -> None:
+        guild_id = (
+            None
+            if isinstance(data.guild_id, msgspec.UnsetType)
+            else cast_int_id(data.guild_id)
+        )
+        self._store_channel(data, guild_id)
+
+    async def _channel_delete(self, data: RawChannel | RawThreadDelete) -> None:
+        channel_id = cast_int_id(data.id)
+        self.channels.pop(channel_id, None)
+        self.messages.clear_channel(channel_id)
+        if not isinstance(data.guild_id, msgspec.UnsetType):
+            self._guild_channels.get(cast_int_id(data.guild_id), set()).discard(
+                channel_id
+            )
+
+    async def _role_update(self, data: RawGuildRoleUpdate) -> None:
+        guild_id, role_id = cast_int_id(data.guild_id), cast_int_id(data.role.id)
+        self.roles[role_id] = data.role
+        self._guild_roles.setdefault(guild_id, set()).add(role_id)
+
+    async def _role_delete(self, data: RawGuildRoleDelete) -> None:
+        guild_id, role_id = cast_int_id(data.guild_id), cast_int_id(data.role_id)
+        self.roles.pop(role_id, None)
+        self._guild_roles.get(guild_id, set()).discard(role_id)
+
+    async def _emojis_update(self, data: RawGuildEmojisUpdate) -> None:
+        self._replace_emojis(cast_int_id(data.guild_id), data.emojis)
+
+    async def _member_add(self, data: RawGuildMemberAdd) -> None:
+        self._store_member(cast_int_id(data.guild_id), data)
+
+    async def _member_update(self, data: RawGuildMemberUpdate) -> None:
+        guild_id, user_id = cast_int_id(data.guild_id), cast_int_id(data.user.id)
+        if self.flags & CacheFlags.users:
+            self._store_user(guild_id, data.user)
+
+        if not self.flags & CacheFlags.members:
+            return
+
+        self.members.guild(guild_id).upsert(user_id, data)
+
+    async def _member_remove(self, data: RawGuildMemberRemove) -> None:
+        guild_id, user_id = cast_int_id(data.guild_id), cast_int_id(data.user.id)
+        if self.flags & CacheFlags.members:
+            self.members.remove(guild_id, user_id)
+
+        index = self._guild_users.get(guild_id)
+        if index is not None and user_id in index:
+            index.discard(user_id)
+            self._release_user(user_id)
+
+    async def _members_chunk(self, data: RawGuildMembersChunk) -> None:
+        guild_id = cast_int_id(data.guild_id)
+        for member in data.members:
+            self._store_member(guild_id, member)
+
+    async def _message_create(self, data: RawMessageCreate) -> None:
+        self.messages.add(data)
+
+    async def _message_delete(self, data: RawMessageDelete) -> None:
+        self.messages.pop(cast_int_id(data.id))
+
+    async def _message_delete_bulk(self, data: RawMessageDeleteBulk) -> None:
+        message_ids = cast("abc.Iterable[ids.MessageId]", cast_int_ids(data.ids))
+        for message_id in message_ids:
+            self.messages.pop(message_id)
+
 
-state = ContextVar[object]("state")
+state = ContextVar[State]("state")
@@ -0,0 +1,136 @@
+from collections import abc
+
+import msgspec
+
+from . import raw_ids
+from .channel import RawChannel
+from .emoji import RawGuildEmoji
+from .guild import RawGuild, RawMember
+from .message import RawMessage
+from .misc import AssetHash, BaseStruct, ISOTimestamp
+from .permissions import RawRole
+from .user import RawAvatarDecorationData, RawUser
+
+
+class RawHello(BaseStruct, kw_only=True):
+    heartbeat_interval: int
+
+
+class RawUnavailableGuild(BaseStruct, kw_only=True):
+    id: raw_ids.GuildId
+    unavailable: bool = False
+
+
+class RawReady(BaseStruct, kw_only=True):
+    v: int
+    user: RawUser
+    guilds: abc.Sequence[RawUnavailableGuild]
+    session_id: str
+    resume_gateway_url: str
+    shard: tuple[int, int] | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawGuildCreate(RawGuild, kw_only=True):
+    joined_at: ISOTimestamp
+    large: bool
+    unavailable: bool = False
+    member_count: int
+    members: abc.Sequence[RawMember]
+    channels: abc.Sequence[RawChannel]
+    threads: abc.Sequence[RawChannel]
+
+
+class RawThreadDelete(BaseStruct, kw_only=True):
+    id: raw_ids.ChannelId
+    guild_id: raw_ids.GuildId
+    parent_id: raw_ids.ChannelId
+    type: int
+
+
+class RawGuildRoleUpdate(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    role: RawRole
+
+
+class RawGuildRoleDelete(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    role_id: raw_ids.RoleId
+
+
+class RawGuildEmojisUpdate(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    emojis: abc.Sequence[RawGuildEmoji]
+
+
+class RawGuildMemberAdd(RawMember, kw_only=True):
+    guild_id: raw_ids.GuildId
+
+
+class RawGuildMemberUpdate(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    roles: abc.Sequence[raw_ids.RoleId]
+    user: RawUser
+    nick: str | None = None
+    avatar: AssetHash | None = None
+    banner: AssetHash | None = None
+    joined_at: ISOTimestamp | None = None
+    premium_since: ISOTimestamp | None = None
+    deaf: bool | msgspec.UnsetType = msgspec.UNSET
+    mute: bool | msgspec.UnsetType = msgspec.UNSET
+    pending: bool = False
+    communication_disabled_until: ISOTimestamp | None = None
+    flags: int | msgspec.UnsetType = msgspec.UNSET
+    avatar_decoration_data: RawAvatarDecorationData | None = None
+
+
+class RawGuildMemberRemove(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    user: RawUser
+
+
+class RawRequestGuildMembers(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    query: str | msgspec.UnsetType = msgspec.UNSET
+    limit: int
+    presences: bool = False
+    user_ids: abc.Sequence[raw_ids.UserId] | msgspec.UnsetType = msgspec.UNSET
+    nonce: str | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawGuildMembersChunk(BaseStruct, kw_only=True):
+    guild_id: raw_ids.GuildId
+    members: abc.Sequence[RawMember]
+    chunk_index: int
+    chunk_count: int
+    not_found: abc.Sequence[raw_ids.UserId] = ()
+    nonce: str | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawMessageCreate(RawMessage, kw_only=True):
+    guild_id: raw_ids.GuildId | msgspec.UnsetType = msgspec.UNSET
+    member: RawMember | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawMessageDelete(BaseStruct, kw_only=True):
+    id: raw_ids.MessageId
+    channel_id: raw_ids.ChannelId
+    guild_id: raw_ids.GuildId | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawMessageDeleteBulk(BaseStruct, kw_only=True):
+    ids: abc.Sequence[raw_ids.MessageId]
+    channel_id: raw_ids.ChannelId
+    guild_id: raw_ids.GuildId | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawSessionStartLimit(BaseStruct, kw_only=True):
+    total: int
+    remaining: int
+    reset_after: int
+    max_concurrency: int
+
+
+class RawGatewayBot(BaseStruct, kw_only=True):
+    url: str
+    shards: int
+    session_start_limit: RawSessionStartLimit
@@ -6,12 +6,12 @@ import msgspec
 from . import raw_ids
 from .emoji import RawGuildEmoji
 from .misc import AssetHash, BaseStruct, Bitset, ISOTimestamp
+from .permissions import RawRole
 from .sticker import RawSticker
 from .user import RawAvatarDecorationData, RawUser
 
 type RawVerificationLevel = Literal[0, 1, 2, 3, 4]
 type RawDefaultMessageNotificationLevel = Literal[0, 1]
-type RawRole = object
 
 
 class RawMember(BaseStruct, kw_only=True):
@@ -21,13 +21,13 @@ class RawMember(BaseStruct, kw_only=True):
     banner: AssetHash | None = None
     roles: abc.Sequence[raw_ids.RoleId]
     joined_at: ISOTimestamp
-    premium_sice: ISOTimestamp | msgspec.UnsetType = msgspec.UNSET
+    premium_since: ISOTimestamp | None = None
     deaf: bool
     mute: bool
     flags: int = 0
     pending: bool = False
     permissions: str | msgspec.UnsetType = msgspec.UNSET
-    communication_disabled_unitl: ISOTimestamp | None = None
+    communication_disabled_until: ISOTimestamp | None = None
     avatar_decoration_data: RawAvatarDecorationData | None = None
 
 
@@ -67,7 +67,7 @@ class RawGuild(BaseStruct, kw_only=True):
     verification_level: RawVerificationLevel
     default_message_notifications: RawDefaultMessageNotificationLevel
     explicit_content_filter: int  # TODO
-    roles: abc.Sequence[RawRole]  # TODO: guild roles have some guarantees(?)
+    roles: abc.Sequence[RawRole]
     emojis: abc.Sequence[RawGuildEmoji]
     features: abc.Sequence[str]
     mfa_level: int
@@ -0,0 +1,102 @@
+from collections import abc
+from typing import Any, Final, Literal, final
+
+import msgspec
+
+from disgrace.utils import Namespace
+
+from . import raw_ids
+from .components import ComponentType
+from .guild import RawMember
+from .message import RawMessage
+from .misc import BaseStruct
+from .user import RawUser
+
+type RawInteractionType = Literal[
+    1,  # PING
+    2,  # APPLICATION_COMMAND
+    3,  # MESSAGE_COMPONENT
+    4,  # APPLICATION_COMMAND_AUTOCOMPLETE
+    5,  # MODAL_SUBMIT
+]
+
+
+@final
+class InteractionTypeNS(Namespace):
+    """Represents the type of an interaction."""
+
+    __slots__ = ()
+
+    ping: Final = 1
+    application_command: Final = 2
+    message_component: Final = 3
+    autocomplete: Final = 4
+    modal_submit: Final = 5
+
+
+class RawInteractionData(msgspec.Struct, kw_only=True):
+    """Data of any type of interaction; the fields present depend on the type."""
+
+    # application commands
+    id: raw_ids.SnowflakeId | msgspec.UnsetType = msgspec.UNSET
+    name: str | msgspec.UnsetType = msgspec.UNSET
+    options: abc.Sequence[Any] | msgspec.UnsetType = msgspec.UNSET
+    # message components and modals
+    custom_id: str | msgspec.UnsetType = msgspec.UNSET
+    component_type: ComponentType | msgspec.UnsetType = msgspec.UNSET
+    values: abc.Sequence[str] | msgspec.UnsetType = msgspec.UNSET
+    components: abc.Sequence[Any] | msgspec.UnsetType = msgspec.UNSET
+
+
+class RawInteraction(msgspec.Struct, kw_only=True):
+    id: raw_ids.InteractionId
+    application_id: raw_ids.ApplicationId
+    type: RawInteractionType
+    data: RawInteractionData | msgspec.UnsetType = msgspec.UNSET
+    guild_id: raw_ids.GuildId | msgspec.UnsetType = msgspec.UNSET
+    channel_id: raw_ids.ChannelId | msgspec.UnsetType = msgspec.UNSET
+    member: RawMember | msgspec.UnsetType = msgspec.UNSET
+    """Member who invoked the interaction, if in a guild."""
+    user: RawUser | msgspec.UnsetType = msgspec.UNSET
+    """User who invoked the interaction, if in DMs."""
+    token: str
+    version: int = 1
+    message: RawMessage | msgspec.UnsetType = msgspec.UNSET
+    """Message the component belongs to."""
+    app_permissions: str = "0"
+    locale: str | msgspec.UnsetType = msgspec.UNSET
+    guild_locale: str | msgspec.UnsetType = msgspec.UNSET
+
+
+type RawInteractionCallbackType = Literal[
+    1,  # PONG
+    4,  # CHANNEL_MESSAGE_WITH_SOURCE
+    5,  # DEFERRED_CHANNEL_MESSAGE_WITH_SOURCE
+    6,  # DEFERRED_UPDATE_MESSAGE
+    7,  # UPDATE_MESSAGE
+    8,  # APPLICATION_COMMAND_AUTOCOMPLETE_RESULT
+    9,  # MODAL
+    12,  # LAUNCH_ACTIVITY
+]
+
+
+@final
+class InteractionCallbackTypeNS(Namespace):
+    """Represents the type of a response to an interaction."""
+
+    __slots__ = ()
+
+    pong: Final = 1
+    channel_message: Final = 4
+    deferred_channel_message: Final = 5
+    deferred_update_message: Final = 6
+    update_message: Final = 7
+    autocomplete_result: Final = 8
+    modal: Final = 9
+    launch_activity: Final = 12
+
+
+class RawInteractionResponse(BaseStruct, kw_only=True):
+    type: RawInteractionCallbackType
+    data: Any | msgspec.UnsetType = msgspec.UNSET
+    """Message, autocomplete choices or modal, depending on the type."""
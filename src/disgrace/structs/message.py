@@ -1,5 +1,5 @@
 from collections import abc
-from typing import Literal
+from typing import Any, Literal
 
 import msgspec
 
@@ -7,7 +7,7 @@ from . import raw_ids
 from .channel import RawChannelType
 from .components import RawActionRow
 from .embed import RawEmbed
-from .misc import ISOTimestamp
+from .misc import BaseStruct, ISOTimestamp
 from .reaction import RawReaction
 from .sticker import RawStickerItem
 from .user import RawUser
@@ -113,3 +113,24 @@ class RawMessage(msgspec.Struct, kw_only=True):
     # resolved?
     # poll?
     # call?
+
+
+class RawMessageReference(BaseStruct, kw_only=True):
+    type: int = 0
+    message_id: raw_ids.MessageId | msgspec.UnsetType = msgspec.UNSET
+    channel_id: raw_ids.ChannelId | msgspec.UnsetType = msgspec.UNSET
+    guild_id: raw_ids.GuildId | msgspec.UnsetType = msgspec.UNSET
+    fail_if_not_exists: bool = True
+
+
+class RawCreateMessage(BaseStruct, kw_only=True):
+    """Parameters of creating a message."""
+
+    content: str | msgspec.UnsetType = msgspec.UNSET
+    nonce: int | str | msgspec.UnsetType = msgspec.UNSET
+    tts: bool = False
+    embeds: abc.Sequence[RawEmbed] | msgspec.UnsetType = msgspec.UNSET
+    allowed_mentions: Any | msgspec.UnsetType = msgspec.UNSET
+    message_reference: RawMessageReference | msgspec.UnsetType = msgspec.UNSET
+    components: abc.Sequence[Any] | msgspec.UnsetType = msgspec.UNSET
+    flags: int = 0
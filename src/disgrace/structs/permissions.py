@@ -1,22 +1,21 @@
 import msgspec
 
-from disgrace import ids
-
+from . import raw_ids
 from .misc import BaseStruct, StrBitset
 
 
 class RawRoleTags(BaseStruct, kw_only=True):
     # None | UnsetType are just weird bools
-    bot_id: ids.SnowflakeId  # "id of the bot"
-    integration_id: ids.SnowflakeId | msgspec.UnsetType = msgspec.UNSET
+    bot_id: raw_ids.UserId | msgspec.UnsetType = msgspec.UNSET  # "id of the bot"
+    integration_id: raw_ids.SnowflakeId | msgspec.UnsetType = msgspec.UNSET
     premium_subscriber: None | msgspec.UnsetType = msgspec.UNSET
-    subscription_listing_id: ids.SnowflakeId | msgspec.UnsetType = msgspec.UNSET
+    subscription_listing_id: raw_ids.SkuId | msgspec.UnsetType = msgspec.UNSET
     available_for_purchase: None | msgspec.UnsetType = msgspec.UNSET
     guild_connections: None | msgspec.UnsetType = msgspec.UNSET
 
 
 class RawRole(BaseStruct, kw_only=True):
-    id: ids.RoleId
+    id: raw_ids.RoleId
     name: str
     color: int
     hoist: bool
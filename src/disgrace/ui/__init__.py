@@ -24,12 +24,14 @@ from .selects import (
     StringSelect,
     UserSelect,
 )
+from .tree import ComponentTree
 
 __all__ = (
     "ActionButton",
     "ActionRow",
     "ButtonStyleNS",
     "ChannelSelect",
+    "ComponentTree",
     "Container",
     "File",
     "Label",
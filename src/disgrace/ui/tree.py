@@ -0,0 +1,217 @@
+"""Component trees which cache their raw structs and JSON for re-sending."""
+
+from collections import abc
+from typing import Any, Final, cast
+
+import attrs
+import msgspec
+
+from disgrace import codecs
+from disgrace.structs.components import (
+    File,
+    MediaGallery,
+    Separator,
+    TextDisplay,
+    Thumbnail,
+)
+
+from .buttons import AnyButton
+from .layout import ActionRow, Container, Section
+from .modals import Label
+from .selects import AnySelect
+
+__all__ = ("ComponentTree",)
+
+type _TopLevel = (
+    ActionRow | Section | TextDisplay | MediaGallery | File | Separator | Container
+)
+type _Component = _TopLevel | AnyButton | AnySelect | Thumbnail | Label
+type _Children = dict[str, _Node | list[_Node]]
+
+_CHILD_FIELDS: Final[dict[type, tuple[str, ...]]] = {
+    ActionRow: ("components",),
+    Section: ("components", "accessory"),
+    Container: ("components",),
+    Label: ("component",),
+}
+"""Fields of the layout components holding other components."""
+
+
+@attrs.define(eq=False)
+class _Node:
+    component: _Component
+    parent: "_Node | None"
+    children: _Children = attrs.field(factory=dict[str, "_Node | list[_Node]"])
+    """Nodes of the fields holding other components, named as in the raw struct."""
+    struct: Any = None
+    """Cached raw struct of the component, `None` if invalidated."""
+    encoded: msgspec.Raw | None = None
+
+    def to_struct(self) -> Any:
+        if self.struct is None:
+            if self.children:
+                # the layout's own to_struct, called on a copy whose children are the
+                # nodes, builds the struct out of the cached structs of its children
+                shallow = msgspec.structs.replace(self.component, **self.children)
+                self.struct = shallow.to_struct()
+            else:
+                self.struct = self.component.to_struct()
+        return self.struct
+
+    def encode(self) -> msgspec.Raw:
+        if self.encoded is None:
+            struct = self.to_struct()
+            if self.children:
+                # splice in the JSON of the children rather than encoding them again
+                struct = msgspec.structs.replace(
+                    struct,
+                    **{
+                        field: [node.encode() for node in child]
+                        if isinstance(child, list)
+                        else child.encode()
+                        for field, child in self.children.items()
+                    },
+                )
+            self.encoded = msgspec.Raw(codecs.encode(struct))
+        return self.encoded
+
+    def walk(self) -> abc.Iterator["_Node"]:
+        yield self
+        for child in self.children.values():
+            for node in child if isinstance(child, list) else (child,):
+                yield from node.walk()
+
+
+@attrs.define(eq=False, init=False)
+class ComponentTree:
+    """Top-level components which cache their raw structs and JSON encoding.
+
+    Sending the same tree again costs a lookup, as long as the components do not
+    change. Components must not be mutated while in the tree; `replace` a component
+    instead, or `invalidate` it after mutating it, which rebuilds the structs of it
+    and its ancestors only. Replacing a component replaces its ancestors with copies
+    holding the new one, which `components` returns from then on.
+    """
+
+    _roots: list[_Node]
+    _nodes: dict[int, list[_Node]]
+    """Nodes by the ID of their component; a component may occur more than once."""
+    _structs: tuple[Any, ...] | None
+    _encoded: msgspec.Raw | None
+
+    def __init__(self, components: abc.Iterable[_TopLevel] = (), /) -> None:
+        self._nodes = {}
+        self._roots = [self._compile(component, None) for component in components]
+        self._structs = self._encoded = None
+
+    @property
+    def components(self) -> tuple[_TopLevel, ...]:
+        return tuple(root.component for root in self._roots)  # pyright: ignore[reportReturnType]
+
+    def to_struct(self) -> tuple[Any, ...]:
+        """Return the raw structs of the top-level components."""
+        if self._structs is None:
+            self._structs = tuple(root.to_struct() for root in self._roots)
+        return self._structs
+
+    def encode(self) -> msgspec.Raw:
+        """Return the JSON array of the components, to be embedded in a payload."""
+        if self._encoded is None:
+            self._encoded = msgspec.Raw(
+                codecs.encode([root.encode() for root in self._roots])
+            )
+        return self._encoded
+
+    def replace(self, old: _Component, new: _Component, /) -> None:
+        """Replace every occurrence of a component within the tree."""
+        try:
+            nodes = self._nodes[id(old)]
+
+        except KeyError:
+            msg = f"{old!r} is not in the tree"
+            raise ValueError(msg) from None
+
+        for node in tuple(nodes):
+            if new is old and not node.children:
+                self._invalidate(node)
+                continue
+
+            self._forget(node)
+            replacement = self._compile(new, node.parent)
+            siblings = self._roots if node.parent is None else node.parent.children
+            _substitute(siblings, node, replacement)
+            if new is old:
+                self._invalidate(node.parent)
+            else:
+                self._rebuild(node.parent)
+
+    def invalidate(self, component: _Component, /) -> None:
+        """Rebuild the cache of a component mutated in place."""
+        self.replace(component, component)
+
+    def _compile(self, component: _Component, parent: _Node | None, /) -> _Node:
+        node = _Node(component, parent)
+        self._nodes.setdefault(id(component), []).append(node)
+        for field in _child_fields(type(component)):
+            value = cast(
+                "_Component | abc.Sequence[_Component]", getattr(component, field)
+            )
+            if isinstance(value, abc.Sequence):
+                node.children[field] = [self._compile(child, node) for child in value]
+            else:
+                node.children[field] = self._compile(value, node)
+        return node
+
+    def _forget(self, node: _Node, /) -> None:
+        for descendant in node.walk():
+            nodes = self._nodes[id(descendant.component)]
+            nodes.remove(descendant)
+            if not nodes:
+                del self._nodes[id(descendant.component)]
+
+    def _rebuild(self, node: _Node | None, /) -> None:
+        """Replace the components of a node and its ancestors with updated copies."""
+        while node is not None:
+            old = node.component
+            node.component = msgspec.structs.replace(
+                old,
+                **{
+                    field: [child.component for child in value]
+                    if isinstance(value, list)
+                    else value.component
+                    for field, value in node.children.items()
+                },
+            )
+            nodes = self._nodes[id(old)]
+            nodes.remove(node)
+            if not nodes:
+                del self._nodes[id(old)]
+            self._nodes.setdefault(id(node.component), []).append(node)
+            node.struct = node.encoded = None
+            node = node.parent
+        self._structs = self._encoded = None
+
+    def _invalidate(self, node: _Node | None, /) -> None:
+        while node is not None:
+            node.struct = node.encoded = None
+            node = node.parent
+        self._structs = self._encoded = None
+
+
+def _child_fields(cls: type, /) -> tuple[str, ...]:
+    for base in cls.__mro__:
+        if (fields := _CHILD_FIELDS.get(base)) is not None:
+            return fields
+    return ()
+
+
+def _substitute(siblings: list[_Node] | _Children, old: _Node, new: _Node, /) -> None:
+    if isinstance(siblings, list):
+        siblings[siblings.index(old)] = new
+        return
+
+    for field, child in siblings.items():
+        if child is old:
+            siblings[field] = new
+        elif isinstance(child, list) and old in child:
+            child[child.index(old)] = new
@@ -1,5 +1,5 @@
 from collections import abc
-from typing import Self, override
+from typing import Any, Final, Self, override
 
 import attrs
 
@@ -181,18 +181,30 @@ class ValidationContext:
 def validate_components(
     components: AnyMessageComponent, /
 ) -> abc.MutableSequence[Diagnostic]:
+    """Return the diagnostics of a component tree, empty if it is valid.
+
+    The tree is checked by `is_valid` first; paths and messages are only built for
+    invalid trees.
+    """
     ctx = ValidationContext()
-    _traverse_components(components, ctx)
+    if not is_valid(components):
+        traverse_components(components, ctx)
     return ctx.diagnostics
 
 
-def _traverse_components(component: AnyMessageComponent, ctx: ValidationContext) -> None:
+def is_valid(component: AnyMessageComponent, /) -> bool:
+    """Return whether a component tree is valid, without diagnosing it."""
+    return _CHECKS[type(component)](component)
+
+
+def traverse_components(component: AnyMessageComponent, ctx: ValidationContext) -> None:
+    """Add the diagnostics of a component tree to given context."""
     match component:
         case ActionRow():
             validate_action_row(component, ctx)
 
             for subctx, child in ctx.enumerate(component.components, "components"):
-                _traverse_components(child, subctx)
+                traverse_components(child, subctx)
 
         case ActionButton():
             validate_action_button(component, ctx)
@@ -222,8 +234,8 @@ def _traverse_components(component: AnyMessageComponent, ctx: ValidationContext)
             validate_section(component, ctx)
 
             for subctx, child in ctx.enumerate(component.components, "components"):
-                _traverse_components(child, subctx)
-            _traverse_components(component.accessory, ctx.derrive("accessory"))
+                traverse_components(child, subctx)
+            traverse_components(component.accessory, ctx.derrive("accessory"))
 
         case TextDisplay():
             ...
@@ -242,7 +254,7 @@ def _traverse_components(component: AnyMessageComponent, ctx: ValidationContext)
 
         case Container():
             for subctx, child in ctx.enumerate(component.components, "components"):
-                _traverse_components(child, subctx)
+                traverse_components(child, subctx)
 
 
 def validate_action_row(action_row: ActionRow, v: ValidationContext, /) -> None:
@@ -455,3 +467,171 @@ def validate_media_gallery(gallery: MediaGallery, v: ValidationContext) -> None:
         gallery.items,
         ComponentLimits.gallery_items,
     )
+
+
+# ------------------------------------ compiled checks -----------------------------------
+# Each check mirrors the validate_* function of its class, but merely compares the limits,
+# so that a valid tree is checked without allocating anything.
+type _Check = abc.Callable[[Any], bool]
+
+_CUSTOM_ID: Final = ComponentLimits.custom_id
+_BUTTON_LABEL: Final = ComponentLimits.button_label
+_SELECT_PLACEHOLDER: Final = ComponentLimits.select_placeholder
+_SELECT_VALUES: Final = ComponentLimits.select_min_max_values.max
+_SELECT_OPTIONS: Final = ComponentLimits.select_options
+_SECTION_COMPONENTS: Final = ComponentLimits.section_components_range
+_GALLERY_ITEMS: Final = ComponentLimits.gallery_items
+
+
+class _Checks(dict[type, _Check]):
+    """Checks by component class; subclasses resolve to the check of their base."""
+
+    def __missing__(self, cls: type, /) -> _Check:
+        check = next(
+            (self[base] for base in cls.__mro__[1:] if base in self), _check_nothing
+        )
+        self[cls] = check
+        return check
+
+
+def _check_nothing(component: object, /) -> bool:
+    return True
+
+
+def _check_children(children: abc.Iterable[Any], /) -> bool:
+    # a loop rather than all(), which would allocate a generator
+    for child in children:  # noqa: SIM110
+        if not _CHECKS[type(child)](child):
+            return False
+    return True
+
+
+def _check_select(
+    custom_id: str, placeholder: str, count: int, min_values: int, max_values: int, /
+) -> bool:
+    """Mirror `check_select_options` of a select whose defaults may be empty."""
+    return (
+        len(custom_id) <= _CUSTOM_ID
+        and len(placeholder) <= _SELECT_PLACEHOLDER
+        and 0 <= min_values <= max_values <= _SELECT_VALUES
+        and count <= _SELECT_VALUES
+        and (count == 0 or min_values <= count <= max_values)
+    )
+
+
+def _check_action_row(row: ActionRow, /) -> bool:
+    return len(row.components) <= ComponentLimits.action_row_buttons and _check_children(
+        row.components
+    )
+
+
+def _check_action_button(button: ActionButton, /) -> bool:
+    return len(button.custom_id) <= _CUSTOM_ID and len(button.label) <= _BUTTON_LABEL
+
+
+def _check_link_button(button: LinkButton, /) -> bool:
+    return len(button.label) <= _BUTTON_LABEL
+
+
+def _check_string_select(select: StringSelect, /) -> bool:
+    count = len(select.options)
+    if not (
+        len(select.custom_id) <= _CUSTOM_ID
+        and len(select.placeholder) <= _SELECT_PLACEHOLDER
+        and 0 <= select.min_values <= select.max_values <= _SELECT_VALUES
+        and _SELECT_OPTIONS.min <= count <= _SELECT_OPTIONS.max
+        and select.min_values <= count <= select.max_values
+    ):
+        return False
+
+    for option in select.options:
+        if (
+            len(option.label) > ComponentLimits.select_option_label
+            or len(option.value) > ComponentLimits.select_option_value
+            or len(option.description) > ComponentLimits.select_option_description
+        ):
+            return False
+    return True
+
+
+def _check_user_select(select: UserSelect, /) -> bool:
+    return _check_select(
+        select.custom_id,
+        select.placeholder,
+        len(select.default_users),
+        select.min_values,
+        select.max_values,
+    )
+
+
+def _check_role_select(select: RoleSelect, /) -> bool:
+    return _check_select(
+        select.custom_id,
+        select.placeholder,
+        len(select.default_roles),
+        select.min_values,
+        select.max_values,
+    )
+
+
+def _check_mentionable_select(select: MentionableSelect, /) -> bool:
+    return _check_select(
+        select.custom_id,
+        select.placeholder,
+        len(select.default_users) + len(select.default_roles),
+        select.min_values,
+        select.max_values,
+    )
+
+
+def _check_channel_select(select: ChannelSelect, /) -> bool:
+    return _check_select(
+        select.custom_id,
+        select.placeholder,
+        len(select.default_channels),
+        select.min_values,
+        select.max_values,
+    )
+
+
+def _check_section(section: Section, /) -> bool:
+    accessory = section.accessory
+    return (
+        _SECTION_COMPONENTS.min <= len(section.components) <= _SECTION_COMPONENTS.max
+        and _check_children(section.components)
+        and _CHECKS[type(accessory)](accessory)
+    )
+
+
+def _check_thumbnail(thumbnail: Thumbnail, /) -> bool:
+    return len(thumbnail.description) <= ComponentLimits.media_description
+
+
+def _check_media_gallery(gallery: MediaGallery, /) -> bool:
+    return _GALLERY_ITEMS.min <= len(gallery.items) <= _GALLERY_ITEMS.max
+
+
+def _check_container(container: Container, /) -> bool:
+    return _check_children(container.components)
+
+
+_CHECKS: Final = _Checks(
+    {
+        ActionRow: _check_action_row,
+        ActionButton: _check_action_button,
+        LinkButton: _check_link_button,
+        PremiumButton: _check_nothing,
+        StringSelect: _check_string_select,
+        UserSelect: _check_user_select,
+        RoleSelect: _check_role_select,
+        MentionableSelect: _check_mentionable_select,
+        ChannelSelect: _check_channel_select,
+        Section: _check_section,
+        TextDisplay: _check_nothing,
+        Thumbnail: _check_thumbnail,
+        MediaGallery: _check_media_gallery,
+        File: _check_nothing,
+        Separator: _check_nothing,
+        Container: _check_container,
+    }
+)
@@ -0,0 +1,61 @@
+import anyio
+import httpx
+import msgspec
+
+from disgrace.deadlines import InteractionScheduler, InteractionState
+from disgrace.exceptions import InteractionResponded
+from disgrace.http import HTTPClient, Route
+from disgrace.structs.interaction import RawInteraction, RawInteractionResponse
+
+edits: list[tuple[str, bytes]] = []
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    edits.append((request.url.path, request.content))
+    return httpx.Response(200, json={})
+
+
+async def main() -> None:
+    session = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url=Route.BASE
+    )
+    scheduler = InteractionScheduler(HTTPClient("token", session=session))
+    interaction = msgspec.json.decode(
+        b'{"id": "2", "application_id": "1", "type": 2, "token": "abc"}',
+        type=RawInteraction,
+    )
+    sent: list[RawInteractionResponse] = []
+
+    async def send(response: RawInteractionResponse) -> None:
+        sent.append(response)
+
+    async with anyio.create_task_group() as tg:
+        await tg.start(scheduler.run)
+        pending = scheduler.track(interaction, send=send)
+        await pending.defer()
+        assert pending.state is InteractionState.DEFERRED
+        assert [response.type for response in sent] == [5]
+
+        # a deferred response has no message to edit in
+        for response in (
+            RawInteractionResponse(type=6),
+            RawInteractionResponse(type=9, data={"custom_id": "modal"}),
+        ):
+            try:
+                await pending.respond(response)
+            except InteractionResponded:
+                pass
+            else:
+                raise AssertionError(response)
+        assert pending.state is InteractionState.DEFERRED
+        assert not edits
+
+        await pending.respond(RawInteractionResponse(type=4, data={"content": "hi"}))
+        assert pending.state is InteractionState.RESPONDED
+        path = httpx.URL(Route.BASE).path + "/webhooks/1/abc/messages/@original"
+        assert edits == [(path, b'{"content":"hi"}')], edits
+        tg.cancel_scope.cancel()
+
+
+anyio.run(main)
+print("ok")
@@ -0,0 +1,130 @@
+"""Load test of the HTTP interactions endpoint, run in-process over ASGI.
+
+Signs requests with PyNaCl when installed; otherwise an HMAC stands in for Ed25519,
+which load tests everything but the signature check itself.
+"""
+
+import hashlib
+import hmac
+import os
+import statistics
+import time
+
+import anyio
+import httpx
+import msgspec
+
+from disgrace.deadlines import InteractionScheduler, PendingInteraction
+from disgrace.http import HTTPClient
+from disgrace.http_interactions import InteractionServer, SignatureVerifier
+from disgrace.routing import InteractionRouter
+from disgrace.structs.interaction import RawInteractionResponse
+
+REQUESTS = 5000
+CONCURRENCY = 200
+
+try:
+    from nacl.signing import SigningKey  # pyright: ignore[reportMissingImports, reportUnknownVariableType]
+
+    signing_key = SigningKey.generate()  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+    public_key: str = signing_key.verify_key.encode().hex()  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    def sign(message: bytes) -> str:
+        return signing_key.sign(message).signature.hex()  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    emulated = False
+
+except ImportError:
+    secret = os.urandom(32)
+    public_key = secret.hex()
+
+    def sign(message: bytes) -> str:
+        return hmac.digest(secret, message, hashlib.sha512).hex()
+
+    emulated = True
+
+
+def make_verifier() -> SignatureVerifier:
+    if not emulated:
+        return SignatureVerifier(public_key)
+
+    def check(message: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(
+            hmac.digest(secret, message, hashlib.sha512), signature
+        )
+
+    return SignatureVerifier(public_key, check=check)
+
+
+async def vote(interaction: PendingInteraction, poll_id: str, choice: str) -> None:
+    await interaction.respond(
+        RawInteractionResponse(type=4, data={"content": f"{choice} on {poll_id}"})
+    )
+
+
+def make_request(i: int) -> tuple[bytes, dict[str, str]]:
+    body = msgspec.json.encode(
+        {
+            "id": str(i),
+            "application_id": "1",
+            "type": 3,
+            "token": f"token{i}",
+            "data": {"custom_id": f"vote:{i % 100}:yes", "component_type": 2},
+        }
+    )
+    timestamp = str(int(time.time()))
+    return body, {
+        "x-signature-ed25519": sign(timestamp.encode() + body),
+        "x-signature-timestamp": timestamp,
+    }
+
+
+async def main() -> None:
+    router = InteractionRouter()
+    router.add("vote:{poll_id}:{choice}", vote)
+    scheduler = InteractionScheduler(HTTPClient("token"))
+    server = InteractionServer(make_verifier(), router.dispatch, scheduler)
+    requests = [make_request(i) for i in range(REQUESTS)]
+    latencies: list[float] = []
+    statuses: list[int] = []
+    limiter = anyio.CapacityLimiter(CONCURRENCY)
+
+    async with (
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(server), base_url="http://test"
+        ) as client,
+        anyio.create_task_group() as tg,
+    ):
+        await tg.start(scheduler.run)
+
+        async def post(body: bytes, headers: dict[str, str]) -> None:
+            async with limiter:
+                start = time.perf_counter()
+                response = await client.post("/", content=body, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                statuses.append(response.status_code)
+
+        start = time.perf_counter()
+        async with anyio.create_task_group() as requests_tg:
+            for body, headers in requests:
+                requests_tg.start_soon(post, body, headers)
+        elapsed = time.perf_counter() - start
+
+        bad = await client.post("/", content=requests[0][0], headers={
+            "x-signature-ed25519": "00" * 64, "x-signature-timestamp": "0"
+        })  # fmt: skip
+        tg.cancel_scope.cancel()
+
+        latencies.sort()
+        print(f"signatures: {'emulated with HMAC' if emulated else 'Ed25519'}")
+        print(f"{REQUESTS} requests in {elapsed:.2f}s, {REQUESTS / elapsed:.0f} req/s")
+        print(
+            f"latency p50 {statistics.median(latencies) * 1e3:.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.1f} ms"
+        )
+        print(f"statuses: {sorted(set(statuses))}, forged signature: {bad.status_code}")
+        stats = scheduler.stats
+        print(f"responded: {stats.responded}, deferred: {stats.deferred}")
+
+
+anyio.run(main)
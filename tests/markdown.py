@@ -0,0 +1,90 @@
+import random
+
+from disgrace.ids import SnowflakeId, UserId
+from disgrace.markdown_parser import (
+    Bold,
+    CodeBlock,
+    Heading,
+    Italic,
+    Link,
+    ListItem,
+    Paragraph,
+    Quote,
+    Spoiler,
+    Subtext,
+    Text,
+    UserMention,
+    parse,
+)
+
+# blocks
+doc = parse("# Title\n-# small\n- item\n  2. nested\n```py\ncode\n```\ntext\n> quoted")
+assert doc.blocks == (
+    Heading(1, (Text("Title"),)),
+    Subtext((Text("small"),)),
+    ListItem(0, None, (Text("item"),)),
+    ListItem(1, 2, (Text("nested"),)),
+    CodeBlock("code\n", "py"),
+    Paragraph((Text("text"),)),
+    Quote((Paragraph((Text("quoted"),)),)),
+), doc.blocks
+assert sum(doc.lengths) == len(doc.text)
+
+# quotes do not nest: a quote marker within one is text
+assert parse("> a\n> > b").blocks == (Quote((Paragraph((Text("a\n> b"),)),)),)
+assert parse(">>> a\n> b").blocks == (Quote((Paragraph((Text("a\n> b"),)),)),)
+deep = parse("> " * 400 + "x")
+assert deep.blocks == (Quote((Paragraph((Text("> " * 399 + "x"),)),)),), deep.blocks
+
+# inline
+assert parse("**bold *italic*** <@1> ||[a](https://a.b)||").blocks == (
+    Paragraph(
+        (
+            Bold((Text("bold "), Italic((Text("italic"),)))),
+            Text(" "),
+            UserMention(UserId(SnowflakeId(1))),
+            Text(" "),
+            Spoiler((Link((Text("a"),), "https://a.b"),)),
+        )
+    ),
+), parse("**bold *italic*** <@1> ||[a](https://a.b)||").blocks
+assert parse(r"\*not italic\*").blocks == (Paragraph((Text("*not italic*"),)),)
+parse("**" * 2000 + "x" + "**" * 2000)  # deep nesting stops at a depth limit
+parse("[" * 4000 + "a](https://a.b)")
+
+# incremental updates match parsing from scratch
+EDITS = 5000
+DELETES = 0.4
+rng = random.Random(0)
+pieces = [
+    "# h\n",
+    "-# s\n",
+    "- i\n",
+    "> q\n",
+    ">>> ",
+    "```",
+    "\n",
+    "**",
+    "*",
+    "x",
+    " ",
+    "1.",
+]
+text = ""
+doc = parse(text)
+for _ in range(EDITS):
+    position = rng.randint(0, len(text))
+    if text and rng.random() < DELETES:
+        text = text[:position] + text[position + rng.randint(1, 8) :]
+    else:
+        text = (
+            text[:position]
+            + "".join(rng.choices(pieces, k=rng.randint(1, 4)))
+            + text[position:]
+        )
+    text = text[:600]
+    doc = doc.update(text)
+    expected = parse(text)
+    assert doc == expected, (text, doc.blocks, expected.blocks)
+
+print("ok")
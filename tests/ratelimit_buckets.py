@@ -0,0 +1,42 @@
+import anyio
+
+from disgrace.ratelimit import RateLimiter
+from disgrace.route import Route
+
+WINDOW = 0.2
+HEADERS = {
+    "x-ratelimit-limit": "5",
+    "x-ratelimit-remaining": "4",
+    "x-ratelimit-reset-after": str(WINDOW),
+    "x-ratelimit-bucket": "messages",
+}
+
+
+async def main() -> None:
+    limiter = RateLimiter(sweep_interval=0)
+    route = Route(Route.Method.POST, "/channels/123456789012345678/messages")
+    other = Route(Route.Method.POST, "/channels/876543210987654321/messages")
+
+    async with limiter.acquire(route) as ticket:
+        ticket.update(HEADERS)
+    bucket = limiter.get_bucket(route)
+    assert bucket.limit == 5  # noqa: PLR2004
+
+    # within its window, the bucket is kept
+    assert limiter.get_bucket(route) is bucket
+
+    # a bucket held by a request, as while its limits are unknown, is kept
+    async with limiter.acquire(other):
+        held = limiter.get_bucket(other)
+        assert held.limit is None
+        assert limiter.get_bucket(other) is held
+
+    # an idle bucket past its window is dropped, and created anew on the next use
+    await anyio.sleep(WINDOW)
+    fresh = limiter.get_bucket(route)
+    assert fresh is not bucket
+    assert fresh.limit is None
+    print("ok")
+
+
+anyio.run(main)
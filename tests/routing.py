@@ -0,0 +1,61 @@
+import anyio
+import msgspec
+
+from disgrace.routing import Handler, InteractionRouter
+from disgrace.structs.interaction import RawInteractionData
+
+
+def handler(name: str) -> Handler:
+    async def handle(interaction: object, **params: str) -> None:
+        calls.append((name, params))
+
+    return handle
+
+
+calls: list[tuple[str, dict[str, str]]] = []
+router = InteractionRouter()
+exact, vote, vote_yes, page, edit = map(
+    handler, ("exact", "vote", "vote_yes", "page", "edit")
+)
+router.add("vote:1:yes", exact)
+router.add("vote:{poll_id}:{choice}", vote)
+router.add("vote:{poll_id}:yes", vote_yes)
+router.add("page:{n}", page)
+router.add("page:edit:{field}", edit)
+
+# an exact custom ID beats the patterns it matches
+assert router.resolve("vote:1:yes") == (exact, {})
+# a literal segment beats a capture at the same position
+assert router.resolve("vote:2:yes") == (vote_yes, {"poll_id": "2"})
+assert router.resolve("vote:2:no") == (vote, {"poll_id": "2", "choice": "no"})
+# a capture takes over when the literal sibling leads nowhere
+assert router.resolve("page:edit") == (page, {"n": "edit"})
+assert router.resolve("page:edit:title") == (edit, {"field": "title"})
+assert router.resolve("page:1:2") is None
+assert router.resolve("unknown") is None
+
+router.remove("page:edit:{field}")
+assert router.resolve("page:edit:title") is None
+assert router.resolve("page:edit") == (page, {"n": "edit"})
+try:
+    router.remove("page:edit:{field}")
+except KeyError:
+    pass
+else:
+    raise AssertionError
+
+
+class Interaction(msgspec.Struct):
+    data: RawInteractionData | msgspec.UnsetType
+
+
+async def main() -> None:
+    data = RawInteractionData(custom_id="vote:3:maybe")
+    assert await router.route(Interaction(data))
+    assert not await router.route(Interaction(msgspec.UNSET))
+    await router.dispatch(Interaction(RawInteractionData(custom_id="nothing")))
+    assert calls == [("vote", {"poll_id": "3", "choice": "maybe"})], calls
+
+
+anyio.run(main)
+print("ok")
@@ -0,0 +1,71 @@
+import pathlib
+import tempfile
+import time
+
+import anyio
+import httpx
+
+from disgrace.http import HTTPClient, Route
+from disgrace.ratelimit import (
+    GlobalLimiter,
+    RateLimiter,
+    RateLimitServer,
+    SharedRateLimiter,
+)
+
+WORKERS = 4
+REQUESTS_PER_WORKER = 30
+GLOBAL_LIMIT = 20
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={},
+        headers={
+            "x-ratelimit-limit": "100",
+            "x-ratelimit-remaining": "99",
+            "x-ratelimit-reset-after": "1",
+            "x-ratelimit-bucket": "messages",
+        },
+    )
+
+
+async def worker(socket: pathlib.Path, index: int) -> None:
+    session = httpx.AsyncClient(
+        base_url=Route.BASE, transport=httpx.MockTransport(handler)
+    )
+    http = HTTPClient("token", limiter=SharedRateLimiter(socket), session=session)
+    async with anyio.create_task_group() as tg:
+        for i in range(REQUESTS_PER_WORKER):
+            # distinct channels, so only the global limit applies
+            route = Route(
+                Route.Method.POST, f"/channels/{10**17 + index * 1000 + i}/messages"
+            )
+            tg.start_soon(http.request, route)
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        socket = pathlib.Path(tmp, "ratelimit.sock")
+        server = RateLimitServer(
+            socket, RateLimiter(global_limiter=GlobalLimiter(limit=GLOBAL_LIMIT))
+        )
+
+        async with anyio.create_task_group() as tg:
+            await tg.start(server.serve)
+            start = time.monotonic()
+            async with anyio.create_task_group() as workers:
+                for i in range(WORKERS):
+                    workers.start_soon(worker, socket, i)
+            elapsed = time.monotonic() - start
+            tg.cancel_scope.cancel()
+
+            total = WORKERS * REQUESTS_PER_WORKER
+            print(f"{total} requests from {WORKERS} workers in {elapsed:.2f}s")
+
+            # the first window's worth goes out immediately
+            assert elapsed >= total / GLOBAL_LIMIT - 1
+
+
+anyio.run(main)
@@ -0,0 +1,67 @@
+import random
+import timeit
+
+import msgspec
+
+from disgrace import ids
+from disgrace.member_store import GuildMembers
+from disgrace.models.common import cast_int_id, cast_int_ids
+from disgrace.structs import raw_ids
+from disgrace.structs.guild import RawMember
+
+IDS = 500
+ROUNDS = 2000
+MEMBERS = 1000
+
+raw = [
+    raw_ids.RoleId(raw_ids.SnowflakeId(str(random.getrandbits(63)))) for _ in range(IDS)
+]
+data = msgspec.json.encode(raw)
+
+strict = msgspec.json.Decoder(list[raw_ids.RoleId])
+lax = msgspec.json.Decoder(list[int], strict=False)
+
+
+def report(name: str, seconds: float) -> None:
+    print(f"{name:<28}{seconds / (ROUNDS * IDS) * 1e9:6.1f} ns/id")
+
+
+report(
+    "cast_int_id per ID",
+    timeit.timeit(lambda: [cast_int_id(id) for id in raw], number=ROUNDS),
+)
+report("cast_int_ids", timeit.timeit(lambda: cast_int_ids(raw), number=ROUNDS))
+report(
+    "decode + cast_int_id",
+    timeit.timeit(lambda: [cast_int_id(id) for id in strict.decode(data)], number=ROUNDS),
+)
+report(
+    "decode + cast_int_ids",
+    timeit.timeit(lambda: cast_int_ids(strict.decode(data)), number=ROUNDS),
+)
+report("lax decode", timeit.timeit(lambda: lax.decode(data), number=ROUNDS))
+
+assert list(cast_int_ids(raw)) == [cast_int_id(id) for id in raw] == lax.decode(data)
+
+# a member chunk: most members share one of a few role lists
+role_lists = [raw[i : i + 8] for i in range(0, 80, 8)]
+members = [
+    RawMember(
+        roles=random.choice(role_lists),
+        joined_at="2024-01-01T00:00:00+00:00",
+        deaf=False,
+        mute=False,
+    )
+    for _ in range(MEMBERS)
+]
+
+
+def chunk() -> None:
+    store = GuildMembers(ids.GuildId(ids.SnowflakeId(1)))
+    for i, member in enumerate(members):
+        store.upsert(ids.UserId(ids.SnowflakeId(i)), member)
+
+
+CHUNKS = 100
+seconds = timeit.timeit(chunk, number=CHUNKS)
+print(f"{'member upsert':<28}{seconds / (CHUNKS * MEMBERS) * 1e6:6.2f} µs/member")
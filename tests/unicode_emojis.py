@@ -0,0 +1,46 @@
+from disgrace.models.emoji import UnicodeEmoji
+from disgrace.scanner import EmojiToken, scan
+
+FAMILY = "\N{MAN}\N{ZWJ}\N{WOMAN}\N{ZWJ}\N{GIRL}"
+POLAND = "\N{REGIONAL INDICATOR SYMBOL LETTER P}\N{REGIONAL INDICATOR SYMBOL LETTER L}"
+THUMBS_UP = "\N{THUMBS UP SIGN}"
+THUMBS_UP_MEDIUM = THUMBS_UP + "\N{EMOJI MODIFIER FITZPATRICK TYPE-4}"
+HEART = "\N{HEAVY BLACK HEART}\N{VARIATION SELECTOR-16}"
+
+# Discord's shortcodes, rather than Unicode names
+for shortcode, name in (
+    ("thumbsup", THUMBS_UP),
+    ("+1", THUMBS_UP),
+    ("thumbsup_tone3", THUMBS_UP_MEDIUM),
+    ("family_mwg", FAMILY),
+    ("flag_pl", POLAND),
+    ("heart", HEART),
+):
+    emoji = UnicodeEmoji.from_shortcode(f":{shortcode}:")
+    assert emoji is not None, shortcode
+    assert emoji.name == name, (shortcode, emoji.name)
+
+assert UnicodeEmoji.from_shortcode(":thumbs_up_sign:") is None
+assert UnicodeEmoji.get(THUMBS_UP).shortcode == "thumbsup"
+assert UnicodeEmoji.get(THUMBS_UP_MEDIUM).shortcode == "thumbsup_tone3"
+assert UnicodeEmoji.get(FAMILY).shortcode == "family_mwg"
+assert UnicodeEmoji.get(POLAND).shortcode == "flag_pl"
+# the variation selector is optional
+assert UnicodeEmoji.get("\N{HEAVY BLACK HEART}").shortcode == "heart"
+# only emojis are in the table
+assert UnicodeEmoji.get("\N{BACK OF ENVELOPE}").shortcode is None
+
+# the sequences of the table are interned
+for name in (FAMILY, POLAND, THUMBS_UP_MEDIUM):
+    assert UnicodeEmoji.get(name) is UnicodeEmoji.get(name[:1] + name[1:])
+
+content = f"{FAMILY} and {POLAND}{POLAND}, {THUMBS_UP_MEDIUM}{HEART}"
+assert [token.emoji.name for token in scan(content) if isinstance(token, EmojiToken)] == [
+    FAMILY,
+    POLAND,
+    POLAND,
+    THUMBS_UP_MEDIUM,
+    HEART,
+]
+
+print("ok")
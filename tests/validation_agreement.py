@@ -0,0 +1,181 @@
+import random
+from typing import Any
+
+from disgrace.limits import ComponentLimits
+from disgrace.object import Object
+from disgrace.ui import (
+    ActionButton,
+    ActionRow,
+    ChannelSelect,
+    Container,
+    File,
+    LinkButton,
+    MediaGallery,
+    MediaGalleryItem,
+    MentionableSelect,
+    RoleSelect,
+    Section,
+    SelectOption,
+    Separator,
+    StringSelect,
+    TextDisplay,
+    Thumbnail,
+    UnfurledMediaItem,
+    UserSelect,
+)
+from disgrace.ui.validation import (
+    AnyMessageComponent,
+    ValidationContext,
+    is_valid,
+    traverse_components,
+    validate_components,
+)
+
+TREES = 20000
+MEDIA = UnfurledMediaItem(url="https://example.com/a.png")
+rng = random.Random(0)
+
+
+def length(limit: int) -> int:
+    """Return a length around a limit, or within it."""
+    return rng.choice((0, 1, limit - 1, limit, limit + 1, rng.randint(0, limit)))
+
+
+def text(limit: int) -> str:
+    return "x" * length(limit)
+
+
+def count(limit: int) -> int:
+    return length(limit) if rng.random() < 0.2 else rng.randint(0, min(limit, 3))  # noqa: PLR2004
+
+
+def values() -> tuple[int, int]:
+    bound = ComponentLimits.select_min_max_values.max
+    pick = (-1, 0, 1, 2, bound - 1, bound, bound + 1)
+    return rng.choice(pick), rng.choice(pick)
+
+
+def button() -> Any:
+    if rng.random() < 0.5:  # noqa: PLR2004
+        return LinkButton(
+            url="https://example.com", label=text(ComponentLimits.button_label)
+        )
+    return ActionButton(
+        custom_id=text(ComponentLimits.custom_id),
+        label=text(ComponentLimits.button_label),
+    )
+
+
+def select() -> Any:
+    custom_id = text(ComponentLimits.custom_id)
+    placeholder = text(ComponentLimits.select_placeholder)
+    min_values, max_values = values()
+    defaults: list[Any] = [Object(1)] * count(ComponentLimits.select_min_max_values.max)
+    match rng.randrange(5):
+        case 0:
+            options = [
+                SelectOption(
+                    label=text(ComponentLimits.select_option_label),
+                    value=text(ComponentLimits.select_option_value),
+                    description=text(ComponentLimits.select_option_description),
+                )
+            ] * count(ComponentLimits.select_options.max)
+            return StringSelect(
+                custom_id=custom_id,
+                options=options,
+                placeholder=placeholder,
+                min_values=min_values,
+                max_values=max_values,
+            )
+        case 1:
+            return UserSelect(
+                custom_id=custom_id,
+                placeholder=placeholder,
+                default_users=defaults,
+                min_values=min_values,
+                max_values=max_values,
+            )
+        case 2:
+            return RoleSelect(
+                custom_id=custom_id,
+                placeholder=placeholder,
+                default_roles=defaults,
+                min_values=min_values,
+                max_values=max_values,
+            )
+        case 3:
+            return MentionableSelect(
+                custom_id=custom_id,
+                placeholder=placeholder,
+                default_users=defaults,
+                default_roles=defaults[: rng.randint(0, len(defaults))],
+                min_values=min_values,
+                max_values=max_values,
+            )
+        case _:
+            return ChannelSelect(
+                custom_id=custom_id,
+                channel_types=(),
+                placeholder=placeholder,
+                default_channels=defaults,
+                min_values=min_values,
+                max_values=max_values,
+            )
+
+
+def thumbnail() -> Thumbnail:
+    return Thumbnail(media=MEDIA, description=text(ComponentLimits.media_description))
+
+
+def component(depth: int) -> AnyMessageComponent:
+    """Return a random tree, its values around the limits of each component."""
+    match rng.randrange(10 if depth else 8):
+        case 0:
+            children = [
+                button() if rng.random() < 0.8 else select()  # noqa: PLR2004
+                for _ in range(count(ComponentLimits.action_row_buttons))
+            ]
+            return ActionRow(components=children)
+        case 1:
+            return button()
+        case 2:
+            return select()
+        case 3:
+            limit = ComponentLimits.section_components_range.max
+            return Section(
+                components=[TextDisplay(content="x")] * count(limit),
+                accessory=thumbnail() if rng.random() < 0.5 else button(),  # noqa: PLR2004
+            )
+        case 4:
+            return thumbnail()
+        case 5:
+            items = [
+                MediaGalleryItem(
+                    media=MEDIA, description=text(ComponentLimits.media_description)
+                )
+            ] * count(ComponentLimits.gallery_items.max)
+            return MediaGallery(items=items)
+        case 6:
+            return rng.choice((TextDisplay(content="x"), File(file=MEDIA), Separator()))
+        case 7:
+            return ActionRow(components=[select()])
+        case _:
+            children = [component(depth - 1) for _ in range(rng.randint(0, 4))]
+            return Container(components=children)  # pyright: ignore[reportArgumentType]
+
+
+# the compiled checks agree with the diagnostics, whether a tree is valid or not
+valid = 0
+for _ in range(TREES):
+    tree = component(depth=2)
+    # diagnosed regardless of is_valid, which validate_components consults first
+    ctx = ValidationContext()
+    traverse_components(tree, ctx)
+    assert is_valid(tree) == (not ctx.diagnostics), (tree, str(ctx))
+    assert len(validate_components(tree)) == len(ctx.diagnostics)
+    valid += not ctx.diagnostics
+
+# both outcomes were exercised
+assert 0 < valid < TREES, valid
+
+print("ok")